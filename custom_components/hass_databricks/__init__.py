@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import asyncio
+from concurrent.futures import Executor
 from dataclasses import dataclass, field
 from datetime import timedelta
 import logging
@@ -14,6 +16,7 @@ from homeassistant.config_entries import ConfigEntry, SOURCE_REAUTH
 from homeassistant.core import HomeAssistant, ServiceCall
 from homeassistant.exceptions import ConfigEntryNotReady, HomeAssistantError
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.helpers.storage import Store
 from homeassistant.const import Platform
@@ -23,41 +26,80 @@ from .const import (
     CONF_AUTO_SYNC_ENABLED,
     CONF_AUTO_SYNC_INTERVAL_MINUTES,
     CONF_CATALOG,
+    CONF_CHUNK_CODEC,
+    CONF_CHUNK_FORMAT,
+    CONF_CHUNK_MEMORY_CEILING_MB,
     CONF_CHUNK_SIZE,
+    CONF_CHUNK_SIZING,
+    CONF_CHUNK_TARGET_MB,
+    CONF_CHUNK_TARGET_SECONDS,
+    CONF_LOOP_LAG_THRESHOLD_MS,
+    CONF_COMPRESSION_LEVEL,
     CONF_DB_PATH,
     CONF_DBX_VOLUMES_PATH,
     CONF_ENTITY_LIKE,
+    CONF_FORCE_DDL,
     CONF_HTTP_PATH,
     CONF_HOT_COPY_DB,
+    CONF_IN_MEMORY_STAGING,
     CONF_KEEP_LOCAL_FILE,
     CONF_LOCAL_PATH,
+    CONF_MAX_CONCURRENT_UPLOADS,
+    CONF_PIPELINE_DEPTH,
     CONF_SCHEMA,
     CONF_SERVER_HOSTNAME,
+    CONF_STATEMENT_TIMEOUT_SECONDS,
+    CONF_SYNC_WORKERS,
     CONF_TABLE,
+    CONF_TABLE_LAYOUT,
     DEFAULT_AUTO_SYNC_ENABLED,
     DEFAULT_AUTO_SYNC_INTERVAL_MINUTES,
+    DEFAULT_CHUNK_CODEC,
+    DEFAULT_CHUNK_FORMAT,
+    DEFAULT_CHUNK_MEMORY_CEILING_MB,
     DEFAULT_CHUNK_SIZE,
+    DEFAULT_CHUNK_SIZING,
+    DEFAULT_CHUNK_TARGET_MB,
+    DEFAULT_CHUNK_TARGET_SECONDS,
+    DEFAULT_LOOP_LAG_THRESHOLD_MS,
+    DEFAULT_COMPRESSION_LEVEL,
     DEFAULT_DB_FILENAME,
     DEFAULT_ENTITY_LIKE,
+    DEFAULT_IN_MEMORY_STAGING,
     DEFAULT_INCREMENTAL_LOOKBACK_MINUTES,
     DEFAULT_LOCAL_PATH,
+    DEFAULT_MAX_CONCURRENT_UPLOADS,
+    DEFAULT_PIPELINE_DEPTH,
+    DEFAULT_STATEMENT_TIMEOUT_SECONDS,
+    DEFAULT_SYNC_WORKERS,
+    DEFAULT_TABLE_LAYOUT,
     DOMAIN,
     EVENT_SYNC_RESULT,
+    JOURNAL_SAVE_DELAY_SECONDS,
+    SERVICE_MIGRATE_TABLE_LAYOUT,
     SERVICE_SYNC,
+    SIGNAL_SYNC_STATE,
     SYNC_META_AVAILABLE,
+    SYNC_META_DDL_FINGERPRINTS,
+    SYNC_META_JOB_JOURNALS,
     SYNC_META_LAST_ERROR,
     SYNC_META_LAST_FILENAME,
+    SYNC_META_LAST_METRICS,
     SYNC_META_LAST_ROWS,
     SYNC_META_LAST_RUN_TS,
     SYNC_META_LAST_SINCE_TS,
     SYNC_META_LAST_STATUS,
     SYNC_META_LAST_UNAVAILABLE_LOG,
+    SYNC_META_STATE_ID_WATERMARKS,
     STORAGE_KEY_PREFIX,
     STORAGE_VERSION,
     SYNC_META_LAST_SUCCESS_TS,
     SYNC_META_LAST_TARGET,
     SYNC_META_LAST_TRIGGER,
+    SYNC_STATE_IDLE,
+    SYNC_STATUS_NO_CHANGES,
 )
+from .coordinator import SyncCoordinator, warehouse_slots
 
 _LOGGER = logging.getLogger(__name__)
 PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.BUTTON]
@@ -70,7 +112,12 @@ class HassDataBricksRuntimeData:
     store: Any
     sync_meta: dict = field(default_factory=dict)
     sync_func: Callable | None = None
+    sync_coordinator: SyncCoordinator | None = None
     unsub_auto_sync: Callable | None = None
+    metadata_resolver: Any | None = None
+    sync_tasks: set[asyncio.Task] = field(default_factory=set)
+    layout_migration_running: bool = False
+    sync_executor: Executor | None = None
 
 
 async def async_test_databricks_connection(
@@ -185,6 +232,8 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         rows: int | None = None,
         filename: str | None = None,
         error: str | None = None,
+        status: str | None = None,
+        metrics: dict | None = None,
     ) -> None:
         """Record one sync run for Activity/Logbook and automations."""
         sync_meta = entry.runtime_data.sync_meta
@@ -204,7 +253,12 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
                 _LOGGER.info("hass_databricks sync reconnected and operational")
                 sync_meta[SYNC_META_AVAILABLE] = True
 
-        if success:
+        if status is None:
+            status = "success" if success else "failed"
+
+        if status == SYNC_STATUS_NO_CHANGES:
+            message = f"Sync skipped, no new rows -> {target}"
+        elif success:
             message = f"Sync succeeded ({rows} rows) -> {target}"
             if filename:
                 message = f"{message} ({filename})"
@@ -227,6 +281,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             {
                 "entry_id": entry.entry_id,
                 "success": success,
+                "status": status,
                 "trigger": trigger,
                 "target": target,
                 "since_ts": since_ts,
@@ -235,25 +290,26 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
                 "rows": rows,
                 "filename": filename,
                 "error": error,
+                "metrics": metrics,
             },
         )
 
-    async def _run_sync(call_data: dict, trigger: str) -> None:
-        """Run one sync execution for this config entry."""
-        try:
-            from .pipeline import SyncRequest, run_sync_pipeline
-        except ImportError as err:
-            raise HomeAssistantError(
-                "Sync dependencies are unavailable in this Home Assistant runtime. "
-                "Check integration requirements and container build dependencies."
-            ) from err
-
+    def _build_sync_request(call_data: dict, request_cls: type) -> Any:
+        """Build a pipeline request from entry config and service call overrides."""
         data = entry.data
         opts = entry.options
 
         db_path = call_data.get(CONF_DB_PATH) or hass.config.path(DEFAULT_DB_FILENAME)
 
-        request = SyncRequest(
+        # Blocking sync work gets its own pool, started with the first run
+        if runtime_data.sync_executor is None:
+            from .pipeline import create_sync_executor
+
+            runtime_data.sync_executor = create_sync_executor(
+                int(opts.get(CONF_SYNC_WORKERS, DEFAULT_SYNC_WORKERS))
+            )
+
+        return request_cls(
             db_path=db_path,
             server_hostname=data[CONF_SERVER_HOSTNAME],
             http_path=data[CONF_HTTP_PATH],
@@ -281,11 +337,79 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
                 )
             ),
             hot_copy_db=call_data.get(CONF_HOT_COPY_DB),
+            pipeline_depth=int(opts.get(CONF_PIPELINE_DEPTH, DEFAULT_PIPELINE_DEPTH)),
+            max_concurrent_uploads=int(
+                opts.get(CONF_MAX_CONCURRENT_UPLOADS, DEFAULT_MAX_CONCURRENT_UPLOADS)
+            ),
+            loop_lag_threshold=int(
+                opts.get(CONF_LOOP_LAG_THRESHOLD_MS, DEFAULT_LOOP_LAG_THRESHOLD_MS)
+            )
+            / 1000,
+            executor=runtime_data.sync_executor,
+            in_memory_staging=bool(
+                opts.get(CONF_IN_MEMORY_STAGING, DEFAULT_IN_MEMORY_STAGING)
+            ),
+            chunk_codec=opts.get(CONF_CHUNK_CODEC, DEFAULT_CHUNK_CODEC),
+            compression_level=int(
+                opts.get(CONF_COMPRESSION_LEVEL, DEFAULT_COMPRESSION_LEVEL)
+            ),
+            chunk_format=opts.get(CONF_CHUNK_FORMAT, DEFAULT_CHUNK_FORMAT),
+            chunk_sizing=opts.get(CONF_CHUNK_SIZING, DEFAULT_CHUNK_SIZING),
+            chunk_target_bytes=int(
+                opts.get(CONF_CHUNK_TARGET_MB, DEFAULT_CHUNK_TARGET_MB)
+            )
+            * 1024
+            * 1024,
+            chunk_target_seconds=float(
+                opts.get(CONF_CHUNK_TARGET_SECONDS, DEFAULT_CHUNK_TARGET_SECONDS)
+            ),
+            chunk_memory_ceiling_bytes=int(
+                opts.get(CONF_CHUNK_MEMORY_CEILING_MB, DEFAULT_CHUNK_MEMORY_CEILING_MB)
+            )
+            * 1024
+            * 1024,
+            table_layout=call_data.get(
+                CONF_TABLE_LAYOUT, opts.get(CONF_TABLE_LAYOUT, DEFAULT_TABLE_LAYOUT)
+            ),
+            statement_timeout=float(
+                opts.get(
+                    CONF_STATEMENT_TIMEOUT_SECONDS, DEFAULT_STATEMENT_TIMEOUT_SECONDS
+                )
+            ),
             min_last_updated_ts=None,
+            metadata_resolver=entry.runtime_data.metadata_resolver,
             session=async_get_clientsession(hass),
             hass=hass,
         )
 
+    async def _run_sync(call_data: dict, trigger: str) -> None:
+        """Run one sync execution for this config entry."""
+        try:
+            from .pipeline import (
+                EntityMetadataResolver,
+                SyncJournal,
+                SyncMetrics,
+                SyncRequest,
+                run_sync_pipeline,
+            )
+        except ImportError as err:
+            raise HomeAssistantError(
+                "Sync dependencies are unavailable in this Home Assistant runtime. "
+                "Check integration requirements and container build dependencies."
+            ) from err
+
+        if entry.runtime_data.layout_migration_running:
+            raise HomeAssistantError(
+                "A table layout migration is running; sync is paused until it ends."
+            )
+
+        # Keep the metadata_id -> entity_id map warm between runs
+        if entry.runtime_data.metadata_resolver is None:
+            entry.runtime_data.metadata_resolver = EntityMetadataResolver()
+
+        request = _build_sync_request(call_data, SyncRequest)
+        data = entry.data
+
         last_success_ts = entry.runtime_data.sync_meta.get(SYNC_META_LAST_SUCCESS_TS)
         if last_success_ts is not None:
             lookback_seconds = DEFAULT_INCREMENTAL_LOOKBACK_MINUTES * 60
@@ -294,6 +418,42 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         target = f"{request.catalog}.{request.schema}.{request.table}"
         run_ts = time.time()
 
+        # Seek straight past rows already committed to this target. The
+        # watermark is dropped when the entity filter changes, and the
+        # pipeline re-validates it against the recorder before use.
+        watermark = entry.runtime_data.sync_meta.get(
+            SYNC_META_STATE_ID_WATERMARKS, {}
+        ).get(target)
+        if watermark and watermark.get("entity_like") == request.entity_like:
+            request.min_state_id = int(watermark.get("state_id") or 0)
+            request.min_state_id_ts = watermark.get("last_updated_ts")
+
+        # Skip CREATE SCHEMA/TABLE once they have succeeded for this target
+        request.ddl_fingerprint = entry.runtime_data.sync_meta.get(
+            SYNC_META_DDL_FINGERPRINTS, {}
+        ).get(target)
+        request.force_ddl = bool(call_data.get(CONF_FORCE_DDL, False))
+
+        # Chunk progress is journaled per target so an interrupted job resumes
+        journals = entry.runtime_data.sync_meta.setdefault(SYNC_META_JOB_JOURNALS, {})
+
+        async def _save_journal(journal: dict | None, immediate: bool) -> None:
+            if journal is None:
+                journals.pop(target, None)
+            else:
+                journals[target] = journal
+            if immediate:
+                await store.async_save(entry.runtime_data.sync_meta)
+            else:
+                # Chunk progress is cheap to lose (the chunk is redone) but
+                # rewriting the whole blob per chunk wears the SD card
+                store.async_delay_save(
+                    lambda: entry.runtime_data.sync_meta, JOURNAL_SAVE_DELAY_SECONDS
+                )
+
+        request.journal = SyncJournal(journals.get(target), _save_journal)
+        request.metrics = SyncMetrics()
+
         async def _start_reauth_if_needed(err: Exception) -> None:
             """Trigger reauthentication flow on auth-related failures."""
             err_text = str(err).lower()
@@ -310,6 +470,9 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             )
 
         _LOGGER.info("Starting hass_databricks sync service")
+        # Tracked so unloading the entry can cancel the run (and its statements)
+        sync_task = asyncio.current_task()
+        entry.runtime_data.sync_tasks.add(sync_task)
         try:
             result = await run_sync_pipeline(request)
         except Exception as err:
@@ -326,6 +489,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             sync_meta[SYNC_META_LAST_ROWS] = None
             sync_meta[SYNC_META_LAST_FILENAME] = None
             sync_meta[SYNC_META_LAST_ERROR] = str(err)
+            # The stored metrics stay those of the last successful sync
             await store.async_save(sync_meta)
             await _record_sync_result(
                 success=False,
@@ -335,8 +499,36 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
                 run_ts=run_ts,
                 last_success_ts=sync_meta.get(SYNC_META_LAST_SUCCESS_TS),
                 error=str(err),
+                metrics=request.metrics.as_dict(),
             )
             raise
+        finally:
+            entry.runtime_data.sync_tasks.discard(sync_task)
+
+        if result.get("status") == SYNC_STATUS_NO_CHANGES:
+            # Nothing reached Databricks; the watermarks stay where they are
+            _LOGGER.info("hass_databricks sync found no new rows for %s", target)
+            sync_meta = entry.runtime_data.sync_meta
+            sync_meta[SYNC_META_LAST_RUN_TS] = run_ts
+            sync_meta[SYNC_META_LAST_STATUS] = SYNC_STATUS_NO_CHANGES
+            sync_meta[SYNC_META_LAST_TRIGGER] = trigger
+            sync_meta[SYNC_META_LAST_TARGET] = target
+            sync_meta[SYNC_META_LAST_SINCE_TS] = request.min_last_updated_ts
+            sync_meta[SYNC_META_LAST_ROWS] = 0
+            sync_meta[SYNC_META_LAST_FILENAME] = None
+            sync_meta[SYNC_META_LAST_ERROR] = None
+            await store.async_save(sync_meta)
+            await _record_sync_result(
+                success=True,
+                trigger=trigger,
+                target=target,
+                since_ts=request.min_last_updated_ts,
+                run_ts=run_ts,
+                last_success_ts=sync_meta.get(SYNC_META_LAST_SUCCESS_TS),
+                rows=0,
+                status=SYNC_STATUS_NO_CHANGES,
+            )
+            return
 
         _LOGGER.info(
             "Completed hass_databricks sync: file=%s rows=%s",
@@ -354,6 +546,17 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         sync_meta[SYNC_META_LAST_FILENAME] = str(result["filename"])
         sync_meta[SYNC_META_LAST_ERROR] = None
         sync_meta[SYNC_META_LAST_SUCCESS_TS] = new_last_success_ts
+        sync_meta[SYNC_META_LAST_METRICS] = result.get("metrics")
+        if result.get("last_state_id"):
+            sync_meta.setdefault(SYNC_META_STATE_ID_WATERMARKS, {})[target] = {
+                "state_id": int(result["last_state_id"]),
+                "last_updated_ts": result.get("last_state_ts"),
+                "entity_like": request.entity_like,
+            }
+        if result.get("ddl_fingerprint"):
+            sync_meta.setdefault(SYNC_META_DDL_FINGERPRINTS, {})[target] = result[
+                "ddl_fingerprint"
+            ]
         await store.async_save(sync_meta)
 
         await _record_sync_result(
@@ -365,12 +568,71 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             last_success_ts=new_last_success_ts,
             rows=int(result["rows"]),
             filename=str(result["filename"]),
+            metrics=result.get("metrics"),
         )
 
-    entry.runtime_data.sync_func = _run_sync
+    def _sync_state_changed(state: str, queued_runs: int) -> None:
+        async_dispatcher_send(
+            hass, SIGNAL_SYNC_STATE.format(entry.entry_id), state, queued_runs
+        )
+
+    # Timer, button and service triggers all go through one single-flight
+    # coordinator, so runs never overlap and bursts collapse into one follow-up
+    coordinator = SyncCoordinator(
+        _run_sync,
+        warehouse_slots(
+            hass, entry.data[CONF_SERVER_HOSTNAME], entry.data[CONF_HTTP_PATH]
+        ),
+        _sync_state_changed,
+    )
+    entry.runtime_data.sync_coordinator = coordinator
+    entry.runtime_data.sync_func = coordinator.async_run
 
     async def handle_sync(call: ServiceCall) -> None:
-        await _run_sync(call.data, "service")
+        await coordinator.async_run(call.data, "service")
+
+    async def handle_migrate_table_layout(call: ServiceCall) -> None:
+        """Rewrite the target table into the requested layout."""
+        from .pipeline import SyncRequest, run_table_layout_migration
+
+        runtime_data = entry.runtime_data
+        if (
+            runtime_data.layout_migration_running
+            or coordinator.state != SYNC_STATE_IDLE
+            or any(not task.done() for task in runtime_data.sync_tasks)
+        ):
+            raise HomeAssistantError(
+                "A sync or migration is running; try the migration again later."
+            )
+
+        request = _build_sync_request(call.data, SyncRequest)
+        target = f"{request.catalog}.{request.schema}.{request.table}"
+        _LOGGER.info("Migrating %s to table layout %s", target, request.table_layout)
+
+        task = asyncio.current_task()
+        runtime_data.layout_migration_running = True
+        runtime_data.sync_tasks.add(task)
+        try:
+            result = await run_table_layout_migration(request)
+        finally:
+            runtime_data.layout_migration_running = False
+            runtime_data.sync_tasks.discard(task)
+
+        # The migration ran the layout's DDL, so the next sync can skip it
+        runtime_data.sync_meta.setdefault(SYNC_META_DDL_FINGERPRINTS, {})[target] = (
+            result["ddl_fingerprint"]
+        )
+        await store.async_save(runtime_data.sync_meta)
+        await hass.services.async_call(
+            "logbook",
+            "log",
+            {
+                "name": "HASS Databricks",
+                "message": f"Migrated {target} to {request.table_layout} layout",
+                "domain": DOMAIN,
+            },
+            blocking=False,
+        )
 
     auto_sync_enabled = bool(
         entry.options.get(CONF_AUTO_SYNC_ENABLED, DEFAULT_AUTO_SYNC_ENABLED)
@@ -385,7 +647,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
         async def _handle_scheduled_sync(_now) -> None:
             try:
-                await _run_sync({}, "scheduled")
+                await coordinator.async_run({}, "scheduled")
             except HomeAssistantError:
                 _LOGGER.exception("Scheduled hass_databricks sync failed")
             except Exception:
@@ -403,6 +665,9 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    hass.services.async_register(
+        DOMAIN, SERVICE_MIGRATE_TABLE_LAYOUT, handle_migrate_table_layout
+    )
     hass.services.async_register(DOMAIN, SERVICE_SYNC, handle_sync)
     _LOGGER.debug("Service registered: %s.%s", DOMAIN, SERVICE_SYNC)
 
@@ -423,9 +688,28 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         if entry.runtime_data.unsub_auto_sync is not None:
             entry.runtime_data.unsub_auto_sync()
 
+        # Cancel running and queued syncs; each cancels its in-flight statement
+        if entry.runtime_data.sync_coordinator is not None:
+            await entry.runtime_data.sync_coordinator.async_shutdown()
+        sync_tasks = [
+            task
+            for task in entry.runtime_data.sync_tasks
+            if task is not asyncio.current_task() and not task.done()
+        ]
+        for task in sync_tasks:
+            task.cancel()
+        if sync_tasks:
+            await asyncio.wait(sync_tasks)
+
+        # Drop queued jobs; a job already running finishes off the event loop
+        if entry.runtime_data.sync_executor is not None:
+            entry.runtime_data.sync_executor.shutdown(wait=False, cancel_futures=True)
+            entry.runtime_data.sync_executor = None
+
     loaded_entries = hass.data.get(DOMAIN, set())
     loaded_entries.discard(entry.entry_id)
     if not loaded_entries:
         hass.services.async_remove(DOMAIN, SERVICE_SYNC)
+        hass.services.async_remove(DOMAIN, SERVICE_MIGRATE_TABLE_LAYOUT)
 
     return unload_ok
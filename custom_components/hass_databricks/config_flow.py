@@ -12,22 +12,55 @@ from .const import (
     CONF_ACCESS_TOKEN,
     CONF_AUTO_SYNC_ENABLED,
     CONF_AUTO_SYNC_INTERVAL_MINUTES,
+    CHUNK_CODECS,
+    CHUNK_FORMATS,
+    CHUNK_SIZINGS,
     CONF_CATALOG,
+    CONF_CHUNK_CODEC,
+    CONF_CHUNK_FORMAT,
+    CONF_CHUNK_MEMORY_CEILING_MB,
     CONF_CHUNK_SIZE,
+    CONF_CHUNK_SIZING,
+    CONF_CHUNK_TARGET_MB,
+    CONF_CHUNK_TARGET_SECONDS,
+    CONF_LOOP_LAG_THRESHOLD_MS,
+    CONF_COMPRESSION_LEVEL,
     CONF_DBX_VOLUMES_PATH,
     CONF_ENTITY_LIKE,
     CONF_HTTP_PATH,
+    CONF_IN_MEMORY_STAGING,
     CONF_KEEP_LOCAL_FILE,
     CONF_LOCAL_PATH,
+    CONF_MAX_CONCURRENT_UPLOADS,
+    CONF_PIPELINE_DEPTH,
     CONF_SCHEMA,
     CONF_SERVER_HOSTNAME,
+    CONF_STATEMENT_TIMEOUT_SECONDS,
+    CONF_SYNC_WORKERS,
     CONF_TABLE,
+    CONF_TABLE_LAYOUT,
+    DEFAULT_CHUNK_CODEC,
+    DEFAULT_CHUNK_FORMAT,
+    DEFAULT_CHUNK_MEMORY_CEILING_MB,
     DEFAULT_CHUNK_SIZE,
+    DEFAULT_CHUNK_SIZING,
+    DEFAULT_CHUNK_TARGET_MB,
+    DEFAULT_CHUNK_TARGET_SECONDS,
+    DEFAULT_LOOP_LAG_THRESHOLD_MS,
+    DEFAULT_COMPRESSION_LEVEL,
     DEFAULT_ENTITY_LIKE,
+    DEFAULT_IN_MEMORY_STAGING,
     DEFAULT_LOCAL_PATH,
+    DEFAULT_MAX_CONCURRENT_UPLOADS,
+    DEFAULT_PIPELINE_DEPTH,
+    DEFAULT_STATEMENT_TIMEOUT_SECONDS,
+    DEFAULT_SYNC_WORKERS,
+    DEFAULT_TABLE_LAYOUT,
     DEFAULT_AUTO_SYNC_ENABLED,
     DEFAULT_AUTO_SYNC_INTERVAL_MINUTES,
     DOMAIN,
+    MIN_SYNC_WORKERS,
+    TABLE_LAYOUTS,
 )
 
 STEP_USER_SCHEMA = vol.Schema(
@@ -223,6 +256,40 @@ class HassDataBricksOptionsFlow(config_entries.OptionsFlowWithConfigEntry):
                     CONF_CHUNK_SIZE,
                     default=current.get(CONF_CHUNK_SIZE, DEFAULT_CHUNK_SIZE),
                 ): int,
+                vol.Optional(
+                    CONF_CHUNK_SIZING,
+                    default=current.get(CONF_CHUNK_SIZING, DEFAULT_CHUNK_SIZING),
+                ): vol.In(CHUNK_SIZINGS),
+                vol.Optional(
+                    CONF_CHUNK_TARGET_MB,
+                    default=current.get(CONF_CHUNK_TARGET_MB, DEFAULT_CHUNK_TARGET_MB),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=512)),
+                vol.Optional(
+                    CONF_CHUNK_TARGET_SECONDS,
+                    default=current.get(
+                        CONF_CHUNK_TARGET_SECONDS, DEFAULT_CHUNK_TARGET_SECONDS
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=600)),
+                vol.Optional(
+                    CONF_CHUNK_MEMORY_CEILING_MB,
+                    default=current.get(
+                        CONF_CHUNK_MEMORY_CEILING_MB, DEFAULT_CHUNK_MEMORY_CEILING_MB
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=16, max=4096)),
+                vol.Optional(
+                    CONF_CHUNK_FORMAT,
+                    default=current.get(CONF_CHUNK_FORMAT, DEFAULT_CHUNK_FORMAT),
+                ): vol.In(CHUNK_FORMATS),
+                vol.Optional(
+                    CONF_CHUNK_CODEC,
+                    default=current.get(CONF_CHUNK_CODEC, DEFAULT_CHUNK_CODEC),
+                ): vol.In(CHUNK_CODECS),
+                vol.Optional(
+                    CONF_COMPRESSION_LEVEL,
+                    default=current.get(
+                        CONF_COMPRESSION_LEVEL, DEFAULT_COMPRESSION_LEVEL
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=22)),
                 vol.Optional(
                     CONF_KEEP_LOCAL_FILE,
                     default=current.get(CONF_KEEP_LOCAL_FILE, False),
@@ -231,6 +298,12 @@ class HassDataBricksOptionsFlow(config_entries.OptionsFlowWithConfigEntry):
                     CONF_LOCAL_PATH,
                     default=current.get(CONF_LOCAL_PATH, DEFAULT_LOCAL_PATH),
                 ): str,
+                vol.Optional(
+                    CONF_IN_MEMORY_STAGING,
+                    default=current.get(
+                        CONF_IN_MEMORY_STAGING, DEFAULT_IN_MEMORY_STAGING
+                    ),
+                ): bool,
                 vol.Optional(
                     CONF_AUTO_SYNC_ENABLED,
                     default=current.get(
@@ -244,6 +317,37 @@ class HassDataBricksOptionsFlow(config_entries.OptionsFlowWithConfigEntry):
                         DEFAULT_AUTO_SYNC_INTERVAL_MINUTES,
                     ),
                 ): vol.All(vol.Coerce(int), vol.Range(min=1, max=1440)),
+                vol.Optional(
+                    CONF_PIPELINE_DEPTH,
+                    default=current.get(CONF_PIPELINE_DEPTH, DEFAULT_PIPELINE_DEPTH),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=8)),
+                vol.Optional(
+                    CONF_MAX_CONCURRENT_UPLOADS,
+                    default=current.get(
+                        CONF_MAX_CONCURRENT_UPLOADS, DEFAULT_MAX_CONCURRENT_UPLOADS
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=16)),
+                vol.Optional(
+                    CONF_LOOP_LAG_THRESHOLD_MS,
+                    default=current.get(
+                        CONF_LOOP_LAG_THRESHOLD_MS, DEFAULT_LOOP_LAG_THRESHOLD_MS
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=5000)),
+                vol.Optional(
+                    CONF_SYNC_WORKERS,
+                    default=current.get(CONF_SYNC_WORKERS, DEFAULT_SYNC_WORKERS),
+                ): vol.All(vol.Coerce(int), vol.Range(min=MIN_SYNC_WORKERS, max=8)),
+                vol.Optional(
+                    CONF_STATEMENT_TIMEOUT_SECONDS,
+                    default=current.get(
+                        CONF_STATEMENT_TIMEOUT_SECONDS,
+                        DEFAULT_STATEMENT_TIMEOUT_SECONDS,
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=30, max=7200)),
+                vol.Optional(
+                    CONF_TABLE_LAYOUT,
+                    default=current.get(CONF_TABLE_LAYOUT, DEFAULT_TABLE_LAYOUT),
+                ): vol.In(TABLE_LAYOUTS),
             }
         )
         return self.async_show_form(step_id="init", data_schema=schema)
@@ -2,7 +2,10 @@
 
 DOMAIN = "hass_databricks"
 SERVICE_SYNC = "sync"
+SERVICE_MIGRATE_TABLE_LAYOUT = "migrate_table_layout"
 EVENT_SYNC_RESULT = "hass_databricks_sync_result"
+# Dispatcher signal carrying a config entry's sync state, formatted with its id
+SIGNAL_SYNC_STATE = "hass_databricks_sync_state_{}"
 STORAGE_VERSION = 1
 STORAGE_KEY_PREFIX = "hass_databricks.sync_meta"
 SYNC_META_LAST_SUCCESS_TS = "last_success_ts"
@@ -14,8 +17,23 @@ SYNC_META_LAST_FILENAME = "last_filename"
 SYNC_META_LAST_TARGET = "last_target"
 SYNC_META_LAST_TRIGGER = "last_trigger"
 SYNC_META_LAST_SINCE_TS = "last_since_ts"
+SYNC_META_STATE_ID_WATERMARKS = "state_id_watermarks"
+SYNC_STATUS_NO_CHANGES = "no_changes"
+SYNC_META_DDL_FINGERPRINTS = "ddl_fingerprints"
+SYNC_META_JOB_JOURNALS = "job_journals"
+# Per-chunk journal progress is batched into one storage write this often
+JOURNAL_SAVE_DELAY_SECONDS = 30
+# Stage timings and throughput of the last successful sync (see pipeline.SyncMetrics)
+SYNC_META_LAST_METRICS = "last_metrics"
 DEFAULT_INCREMENTAL_LOOKBACK_MINUTES = 10
 
+# Sync coordination: one run per entry, and per SQL warehouse across entries
+SYNC_STATE_IDLE = "idle"
+SYNC_STATE_RUNNING = "running"
+SYNC_STATE_QUEUED = "queued"
+DATA_WAREHOUSE_SLOTS = "hass_databricks_warehouse_slots"
+MAX_CONCURRENT_SYNCS_PER_WAREHOUSE = 1
+
 # Databricks connection credentials (stored in config entry data)
 CONF_SERVER_HOSTNAME = "server_hostname"
 CONF_HTTP_PATH = "http_path"
@@ -34,8 +52,23 @@ CONF_ENTITY_LIKE = "entity_like"
 CONF_CHUNK_SIZE = "chunk_size"
 CONF_KEEP_LOCAL_FILE = "keep_local_file"
 CONF_HOT_COPY_DB = "hot_copy_db"
+CONF_FORCE_DDL = "force_ddl"
 CONF_AUTO_SYNC_ENABLED = "auto_sync_enabled"
 CONF_AUTO_SYNC_INTERVAL_MINUTES = "auto_sync_interval_minutes"
+CONF_PIPELINE_DEPTH = "pipeline_depth"
+CONF_MAX_CONCURRENT_UPLOADS = "max_concurrent_uploads"
+CONF_IN_MEMORY_STAGING = "in_memory_staging"
+CONF_CHUNK_CODEC = "chunk_codec"
+CONF_COMPRESSION_LEVEL = "compression_level"
+CONF_STATEMENT_TIMEOUT_SECONDS = "statement_timeout_seconds"
+CONF_TABLE_LAYOUT = "table_layout"
+CONF_CHUNK_FORMAT = "chunk_format"
+CONF_CHUNK_SIZING = "chunk_sizing"
+CONF_CHUNK_TARGET_MB = "chunk_target_mb"
+CONF_CHUNK_TARGET_SECONDS = "chunk_target_seconds"
+CONF_CHUNK_MEMORY_CEILING_MB = "chunk_memory_ceiling_mb"
+CONF_LOOP_LAG_THRESHOLD_MS = "loop_lag_threshold_ms"
+CONF_SYNC_WORKERS = "sync_workers"
 
 DEFAULT_DB_FILENAME = "home-assistant_v2.db"
 DEFAULT_ENTITY_LIKE = "sensor.%"
@@ -43,6 +76,53 @@ DEFAULT_CHUNK_SIZE = 50_000
 DEFAULT_LOCAL_PATH = "/tmp/"
 DEFAULT_AUTO_SYNC_ENABLED = True
 DEFAULT_AUTO_SYNC_INTERVAL_MINUTES = 60
+DEFAULT_PIPELINE_DEPTH = 2
+DEFAULT_MAX_CONCURRENT_UPLOADS = 4
+# Event loop lag above which the sync pauses between chunks (0 disables)
+DEFAULT_LOOP_LAG_THRESHOLD_MS = 200
+# Threads of the integration's own pool: one extracts, the rest stage I/O
+DEFAULT_SYNC_WORKERS = 3
+MIN_SYNC_WORKERS = 2
+DEFAULT_IN_MEMORY_STAGING = False
+DEFAULT_SPOOL_MAX_BYTES = 16 * 1024 * 1024
+DEFAULT_STATEMENT_TIMEOUT_SECONDS = 900
+
+# Chunk sizing: a fixed row count, or sized from what earlier chunks cost
+CHUNK_SIZING_FIXED = "fixed"
+CHUNK_SIZING_ADAPTIVE = "adaptive"
+CHUNK_SIZINGS = [CHUNK_SIZING_FIXED, CHUNK_SIZING_ADAPTIVE]
+DEFAULT_CHUNK_SIZING = CHUNK_SIZING_FIXED
+DEFAULT_CHUNK_TARGET_MB = 32
+DEFAULT_CHUNK_TARGET_SECONDS = 20
+DEFAULT_CHUNK_MEMORY_CEILING_MB = 256
+MIN_CHUNK_SIZE = 1_000
+MAX_CHUNK_SIZE = 500_000
+
+# Chunk file codecs
+CHUNK_CODEC_GZIP = "gzip"
+CHUNK_CODEC_ZSTD = "zstd"
+CHUNK_CODECS = [CHUNK_CODEC_GZIP, CHUNK_CODEC_ZSTD]
+DEFAULT_CHUNK_CODEC = CHUNK_CODEC_GZIP
+# 0 selects the codec's own default level
+DEFAULT_COMPRESSION_LEVEL = 0
+
+# Chunk file formats (parquet needs pyarrow and falls back to csv without it)
+CHUNK_FORMAT_CSV = "csv"
+CHUNK_FORMAT_PARQUET = "parquet"
+CHUNK_FORMATS = [CHUNK_FORMAT_CSV, CHUNK_FORMAT_PARQUET]
+DEFAULT_CHUNK_FORMAT = CHUNK_FORMAT_CSV
+
+# Target Delta table layouts (applied to new tables; existing ones are
+# rewritten only by the migrate_table_layout service)
+TABLE_LAYOUT_LIQUID = "liquid_clustering"
+TABLE_LAYOUT_DATE_PARTITIONED = "date_partitioned"
+TABLE_LAYOUT_ENTITY_PARTITIONED = "entity_partitioned"
+TABLE_LAYOUTS = [
+    TABLE_LAYOUT_LIQUID,
+    TABLE_LAYOUT_DATE_PARTITIONED,
+    TABLE_LAYOUT_ENTITY_PARTITIONED,
+]
+DEFAULT_TABLE_LAYOUT = TABLE_LAYOUT_LIQUID
 
 # Parallel updates
 PARALLEL_UPDATES = 1
@@ -0,0 +1,137 @@
+"""Single-flight coordination of hass_databricks sync runs."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable
+
+from .const import (
+    DATA_WAREHOUSE_SLOTS,
+    MAX_CONCURRENT_SYNCS_PER_WAREHOUSE,
+    SYNC_STATE_IDLE,
+    SYNC_STATE_QUEUED,
+    SYNC_STATE_RUNNING,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def warehouse_slots(
+    hass: Any, server_hostname: str, http_path: str
+) -> asyncio.Semaphore:
+    """Return the semaphore shared by every entry syncing through one warehouse."""
+    warehouse_id = http_path.strip("/").split("/")[-1]
+    slots = hass.data.setdefault(DATA_WAREHOUSE_SLOTS, {})
+    key = f"{server_hostname}/{warehouse_id}"
+    if key not in slots:
+        slots[key] = asyncio.Semaphore(MAX_CONCURRENT_SYNCS_PER_WAREHOUSE)
+    return slots[key]
+
+
+def _call_key(call_data: dict) -> tuple:
+    """Return a hashable key; triggers with equal call data are coalesced."""
+    return tuple(sorted((str(key), repr(value)) for key, value in call_data.items()))
+
+
+class SyncCoordinator:
+    """Serialize the sync runs of one config entry.
+
+    Only one run executes at a time. Triggers that arrive while a run is in
+    progress are coalesced: all of them wait for a single follow-up run that
+    starts once the current run ends. Triggers with different service call
+    data (e.g. another target table) get their own follow-up. Runs also hold
+    a slot of the warehouse semaphore, so entries sharing a SQL warehouse do
+    not contend with each other.
+    """
+
+    def __init__(
+        self,
+        run: Callable[[dict, str], Awaitable[None]],
+        warehouse: asyncio.Semaphore,
+        on_state_change: Callable[[str, int], None] | None = None,
+    ) -> None:
+        self._run = run
+        self._warehouse = warehouse
+        self._on_state_change = on_state_change
+        self._lock = asyncio.Lock()
+        # Follow-up runs that have not started yet, keyed by call data
+        self._queued: dict[tuple, asyncio.Future] = {}
+        self._running = False
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def state(self) -> str:
+        """Return ``running``, ``queued`` (waiting for a slot) or ``idle``."""
+        if self._running:
+            return SYNC_STATE_RUNNING
+        if self._queued:
+            return SYNC_STATE_QUEUED
+        return SYNC_STATE_IDLE
+
+    @property
+    def queued_runs(self) -> int:
+        """Return the number of follow-up runs waiting to start."""
+        return len(self._queued)
+
+    async def async_run(self, call_data: dict, trigger: str) -> None:
+        """Run a sync, or join the queued follow-up run for the same call data.
+
+        Returns (or raises) with the outcome of the run the trigger joined.
+        """
+        key = _call_key(call_data)
+        queued = self._queued.get(key)
+        if queued is not None:
+            _LOGGER.debug("Coalescing %s sync trigger into the queued run", trigger)
+            await asyncio.shield(queued)
+            return
+
+        outcome = asyncio.get_running_loop().create_future()
+        # Retrieve the outcome so a run nobody joined does not log a warning
+        outcome.add_done_callback(
+            lambda future: future.cancelled() or future.exception()
+        )
+        self._queued[key] = outcome
+        task = asyncio.current_task()
+        self._tasks.add(task)
+        self._notify()
+        try:
+            async with self._lock:
+                async with self._warehouse:
+                    # From here on, new triggers queue another follow-up
+                    self._queued.pop(key, None)
+                    self._running = True
+                    self._notify()
+                    try:
+                        await self._run(call_data, trigger)
+                    finally:
+                        self._running = False
+        except asyncio.CancelledError:
+            outcome.cancel()
+            raise
+        except BaseException as err:
+            outcome.set_exception(err)
+            raise
+        else:
+            outcome.set_result(None)
+        finally:
+            if self._queued.get(key) is outcome:
+                del self._queued[key]
+            self._tasks.discard(task)
+            self._notify()
+
+    async def async_shutdown(self) -> None:
+        """Cancel the running and queued runs and wait for them to end."""
+        tasks = [
+            task
+            for task in self._tasks
+            if task is not asyncio.current_task() and not task.done()
+        ]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.wait(tasks)
+
+    def _notify(self) -> None:
+        if self._on_state_change is not None:
+            self._on_state_change(self.state, self.queued_runs)
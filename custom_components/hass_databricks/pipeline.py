@@ -2,18 +2,75 @@
 
 from __future__ import annotations
 
+from concurrent.futures import Executor, ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
+import contextlib
 import os
+import re
 import shutil
 import sqlite3
+import sys
 import tempfile
+import threading
+import time
 import asyncio
 from typing import Optional
 import csv
+import functools
 import gzip
+import logging
+import math
 import aiohttp
-from typing import Any
+from typing import Any, Awaitable, BinaryIO, Callable, Iterable, Iterator, TextIO
+
+try:
+    from compression import zstd as _zstd
+except ImportError:  # Python < 3.14
+    _zstd = None
+
+try:
+    import pyarrow as _pa
+    import pyarrow.parquet as _pq
+except ImportError:  # Parquet chunks are optional
+    _pa = None
+    _pq = None
+
+from .const import (
+    CHUNK_CODEC_GZIP,
+    CHUNK_CODEC_ZSTD,
+    CHUNK_FORMAT_CSV,
+    CHUNK_FORMAT_PARQUET,
+    CHUNK_SIZING_ADAPTIVE,
+    DEFAULT_CHUNK_CODEC,
+    DEFAULT_CHUNK_FORMAT,
+    DEFAULT_CHUNK_MEMORY_CEILING_MB,
+    DEFAULT_CHUNK_SIZING,
+    DEFAULT_CHUNK_TARGET_MB,
+    DEFAULT_CHUNK_TARGET_SECONDS,
+    DEFAULT_LOOP_LAG_THRESHOLD_MS,
+    DEFAULT_MAX_CONCURRENT_UPLOADS,
+    DEFAULT_PIPELINE_DEPTH,
+    DEFAULT_SPOOL_MAX_BYTES,
+    DEFAULT_STATEMENT_TIMEOUT_SECONDS,
+    DEFAULT_SYNC_WORKERS,
+    DEFAULT_TABLE_LAYOUT,
+    MAX_CHUNK_SIZE,
+    MIN_CHUNK_SIZE,
+    MIN_SYNC_WORKERS,
+    TABLE_LAYOUT_DATE_PARTITIONED,
+    TABLE_LAYOUT_ENTITY_PARTITIONED,
+    TABLE_LAYOUT_LIQUID,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Block size used when streaming chunk files to the Files API.
+_UPLOAD_BLOCK_SIZE = 256 * 1024
+# Niceness added to sync worker threads so HA's own threads win the CPU.
+_SYNC_WORKER_NICENESS = 10
+# Highest niceness Linux allows.
+_MAX_NICENESS = 19
 
 
 @dataclass
@@ -34,13 +91,76 @@ class SyncRequest:
     keep_local_file: bool
     hot_copy_db: bool | None = None
     min_last_updated_ts: float | None = None
+    min_state_id: int = 0
+    min_state_id_ts: float | None = None
+    metadata_resolver: EntityMetadataResolver | None = None
+    pipeline_depth: int = DEFAULT_PIPELINE_DEPTH
+    max_concurrent_uploads: int = DEFAULT_MAX_CONCURRENT_UPLOADS
+    in_memory_staging: bool = False
+    spool_max_bytes: int = DEFAULT_SPOOL_MAX_BYTES
+    chunk_codec: str = DEFAULT_CHUNK_CODEC
+    compression_level: int | None = None
+    chunk_format: str = DEFAULT_CHUNK_FORMAT
+    chunk_sizing: str = DEFAULT_CHUNK_SIZING
+    chunk_target_bytes: int = DEFAULT_CHUNK_TARGET_MB * 1024 * 1024
+    chunk_target_seconds: float = DEFAULT_CHUNK_TARGET_SECONDS
+    chunk_memory_ceiling_bytes: int = DEFAULT_CHUNK_MEMORY_CEILING_MB * 1024 * 1024
+    # Seconds of event loop lag above which the sync backs off (0 disables)
+    loop_lag_threshold: float = DEFAULT_LOOP_LAG_THRESHOLD_MS / 1000
+    ddl_fingerprint: str | None = None
+    force_ddl: bool = False
+    statement_timeout: float = DEFAULT_STATEMENT_TIMEOUT_SECONDS
+    table_layout: str = DEFAULT_TABLE_LAYOUT
+    journal: SyncJournal | None = None
+    # Filled in while the run progresses; read it when the run fails
+    metrics: SyncMetrics | None = None
     session: aiohttp.ClientSession | None = None
     hass: Any | None = None
+    # Runs all blocking sync work; None uses the HA/default executor
+    executor: Executor | None = None
+
+
+def _file_size(source: str | BinaryIO) -> int:
+    if isinstance(source, str):
+        return os.path.getsize(source)
+    size = source.seek(0, os.SEEK_END)
+    source.seek(0)
+    return size
+
 
+async def _iter_file_blocks(
+    hass: Any | None,
+    source: str | BinaryIO,
+    block_size: int = _UPLOAD_BLOCK_SIZE,
+    executor: Executor | None = None,
+):
+    """Yield a file in fixed-size blocks, reading each one off the event loop.
 
-def _read_file_content(path: str) -> bytes:
-    with open(path, "rb") as f:
-        return f.read()
+    ``source`` is a path or an in-memory staging buffer; buffers are rewound
+    rather than closed so a retried upload can stream them again.
+    """
+    if isinstance(source, str):
+        f = await _async_run_job(hass, open, source, "rb", executor=executor)
+    else:
+        f = source
+        await _async_run_job(hass, f.seek, 0, executor=executor)
+    try:
+        while True:
+            block = await _async_run_job(hass, f.read, block_size, executor=executor)
+            if not block:
+                break
+            yield block
+    finally:
+        if f is not source:
+            await _async_run_job(hass, f.close, executor=executor)
+
+
+def _discard_chunk(chunk: str | BinaryIO) -> None:
+    """Delete a staged chunk file or release its in-memory buffer."""
+    if isinstance(chunk, str):
+        _remove_path(chunk)
+    else:
+        chunk.close()
 
 
 def _remove_path(path: str) -> None:
@@ -54,17 +174,599 @@ def _remove_path(path: str) -> None:
             pass
 
 
+def _remove_tree(path: str) -> None:
+    shutil.rmtree(path, ignore_errors=True)
+
+
 def _makedirs(path: str) -> None:
     os.makedirs(path, exist_ok=True)
 
 
-async def _async_run_job(hass: Any | None, func, *args):
-    """Run a blocking job in the HA executor or default event loop."""
+async def _async_run_job(
+    hass: Any | None, func, *args, executor: Executor | None = None
+):
+    """Run a blocking job in the sync executor, HA executor or default loop."""
+    if executor is not None:
+        return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
     if hass:
         return await hass.async_add_executor_job(func, *args)
     return await asyncio.get_running_loop().run_in_executor(None, func, *args)
 
 
+def _lower_thread_priority(niceness: int = _SYNC_WORKER_NICENESS) -> None:
+    """Raise the niceness of the calling worker thread where the OS allows.
+
+    Linux schedules threads individually, so the thread id can be reniced
+    without touching the rest of Home Assistant. The increment is relative
+    to the thread's current niceness, so a Home Assistant that already runs
+    niced keeps its workers below itself. Elsewhere this is a no-op.
+    """
+    if not sys.platform.startswith("linux") or not hasattr(os, "setpriority"):
+        return
+    try:
+        thread_id = threading.get_native_id()
+        current = os.getpriority(os.PRIO_PROCESS, thread_id)
+        os.setpriority(
+            os.PRIO_PROCESS, thread_id, min(current + niceness, _MAX_NICENESS)
+        )
+    except OSError as err:
+        _LOGGER.debug("Could not lower sync worker priority: %s", err)
+
+
+def create_sync_executor(max_workers: int = DEFAULT_SYNC_WORKERS) -> ThreadPoolExecutor:
+    """Return the bounded, low-priority worker pool for one config entry.
+
+    Extraction, encoding and staging I/O run here instead of the executor
+    Home Assistant shares with every integration, so a large backfill can
+    never queue ahead of core jobs. The pool always has at least two
+    threads, so a running extraction never blocks upload I/O.
+    """
+    return ThreadPoolExecutor(
+        max_workers=max(MIN_SYNC_WORKERS, max_workers),
+        thread_name_prefix="hass_databricks_sync",
+        initializer=_lower_thread_priority,
+    )
+
+
+# Upload latency above baseline * tolerance counts as "not stable" for growth.
+_UPLOAD_LATENCY_TOLERANCE = 1.5
+_UPLOAD_LATENCY_SMOOTHING = 0.2
+# Waits before re-trying an upload that was throttled or timed out.
+_UPLOAD_RETRY_DELAYS = (1, 2, 4)
+
+
+class AdaptiveUploadLimiter:
+    """Additive-increase / multiplicative-decrease limit on in-flight uploads.
+
+    The limit grows by one after a full window of uploads whose latency stays
+    close to the smoothed baseline and halves on throttling (429/5xx) or
+    timeouts. It never exceeds ``ceiling``.
+    """
+
+    def __init__(self, ceiling: int, *, initial: int = 1) -> None:
+        self._ceiling = max(1, int(ceiling))
+        self._limit = max(1, min(int(initial), self._ceiling))
+        self._in_flight = 0
+        self._stable_successes = 0
+        self._baseline_latency: float | None = None
+        self._condition = asyncio.Condition()
+
+    @property
+    def limit(self) -> int:
+        """Return the current in-flight limit."""
+        return self._limit
+
+    @property
+    def in_flight(self) -> int:
+        """Return the number of uploads currently holding a slot."""
+        return self._in_flight
+
+    async def acquire(self) -> None:
+        """Wait for a free upload slot."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < self._limit)
+            self._in_flight += 1
+
+    async def release(self) -> None:
+        """Return an upload slot and wake waiters."""
+        async with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def record_success(self, latency: float) -> None:
+        """Grow the limit after a window of uploads with stable latency."""
+        baseline = self._baseline_latency
+        if baseline is None or latency <= baseline * _UPLOAD_LATENCY_TOLERANCE:
+            self._stable_successes += 1
+            if self._stable_successes >= self._limit and self._limit < self._ceiling:
+                self._limit += 1
+                self._stable_successes = 0
+        else:
+            self._stable_successes = 0
+
+        if baseline is None:
+            self._baseline_latency = latency
+        else:
+            self._baseline_latency = baseline + _UPLOAD_LATENCY_SMOOTHING * (
+                latency - baseline
+            )
+
+    def record_backoff(self) -> None:
+        """Halve the limit after throttling or a timeout."""
+        self._limit = max(1, self._limit // 2)
+        self._stable_successes = 0
+
+
+# How often the loop lag probe wakes up
+_LOOP_LAG_PROBE_INTERVAL = 0.1
+# Weight of the newest probe sample in the smoothed loop lag
+_LOOP_LAG_SMOOTHING = 0.3
+# Time a no-op job waits on the shared executor that counts as overload
+_EXECUTOR_DELAY_LIMIT = 0.5
+# Longest pause between two chunks, so a busy host still makes progress
+_MAX_BACKPRESSURE_PAUSE = 10.0
+
+
+def _noop() -> None:
+    """Do nothing; timed on the shared executor to measure its queue."""
+
+
+class LoopLagMonitor:
+    """Watch event loop lag and executor delay while a sync runs.
+
+    A probe task sleeps ``_LOOP_LAG_PROBE_INTERVAL`` and measures how late it
+    wakes up, the same symptom that makes automations and the UI sluggish.
+    A second probe times a no-op job on Home Assistant's shared executor
+    (the loop's default executor without ``hass``), which waits as long as
+    the jobs queued ahead of it. The loop counts as overloaded while the
+    smoothed lag exceeds ``threshold`` seconds or the executor delay exceeds
+    ``_EXECUTOR_DELAY_LIMIT``.
+    """
+
+    def __init__(self, threshold: float, hass: Any | None = None) -> None:
+        self._threshold = threshold
+        self._hass = hass
+        self._lag = 0.0
+        self._executor_delay = 0.0
+        self._executor_probe_started: float | None = None
+        self._tasks: list[asyncio.Task] = []
+        self.max_lag = 0.0
+        self.max_executor_delay = 0.0
+        self.throttled_seconds = 0.0
+
+    @property
+    def lag(self) -> float:
+        """Return the smoothed loop lag in seconds."""
+        return self._lag
+
+    @property
+    def executor_delay(self) -> float:
+        """Return the smoothed executor delay, or the wait of a stuck probe."""
+        if self._executor_probe_started is None:
+            return self._executor_delay
+        waiting = asyncio.get_running_loop().time() - self._executor_probe_started
+        return max(self._executor_delay, waiting)
+
+    @property
+    def overloaded(self) -> bool:
+        """Return True while the sync should back off."""
+        return (
+            self._lag > self._threshold or self.executor_delay > _EXECUTOR_DELAY_LIMIT
+        )
+
+    def record_lag(self, lag: float) -> None:
+        """Fold one probe sample into the smoothed lag."""
+        self._lag += _LOOP_LAG_SMOOTHING * (lag - self._lag)
+        self.max_lag = max(self.max_lag, lag)
+
+    def record_executor_delay(self, delay: float) -> None:
+        """Fold one executor probe sample into the smoothed delay."""
+        self._executor_delay += _LOOP_LAG_SMOOTHING * (delay - self._executor_delay)
+        self.max_executor_delay = max(self.max_executor_delay, delay)
+
+    async def _probe(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(_LOOP_LAG_PROBE_INTERVAL)
+            self.record_lag(max(0.0, loop.time() - started - _LOOP_LAG_PROBE_INTERVAL))
+
+    async def _probe_executor(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(_LOOP_LAG_PROBE_INTERVAL)
+            started = self._executor_probe_started = loop.time()
+            try:
+                await _async_run_job(self._hass, _noop)
+            finally:
+                self._executor_probe_started = None
+            self.record_executor_delay(loop.time() - started)
+
+    def start(self) -> None:
+        """Start probing on the running loop."""
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._probe()),
+                asyncio.create_task(self._probe_executor()),
+            ]
+
+    async def stop(self) -> None:
+        """Stop probing."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def wait_until_clear(self) -> None:
+        """Pause while the loop is overloaded, for at most ``_MAX_BACKPRESSURE_PAUSE``."""
+        if not self.overloaded:
+            return
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        while self.overloaded and loop.time() - started < _MAX_BACKPRESSURE_PAUSE:
+            await asyncio.sleep(_LOOP_LAG_PROBE_INTERVAL)
+        paused = loop.time() - started
+        self.throttled_seconds += paused
+        _LOGGER.debug(
+            "Paused sync for %.1fs (loop lag %.0f ms)", paused, self._lag * 1000
+        )
+
+
+# Weight of the newest chunk in the learned per-row costs
+_CHUNK_COST_SMOOTHING = 0.5
+# Largest factor one chunk may grow or shrink by relative to the previous one
+_CHUNK_MAX_STEP = 4.0
+# Assumed uncompressed row width before the first chunk has been measured
+_DEFAULT_RAW_BYTES_PER_ROW = 128.0
+
+
+class AdaptiveChunkSizer:
+    """Size each chunk from the measured cost of the chunks before it.
+
+    Learns compressed bytes, uncompressed bytes and extraction seconds per row
+    as smoothed averages. The next chunk gets as many rows as fit both the
+    compressed file size target and the extraction time target, within
+    ``_CHUNK_MAX_STEP`` of the previous size. The memory ceiling caps the
+    uncompressed rows a chunk may hold, whatever the targets say.
+    """
+
+    def __init__(
+        self,
+        initial_rows: int,
+        *,
+        target_bytes: int,
+        target_seconds: float,
+        memory_ceiling_bytes: int,
+        min_rows: int = MIN_CHUNK_SIZE,
+        max_rows: int = MAX_CHUNK_SIZE,
+    ) -> None:
+        self._target_bytes = max(1, int(target_bytes))
+        self._target_seconds = max(0.001, float(target_seconds))
+        self._memory_ceiling_bytes = max(1, int(memory_ceiling_bytes))
+        self._min_rows = max(1, int(min_rows))
+        self._max_rows = max(self._min_rows, int(max_rows))
+        self._bytes_per_row: float | None = None
+        self._raw_bytes_per_row: float | None = None
+        self._seconds_per_row: float | None = None
+        self._rows = self._clamp(initial_rows)
+
+    @property
+    def compression_ratio(self) -> float | None:
+        """Return learned uncompressed / compressed size, once measured."""
+        if not self._bytes_per_row or self._raw_bytes_per_row is None:
+            return None
+        return self._raw_bytes_per_row / self._bytes_per_row
+
+    def next_size(self) -> int:
+        """Return the row count for the next chunk."""
+        return self._rows
+
+    def record(
+        self, rows: int, compressed_bytes: int, raw_bytes: int, seconds: float
+    ) -> None:
+        """Learn from a finished chunk and pick the size of the next one."""
+        if rows <= 0:
+            return
+        self._bytes_per_row = self._smooth(self._bytes_per_row, compressed_bytes / rows)
+        self._raw_bytes_per_row = self._smooth(
+            self._raw_bytes_per_row, raw_bytes / rows
+        )
+        self._seconds_per_row = self._smooth(self._seconds_per_row, seconds / rows)
+
+        wanted = self._max_rows
+        if self._bytes_per_row > 0:
+            wanted = min(wanted, self._target_bytes / self._bytes_per_row)
+        if self._seconds_per_row > 0:
+            wanted = min(wanted, self._target_seconds / self._seconds_per_row)
+        previous = self._rows
+        wanted = min(
+            max(wanted, previous / _CHUNK_MAX_STEP), previous * _CHUNK_MAX_STEP
+        )
+        self._rows = self._clamp(wanted)
+
+    def _clamp(self, rows: float) -> int:
+        raw_bytes_per_row = self._raw_bytes_per_row or _DEFAULT_RAW_BYTES_PER_ROW
+        memory_rows = self._memory_ceiling_bytes / max(raw_bytes_per_row, 1.0)
+        # The memory ceiling is a hard cap, even below the minimum chunk size
+        return max(1, int(min(max(rows, self._min_rows), self._max_rows, memory_rows)))
+
+    @staticmethod
+    def _smooth(current: float | None, sample: float) -> float:
+        if current is None:
+            return sample
+        return current + _CHUNK_COST_SMOOTHING * (sample - current)
+
+
+def _is_backoff_error(err: Exception) -> bool:
+    """Return True for upload errors that call for backing off and retrying."""
+    if isinstance(err, aiohttp.ClientResponseError):
+        return err.status == 429 or err.status >= 500
+    return isinstance(err, (asyncio.TimeoutError, aiohttp.ServerTimeoutError))
+
+
+# Compression level used when none is configured. gzip keeps its historic
+# maximum; zstd's default trades slightly larger files for far less CPU.
+_CODEC_DEFAULT_LEVELS = {CHUNK_CODEC_GZIP: 9, CHUNK_CODEC_ZSTD: 3}
+_CODEC_LEVEL_RANGES = {CHUNK_CODEC_GZIP: (1, 9), CHUNK_CODEC_ZSTD: (1, 22)}
+_CODEC_EXTENSIONS = {CHUNK_CODEC_GZIP: ".csv.gz", CHUNK_CODEC_ZSTD: ".csv.zst"}
+
+
+@dataclass(frozen=True)
+class ChunkCodec:
+    """Compression used for staged chunk files.
+
+    Databricks picks the decompressor from the file extension, so the
+    extension doubles as the ``read_files`` glob for the MERGE.
+    """
+
+    name: str = CHUNK_CODEC_GZIP
+    level: int | None = None
+
+    @classmethod
+    def from_options(cls, name: str | None, level: int | None = None) -> ChunkCodec:
+        """Validate codec options, clamping the level to the codec's range."""
+        name = name or DEFAULT_CHUNK_CODEC
+        if name not in _CODEC_EXTENSIONS:
+            raise ValueError(f"Unsupported chunk codec: {name}")
+        if name == CHUNK_CODEC_ZSTD and _zstd is None:
+            raise ValueError("The zstd chunk codec requires Python 3.14 or newer.")
+        if level:
+            low, high = _CODEC_LEVEL_RANGES[name]
+            level = min(max(int(level), low), high)
+        return cls(name, level or None)
+
+    @property
+    def extension(self) -> str:
+        """Return the staged file extension, e.g. ``.csv.gz``."""
+        return _CODEC_EXTENSIONS[self.name]
+
+    @property
+    def effective_level(self) -> int:
+        """Return the level actually passed to the compressor."""
+        return self.level or _CODEC_DEFAULT_LEVELS[self.name]
+
+    def open_text(self, output: str | BinaryIO) -> TextIO:
+        """Open a compressed UTF-8 text writer on a path or binary buffer."""
+        if self.name == CHUNK_CODEC_ZSTD:
+            return _zstd.open(
+                output,
+                "wt",
+                level=self.effective_level,
+                encoding="utf-8",
+                newline="",
+            )
+        return gzip.open(
+            output,
+            "wt",
+            compresslevel=self.effective_level,
+            encoding="utf-8",
+            newline="",
+        )
+
+
+_CHUNK_COLUMNS = ("state", "last_updated_ts", "entity_id")
+# Rows buffered per Parquet row group; bounds encoder memory like the csv path.
+_PARQUET_ROW_GROUP_ROWS = 50_000
+
+ChunkRowWriter = Callable[[Iterable[tuple[Any, float, str]]], None]
+
+
+class CsvChunkEncoder:
+    """Write chunks as compressed CSV text."""
+
+    read_format = CHUNK_FORMAT_CSV
+
+    def __init__(self, codec: ChunkCodec | None = None) -> None:
+        self.codec = codec or ChunkCodec()
+
+    @property
+    def extension(self) -> str:
+        """Return the staged file extension."""
+        return self.codec.extension
+
+    @contextlib.contextmanager
+    def open(self, output: str | BinaryIO) -> Iterator[ChunkRowWriter]:
+        """Open a chunk and yield a writer for (state, ts, entity_id) rows."""
+        with self.codec.open_text(output) as f:
+            writer = csv.writer(f)
+            writer.writerow(_CHUNK_COLUMNS)
+            yield writer.writerows
+
+
+def _state_to_float(state: Any) -> float | None:
+    """Mirror TRY_CAST(state AS FLOAT): non-numeric states become NULL."""
+    try:
+        return float(state)
+    except (TypeError, ValueError):
+        return None
+
+
+class ParquetChunkEncoder:
+    """Write chunks as typed Parquet so the warehouse does not cast text.
+
+    state is a double, last_updated_ts a UTC timestamp in microseconds and
+    entity_id is dictionary-encoded. Requires pyarrow.
+    """
+
+    read_format = CHUNK_FORMAT_PARQUET
+    extension = ".parquet"
+
+    def __init__(self, codec: ChunkCodec | None = None) -> None:
+        self.codec = codec or ChunkCodec()
+
+    @contextlib.contextmanager
+    def open(self, output: str | BinaryIO) -> Iterator[ChunkRowWriter]:
+        """Open a chunk and yield a writer for (state, ts, entity_id) rows."""
+        schema = _pa.schema(
+            [
+                ("state", _pa.float64()),
+                ("last_updated_ts", _pa.timestamp("us", tz="UTC")),
+                ("entity_id", _pa.string()),
+            ]
+        )
+        writer = _pq.ParquetWriter(
+            output,
+            schema,
+            compression=self.codec.name,
+            compression_level=self.codec.effective_level,
+            use_dictionary=["entity_id"],
+        )
+        states: list[float | None] = []
+        timestamps: list[int] = []
+        entity_ids: list[str] = []
+
+        def _flush() -> None:
+            if not states:
+                return
+            writer.write_table(
+                _pa.Table.from_arrays(
+                    [
+                        _pa.array(states, _pa.float64()),
+                        _pa.array(timestamps, _pa.timestamp("us", tz="UTC")),
+                        _pa.array(entity_ids, _pa.string()),
+                    ],
+                    schema=schema,
+                )
+            )
+            states.clear()
+            timestamps.clear()
+            entity_ids.clear()
+
+        def _write_rows(rows: Iterable[tuple[Any, float, str]]) -> None:
+            for state, row_ts, entity_id in rows:
+                states.append(_state_to_float(state))
+                timestamps.append(round(float(row_ts) * 1_000_000))
+                entity_ids.append(entity_id)
+            if len(states) >= _PARQUET_ROW_GROUP_ROWS:
+                _flush()
+
+        try:
+            yield _write_rows
+            _flush()
+        finally:
+            writer.close()
+
+
+ChunkEncoder = CsvChunkEncoder | ParquetChunkEncoder
+
+
+def build_chunk_encoder(
+    chunk_format: str | None, codec: ChunkCodec | None = None
+) -> ChunkEncoder:
+    """Return the encoder for ``chunk_format``, degrading to csv without pyarrow."""
+    if chunk_format == CHUNK_FORMAT_PARQUET:
+        if _pq is not None:
+            return ParquetChunkEncoder(codec)
+        _LOGGER.warning("pyarrow is not installed; staging csv chunks instead")
+    return CsvChunkEncoder(codec)
+
+
+# Bump whenever create_table's column layout or table properties change, so
+# stored DDL fingerprints stop matching and the DDL runs once more.
+TABLE_LAYOUT_VERSION = 1
+
+# Statement API error classes that mean the cached DDL state is stale.
+_MISSING_TARGET_ERRORS = ("TABLE_OR_VIEW_NOT_FOUND", "SCHEMA_NOT_FOUND")
+
+
+def target_ddl_fingerprint(
+    catalog: str, schema: str, table: str, layout: str = DEFAULT_TABLE_LAYOUT
+) -> str:
+    """Return the fingerprint recorded once DDL for a target has succeeded."""
+    return f"{catalog}.{schema}.{table}#v{TABLE_LAYOUT_VERSION}/{layout}"
+
+
+# Physical layout clauses for the target table. Liquid clustering avoids one
+# tiny partition per sensor; the date layout partitions on a generated column
+# so writers never have to supply it.
+_TABLE_LAYOUT_COLUMNS = {
+    TABLE_LAYOUT_DATE_PARTITIONED: (
+        ",\n            last_updated_date DATE"
+        " GENERATED ALWAYS AS (CAST(last_updated_ts AS DATE))"
+    ),
+}
+_TABLE_LAYOUT_CLAUSES = {
+    TABLE_LAYOUT_LIQUID: "CLUSTER BY (entity_id, last_updated_ts)",
+    TABLE_LAYOUT_DATE_PARTITIONED: "PARTITIONED BY (last_updated_date)",
+    TABLE_LAYOUT_ENTITY_PARTITIONED: "PARTITIONED BY (entity_id)",
+}
+
+# Suffix of the staging table a layout migration copies the rows through.
+_LAYOUT_MIGRATION_SUFFIX = "__layout_migration"
+# Deadline for each migration statement; full-table copies outlast sync DDL.
+_LAYOUT_MIGRATION_STATEMENT_TIMEOUT = 6 * 60 * 60
+
+
+def _is_missing_target_error(err: Exception) -> bool:
+    """Return True when a statement failed because the target does not exist."""
+    text = str(err)
+    return any(marker in text for marker in _MISSING_TARGET_ERRORS)
+
+
+# Statements are submitted without waiting and then polled: the first poll
+# follows quickly, later ones back off so long MERGEs cost few requests.
+_STATEMENT_POLL_INITIAL = 0.5
+_STATEMENT_POLL_MAX = 5.0
+_STATEMENT_POLL_BACKOFF = 1.5
+_STATEMENT_ACTIVE_STATES = ("PENDING", "RUNNING")
+
+
+# Above this many entities the IN list stops paying for itself as a pruning
+# predicate and only bloats the statement text.
+_MERGE_ENTITY_PRUNE_LIMIT = 1_000
+
+
+@dataclass(frozen=True)
+class MergeBounds:
+    """Timestamp range and entities covered by one job's uploaded chunks."""
+
+    min_ts: float
+    max_ts: float
+    entity_ids: tuple[str, ...] = ()
+
+    def target_predicate(self) -> str:
+        """Return ON-clause predicates that let Delta skip untouched files.
+
+        The timestamp range is widened by a microsecond each way so float
+        rounding in the source cast can never exclude a matching row.
+        """
+        low = math.floor(self.min_ts * 1_000_000) - 1
+        high = math.ceil(self.max_ts * 1_000_000) + 1
+        predicate = (
+            f"target.last_updated_ts BETWEEN timestamp_micros({low}) "
+            f"AND timestamp_micros({high})"
+        )
+        if self.entity_ids and len(self.entity_ids) <= _MERGE_ENTITY_PRUNE_LIMIT:
+            quoted = ", ".join(
+                "'" + entity_id.replace("\\", "\\\\").replace("'", "\\'") + "'"
+                for entity_id in self.entity_ids
+            )
+            predicate = (
+                f"{predicate}\n        AND\n            target.entity_id IN ({quoted})"
+            )
+        return predicate
+
+
 @dataclass
 class RuntimeSyncConfig:
     """Runtime config used by the async sync pipeline."""
@@ -88,6 +790,8 @@ class DatabricksTarget:
         access_token: str,
         session: aiohttp.ClientSession | None = None,
         hass: Any | None = None,
+        statement_timeout: float = DEFAULT_STATEMENT_TIMEOUT_SECONDS,
+        executor: Executor | None = None,
     ):
         self._config = config
         self._server_hostname = server_hostname
@@ -95,9 +799,34 @@ class DatabricksTarget:
         self._access_token = access_token
         self._session = session
         self._hass = hass
+        self._statement_timeout = statement_timeout
+        self._executor = executor
+
+    def _api_url(self, path: str) -> str:
+        """Return the workspace REST API url for ``path``."""
+        return f"https://{self._server_hostname}{path}"
+
+    def _statement_api(self) -> tuple[str, dict]:
+        """Return the Statement Execution API url and request headers."""
+        url = self._api_url("/api/2.0/sql/statements")
+        headers = {
+            "Authorization": f"Bearer {self._access_token}",
+            "Content-Type": "application/json",
+        }
+        return url, headers
 
-    async def _execute_sql(self, statement: str) -> dict:
-        """Execute a SQL statement using the Databricks REST API asynchronously."""
+    async def _execute_sql(
+        self,
+        statement: str,
+        on_submit: Callable[[str], Awaitable[None]] | None = None,
+    ) -> dict:
+        """Execute a SQL statement using the Databricks REST API asynchronously.
+
+        The statement is submitted without waiting and polled until it reaches
+        a terminal state. It is cancelled on the warehouse when it outlives the
+        statement timeout or when the calling task is cancelled. ``on_submit``
+        receives the statement id as soon as the warehouse has accepted it.
+        """
         close_session = False
         session = self._session
         if session is None:
@@ -105,31 +834,117 @@ class DatabricksTarget:
             close_session = True
 
         try:
-            url = f"https://{self._server_hostname}/api/2.0/sql/statements"
-            headers = {
-                "Authorization": f"Bearer {self._access_token}",
-                "Content-Type": "application/json",
-            }
-
+            url, headers = self._statement_api()
             warehouse_id = self._http_path.strip("/").split("/")[-1]
 
             payload = {
                 "warehouse_id": warehouse_id,
                 "statement": statement,
-                "wait_timeout": "30s",
+                "wait_timeout": "0s",
+                "on_wait_timeout": "CONTINUE",
             }
+            deadline = asyncio.get_running_loop().time() + self._statement_timeout
             async with session.post(url, headers=headers, json=payload) as resp:
                 resp.raise_for_status()
                 result = await resp.json()
-                if result.get("status", {}).get("state") in ("FAILED", "CANCELED"):
-                    raise Exception(f"SQL execution failed: {result}")
-                return result
+
+            statement_id = result.get("statement_id")
+            if statement_id is not None and on_submit is not None:
+                await on_submit(statement_id)
+            return await self._await_statement(session, url, headers, result, deadline)
         finally:
             if close_session:
                 await session.close()
 
-    async def _upload_file(self, file_path: str, databricks_path: str) -> dict:
-        """Upload a file to Databricks Volumes using the Files API asynchronously."""
+    async def wait_for_statement(self, statement_id: str) -> dict:
+        """Wait for a statement submitted by an earlier run and return its result.
+
+        Raises when the statement failed, was cancelled or is unknown to the
+        warehouse, in which case the caller submits it again.
+        """
+        close_session = False
+        session = self._session
+        if session is None:
+            session = aiohttp.ClientSession()
+            close_session = True
+
+        try:
+            url, headers = self._statement_api()
+            deadline = asyncio.get_running_loop().time() + self._statement_timeout
+            async with session.get(f"{url}/{statement_id}", headers=headers) as resp:
+                resp.raise_for_status()
+                result = await resp.json()
+            result.setdefault("statement_id", statement_id)
+            return await self._await_statement(session, url, headers, result, deadline)
+        finally:
+            if close_session:
+                await session.close()
+
+    async def _await_statement(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        headers: dict,
+        result: dict,
+        deadline: float,
+    ) -> dict:
+        """Poll a submitted statement until it is terminal or the deadline passes."""
+        loop = asyncio.get_running_loop()
+        statement_id = result.get("statement_id")
+        delay = _STATEMENT_POLL_INITIAL
+        try:
+            while result.get("status", {}).get("state") in _STATEMENT_ACTIVE_STATES:
+                if statement_id is None:
+                    raise Exception(f"SQL statement has no statement_id: {result}")
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    await self._cancel_statement(session, url, headers, statement_id)
+                    raise Exception(
+                        f"SQL statement {statement_id} timed out after "
+                        f"{self._statement_timeout}s and was cancelled"
+                    )
+                await asyncio.sleep(min(delay, remaining))
+                delay = min(delay * _STATEMENT_POLL_BACKOFF, _STATEMENT_POLL_MAX)
+                async with session.get(
+                    f"{url}/{statement_id}", headers=headers
+                ) as resp:
+                    resp.raise_for_status()
+                    result = await resp.json()
+        except asyncio.CancelledError:
+            # Entry unload or caller cancellation: stop the warehouse work too
+            if statement_id is not None:
+                await asyncio.shield(
+                    self._cancel_statement(session, url, headers, statement_id)
+                )
+            raise
+
+        if result.get("status", {}).get("state") in ("FAILED", "CANCELED"):
+            raise Exception(f"SQL execution failed: {result}")
+        return result
+
+    async def _cancel_statement(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        headers: dict,
+        statement_id: str,
+    ) -> None:
+        """Ask the warehouse to cancel a statement; failures are only logged."""
+        try:
+            async with session.post(
+                f"{url}/{statement_id}/cancel", headers=headers
+            ) as resp:
+                resp.raise_for_status()
+        except Exception:
+            _LOGGER.debug("Failed to cancel SQL statement %s", statement_id)
+
+    async def _upload_file(
+        self, file_path: str | BinaryIO, databricks_path: str
+    ) -> dict:
+        """Upload a file to Databricks Volumes using the Files API asynchronously.
+
+        ``file_path`` may also be an in-memory staging buffer.
+        """
         close_session = False
         session = self._session
         if session is None:
@@ -137,13 +952,23 @@ class DatabricksTarget:
             close_session = True
 
         try:
-            url = f"https://{self._server_hostname}/api/2.0/fs/files{databricks_path}?overwrite=true"
+            url = self._api_url(f"/api/2.0/fs/files{databricks_path}?overwrite=true")
             headers = {
                 "Authorization": f"Bearer {self._access_token}",
                 "Content-Type": "application/octet-stream",
             }
-            file_bytes = await _async_run_job(self._hass, _read_file_content, file_path)
-            async with session.put(url, headers=headers, data=file_bytes) as resp:
+            # Stream from disk with an explicit length: only one block is held
+            # in memory and the request is sent without chunked encoding.
+            headers["Content-Length"] = str(
+                await _async_run_job(
+                    self._hass, _file_size, file_path, executor=self._executor
+                )
+            )
+            async with session.put(
+                url,
+                headers=headers,
+                data=_iter_file_blocks(self._hass, file_path, executor=self._executor),
+            ) as resp:
                 resp.raise_for_status()
                 text = await resp.text()
                 return {"status": resp.status, "response": text}
@@ -160,7 +985,7 @@ class DatabricksTarget:
             close_session = True
 
         try:
-            url = f"https://{self._server_hostname}/api/2.0/fs/directories{databricks_path}"
+            url = self._api_url(f"/api/2.0/fs/directories{databricks_path}")
             headers = {
                 "Authorization": f"Bearer {self._access_token}",
                 "Content-Type": "application/json",
@@ -173,155 +998,1068 @@ class DatabricksTarget:
             if close_session:
                 await session.close()
 
+    async def list_volume_folder(self, databricks_path: str) -> list[str]:
+        """Return the names of the files in a Volume folder (none if missing)."""
+        close_session = False
+        session = self._session
+        if session is None:
+            session = aiohttp.ClientSession()
+            close_session = True
+
+        try:
+            url = self._api_url(f"/api/2.0/fs/directories{databricks_path}")
+            headers = {"Authorization": f"Bearer {self._access_token}"}
+            names: list[str] = []
+            params: dict[str, str] = {}
+            while True:
+                async with session.get(url, headers=headers, params=params) as resp:
+                    if resp.status == 404:
+                        return names
+                    resp.raise_for_status()
+                    listing = await resp.json()
+                names.extend(
+                    entry["name"]
+                    for entry in listing.get("contents", [])
+                    if not entry.get("is_directory")
+                )
+                if not listing.get("next_page_token"):
+                    return names
+                params = {"page_token": listing["next_page_token"]}
+        finally:
+            if close_session:
+                await session.close()
+
+    async def delete_volume_file(self, databricks_path: str) -> None:
+        """Delete one file from a Databricks Volume."""
+        close_session = False
+        session = self._session
+        if session is None:
+            session = aiohttp.ClientSession()
+            close_session = True
+
+        try:
+            url = self._api_url(f"/api/2.0/fs/files{databricks_path}")
+            headers = {"Authorization": f"Bearer {self._access_token}"}
+            async with session.delete(url, headers=headers) as resp:
+                if resp.status != 404:
+                    resp.raise_for_status()
+        finally:
+            if close_session:
+                await session.close()
+
+    async def remove_volume_folder(self, databricks_path: str) -> None:
+        """Delete a job folder and the files in it from a Databricks Volume.
+
+        The Files API refuses to delete a directory that is not empty, so
+        the files go first. A folder that does not exist is left alone.
+        """
+        for name in await self.list_volume_folder(databricks_path):
+            await self.delete_volume_file(f"{databricks_path}/{name}")
+        try:
+            await self.delete_volume_folder(databricks_path)
+        except aiohttp.ClientResponseError as err:
+            if err.status != 404:
+                raise
+
     async def create_schema(self):
         """Create target schema when it does not exist."""
         statement = f"CREATE SCHEMA IF NOT EXISTS `{self._config.catalog}`.`{self._config.schema}`"
         return await self._execute_sql(statement)
 
-    async def create_table(self):
-        """Create target table when it does not exist."""
-        statement = f"""
-        CREATE TABLE IF NOT EXISTS `{self._config.catalog}`.`{self._config.schema}`.`{self._config.table}` (
+    def _table_name(self, suffix: str = "") -> str:
+        """Return the fully qualified target table name."""
+        return f"`{self._config.catalog}`.`{self._config.schema}`.`{self._config.table}{suffix}`"
+
+    @staticmethod
+    def _table_definition(
+        table_name: str, layout: str, create: str = "CREATE TABLE IF NOT EXISTS"
+    ) -> str:
+        """Return ``create`` DDL for ``layout``."""
+        if layout not in _TABLE_LAYOUT_CLAUSES:
+            raise ValueError(f"Unsupported table layout: {layout}")
+        return f"""
+        {create} {table_name} (
             state FLOAT,
             last_updated_ts TIMESTAMP,
-            entity_id STRING
+            entity_id STRING{_TABLE_LAYOUT_COLUMNS.get(layout, "")}
         )
         USING DELTA
-        PARTITIONED BY (entity_id)
+        {_TABLE_LAYOUT_CLAUSES[layout]}
         """
-        return await self._execute_sql(statement)
+
+    async def create_table(self, layout: str = DEFAULT_TABLE_LAYOUT):
+        """Create target table when it does not exist."""
+        return await self._execute_sql(
+            self._table_definition(self._table_name(), layout)
+        )
+
+    async def _staging_table_exists(self) -> bool:
+        """Return True when a layout migration left its staging table behind."""
+        result = await self._execute_sql(
+            f"SHOW TABLES IN `{self._config.catalog}`.`{self._config.schema}` "
+            f"LIKE '{self._config.table}{_LAYOUT_MIGRATION_SUFFIX}'"
+        )
+        return bool(result.get("result", {}).get("data_array"))
+
+    async def migrate_table_layout(self, layout: str) -> None:
+        """Rewrite the existing target table into ``layout``.
+
+        Rows are copied to a staging table, the target is replaced with the
+        new layout (its old version stays in the Delta history) and the rows
+        are copied back. If a step after the replace fails, the rows remain
+        in the staging table and the next migration resumes the copy-back.
+        The staging table is never replaced: when it exists next to a target
+        that still holds rows, the migration refuses to run.
+        """
+        target = self._table_name()
+        staging = self._table_name(_LAYOUT_MIGRATION_SUFFIX)
+        columns = "state, last_updated_ts, entity_id"
+
+        if await self._staging_table_exists():
+            if not await self.is_table_empty():
+                raise Exception(
+                    f"{staging} is left from an interrupted migration and {target} "
+                    "is not empty; copy any missing rows back and drop the staging "
+                    "table before migrating again"
+                )
+            _LOGGER.info("Resuming the copy-back of %s into %s", staging, target)
+        else:
+            # Plain CREATE TABLE: a concurrent migration fails instead of wiping it
+            await self._execute_sql(
+                self._table_definition(staging, layout, create="CREATE TABLE")
+            )
+            await self._execute_sql(
+                f"INSERT INTO {staging} ({columns}) SELECT {columns} FROM {target}"
+            )
+        try:
+            await self._execute_sql(
+                self._table_definition(target, layout, create="CREATE OR REPLACE TABLE")
+            )
+            await self._execute_sql(
+                f"INSERT INTO {target} ({columns}) SELECT {columns} FROM {staging}"
+            )
+        except Exception as err:
+            raise Exception(
+                f"Table layout migration failed; rows are kept in {staging} and "
+                f"are copied back when the migration is run again: {err}"
+            ) from err
+        await self._execute_sql(f"DROP TABLE IF EXISTS {staging}")
 
     async def upload_to_databricks(self, input_full_path: str, filename: str):
-        """Upload local csv.gz file to Databricks Volume."""
+        """Upload a local chunk file to Databricks Volume."""
         databricks_path = f"{self._config.dbx_path}/{filename}"
         return await self._upload_file(input_full_path, databricks_path)
 
-    async def upsert_new_data(self, source_path: str):
-        """Upsert uploaded csv into target Delta table using wildcards or explicit paths."""
+    async def is_table_empty(self) -> bool:
+        """Return True when the target table holds no rows."""
+        result = await self._execute_sql(
+            f"SELECT 1 FROM `{self._config.catalog}`.`{self._config.schema}`.`{self._config.table}` LIMIT 1"
+        )
+        return not result.get("result", {}).get("data_array")
+
+    async def copy_into_table(
+        self,
+        source_dir: str,
+        pattern: str,
+        source_format: str = CHUNK_FORMAT_CSV,
+        on_submit: Callable[[str], Awaitable[None]] | None = None,
+    ):
+        """Append uploaded chunks with COPY INTO, skipping the MERGE join.
+
+        Only safe when nothing in the target can collide with the chunks,
+        i.e. the first backfill into an empty table.
+        """
+        if source_format == CHUNK_FORMAT_PARQUET:
+            select = "CAST(state AS FLOAT) AS state, last_updated_ts, entity_id"
+            file_format = "FILEFORMAT = PARQUET"
+        else:
+            select = (
+                "TRY_CAST(state AS FLOAT) AS state, "
+                "TRY_CAST(last_updated_ts AS TIMESTAMP) AS last_updated_ts, "
+                "entity_id"
+            )
+            file_format = (
+                "FILEFORMAT = CSV\n"
+                "        FORMAT_OPTIONS ('header' = 'true', 'inferSchema' = 'true')"
+            )
         statement = f"""
-        MERGE INTO `{self._config.catalog}`.`{self._config.schema}`.`{self._config.table}` AS target
-        USING (
+        COPY INTO `{self._config.catalog}`.`{self._config.schema}`.`{self._config.table}`
+        FROM (
+            SELECT {select}
+            FROM '{source_dir}'
+        )
+        {file_format}
+        PATTERN = '{pattern}'
+        """
+        return await self._execute_sql(statement, on_submit)
+
+    async def upsert_new_data(
+        self,
+        source_path: str,
+        source_format: str = CHUNK_FORMAT_CSV,
+        bounds: MergeBounds | None = None,
+        on_submit: Callable[[str], Awaitable[None]] | None = None,
+    ):
+        """Upsert uploaded chunks into target Delta table using wildcards or explicit paths.
+
+        ``bounds`` restricts the target side of the join to the uploaded time
+        range and entities so untouched files are pruned. Matched rows are only
+        rewritten when their state actually changed.
+        """
+        if source_format == CHUNK_FORMAT_PARQUET:
+            # Typed columns: only the double -> FLOAT narrowing remains
+            source_select = f"""
+            SELECT
+                CAST(state AS FLOAT) AS state,
+                last_updated_ts,
+                entity_id
+            FROM read_files('{source_path}', format => 'parquet')"""
+        else:
+            source_select = f"""
             SELECT
                 TRY_CAST(state AS FLOAT) AS state,
                 TRY_CAST(last_updated_ts AS TIMESTAMP) AS last_updated_ts,
                 entity_id
-            FROM read_files('{source_path}', format => 'csv', header => 'true')
+            FROM read_files('{source_path}', format => 'csv', header => 'true')"""
+        target_predicate = ""
+        if bounds is not None:
+            target_predicate = f"""
+        AND
+            {bounds.target_predicate()}"""
+        statement = f"""
+        MERGE INTO `{self._config.catalog}`.`{self._config.schema}`.`{self._config.table}` AS target
+        USING ({source_select}
         ) AS source
         ON
             target.entity_id = source.entity_id
         AND
-            target.last_updated_ts = source.last_updated_ts
-        WHEN MATCHED THEN
+            target.last_updated_ts = source.last_updated_ts{target_predicate}
+        WHEN MATCHED AND target.state IS DISTINCT FROM source.state THEN
             UPDATE SET
-                target.state = source.state,
-                target.last_updated_ts = source.last_updated_ts
+                target.state = source.state
         WHEN NOT MATCHED THEN
             INSERT (state, last_updated_ts, entity_id)
             VALUES (source.state, source.last_updated_ts, source.entity_id)
         """
-        return await self._execute_sql(statement)
+        return await self._execute_sql(statement, on_submit)
+
+
+def _like_to_regex(pattern: str) -> re.Pattern[str]:
+    """Translate a SQL LIKE pattern into an equivalent case-insensitive regex."""
+    parts = []
+    for char in pattern:
+        if char == "%":
+            parts.append(".*")
+        elif char == "_":
+            parts.append(".")
+        else:
+            parts.append(re.escape(char))
+    return re.compile("".join(parts), re.IGNORECASE | re.DOTALL)
+
+
+def _detect_metadata_table(cursor: sqlite3.Cursor) -> str:
+    """Return the recorder metadata table name or raise a descriptive error."""
+    # Detect the correct metadata table name (state_metadata in new HA, states_meta in older)
+    cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name IN ('state_metadata', 'states_meta')"
+    )
+    meta_table_row = cursor.fetchone()
+    if not meta_table_row:
+        # If neither exists, check if 'states' exists to provide a better error
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name='states'"
+        )
+        if not cursor.fetchone():
+            raise sqlite3.OperationalError(
+                "Home Assistant database schema not found (missing 'states' table). Ensure recorder has initialized."
+            )
+        raise sqlite3.OperationalError(
+            "Home Assistant metadata table not found (missing 'state_metadata' or 'states_meta')."
+        )
+
+    return meta_table_row[0]
+
+
+class EntityMetadataResolver:
+    """Resolve entity filters to recorder metadata_ids.
+
+    The metadata_id -> entity_id map is kept across runs and only reloaded when
+    the recorder registers new entities (the max metadata_id changes).
+    """
+
+    def __init__(self) -> None:
+        self._source_db_path: str | None = None
+        self._max_metadata_id: int | None = None
+        self._entity_ids: dict[int, str] = {}
+
+    def refresh(
+        self, connection: sqlite3.Connection, source_db_path: str, meta_table: str
+    ) -> dict[int, str]:
+        """Return the cached metadata map, reloading it when it went stale."""
+        cursor = connection.cursor()
+        cursor.execute(f"SELECT MAX(metadata_id) FROM {meta_table}")
+        row = cursor.fetchone()
+        max_metadata_id = row[0] if row else None
+
+        if (
+            source_db_path != self._source_db_path
+            or max_metadata_id != self._max_metadata_id
+        ):
+            cursor.execute(f"SELECT metadata_id, entity_id FROM {meta_table}")
+            self._entity_ids = {
+                int(metadata_id): entity_id
+                for metadata_id, entity_id in cursor
+                if entity_id is not None
+            }
+            self._source_db_path = source_db_path
+            self._max_metadata_id = max_metadata_id
+
+        return self._entity_ids
+
+    def resolve(
+        self,
+        connection: sqlite3.Connection,
+        source_db_path: str,
+        meta_table: str,
+        entity_like: str,
+        include: Iterable[str] | None = None,
+        exclude: Iterable[str] | None = None,
+    ) -> dict[int, str]:
+        """Return the metadata_id -> entity_id subset selected by the filters.
+
+        ``entity_like`` keeps SQL LIKE semantics; ``include`` adds and
+        ``exclude`` removes exact entity ids on top of it.
+        """
+        entity_ids = self.refresh(connection, source_db_path, meta_table)
+        like = _like_to_regex(entity_like)
+        included = set(include or ())
+        excluded = set(exclude or ())
+        return {
+            metadata_id: entity_id
+            for metadata_id, entity_id in entity_ids.items()
+            if (like.fullmatch(entity_id) or entity_id in included)
+            and entity_id not in excluded
+        }
+
+
+# Read-tuned settings for the long-lived extraction connection: never write,
+# map the database file instead of copying pages, and keep sort/temp data in RAM.
+_READ_PRAGMAS = (
+    "PRAGMA query_only = ON",
+    "PRAGMA mmap_size = 134217728",
+    "PRAGMA cache_size = -16384",
+    "PRAGMA temp_store = MEMORY",
+)
+
+# Rows fetched from the cursor per encoder write while streaming a chunk.
+_STREAM_BATCH_ROWS = 2_000
+
+# Uncompressed bytes of a row besides state and entity_id (timestamp, separators)
+_RAW_ROW_OVERHEAD = 32
+
+# Upper state_id bound of the chunk query when a chunk is not capped
+_MAX_STATE_ID = 2**63 - 1
+
+
+@dataclass
+class ExtractionStats:
+    """Cumulative cost of the chunks one extraction session has written."""
+
+    rows: int = 0
+    raw_bytes: int = 0
+    encoded_bytes: int = 0
+    query_seconds: float = 0.0
+    encode_seconds: float = 0.0
+
+
+class ExtractionSession:
+    """Read-only recorder connection shared by every chunk of one sync run.
+
+    The schema is detected once and the chunk query text is fixed once the
+    entity filter is resolved, so sqlite3's statement cache serves the compiled
+    statement for every chunk. Each chunk still runs in its own short read
+    transaction so WAL checkpoints are not blocked between chunks.
+    """
+
+    def __init__(
+        self,
+        source_db_path: str,
+        *,
+        metadata_resolver: EntityMetadataResolver | None = None,
+        encoder: ChunkEncoder | None = None,
+    ) -> None:
+        self._source_db_path = source_db_path
+        self._encoder = encoder or CsvChunkEncoder()
+        self._metadata_resolver = metadata_resolver or EntityMetadataResolver()
+        self._connection: sqlite3.Connection | None = None
+        self._meta_table: str | None = None
+        self._entity_ids: dict[int, str] = {}
+        self._query: str | None = None
+        self._entity_id_widths: dict[int, int] = {}
+        # Range and entities of the last chunk, journaled for the MERGE
+        self.last_chunk_bounds: MergeBounds | None = None
+        # Approximate uncompressed and encoded size of the last chunk
+        self.last_chunk_raw_bytes = 0
+        self.last_chunk_bytes = 0
+        self.stats = ExtractionStats()
+        # Serializes chunk reads with close() so a cancelled run never closes
+        # the connection under an extraction still running in the executor.
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> ExtractionSession:
+        self.open()
+        return self
+
+    def __exit__(self, *_exc_info) -> None:
+        self.close()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Return the open connection."""
+        if self._connection is None:
+            raise RuntimeError("Extraction session is not open.")
+        return self._connection
+
+    def open(self) -> None:
+        """Open the read-only connection and detect the recorder schema."""
+        if self._connection is not None:
+            return
+        # Executor jobs may land on different worker threads; calls are
+        # strictly sequential, so sharing the connection is safe.
+        connection = sqlite3.connect(
+            f"file:{self._source_db_path}?mode=ro",
+            uri=True,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        try:
+            for pragma in _READ_PRAGMAS:
+                connection.execute(pragma)
+            self._meta_table = _detect_metadata_table(connection.cursor())
+        except Exception:
+            connection.close()
+            raise
+        self._connection = connection
+
+    def close(self) -> None:
+        """Close the connection."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def resolve_start_state_id(
+        self, state_id: int, state_ts: float | None = None
+    ) -> int:
+        """Validate a stored state_id watermark against the recorder database.
+
+        Returns 0 (timestamp-filtered scan from the start) when the watermark can
+        no longer be trusted, e.g. the recorder database was recreated or
+        renumbered. Purged rows below the watermark are fine: state ids only
+        ever grow.
+        """
+        if state_id <= 0:
+            return 0
+
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("SELECT MAX(state_id) FROM states")
+            max_row = cursor.fetchone()
+            if not max_row or max_row[0] is None or int(max_row[0]) < state_id:
+                return 0
+
+            if state_ts is not None:
+                cursor.execute(
+                    "SELECT last_updated_ts FROM states WHERE state_id = ?",
+                    (state_id,),
+                )
+                row = cursor.fetchone()
+                if row and (row[0] is None or abs(float(row[0]) - state_ts) > 1e-6):
+                    return 0
+        except sqlite3.Error:
+            return 0
+
+        return state_id
+
+    def lookup_state_ts(self, state_id: int) -> float | None:
+        """Return last_updated_ts of a single state row, used to pin the watermark."""
+        if state_id <= 0:
+            return None
+
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(
+                "SELECT last_updated_ts FROM states WHERE state_id = ?", (state_id,)
+            )
+            row = cursor.fetchone()
+        except sqlite3.Error:
+            return None
+
+        if not row or row[0] is None:
+            return None
+        return float(row[0])
+
+    def resolve_entity_ids(self, entity_like: str) -> dict[int, str]:
+        """Resolve the entity filter once and fix the chunk query for this run."""
+        try:
+            self._entity_ids = self._metadata_resolver.resolve(
+                self.connection,
+                self._source_db_path,
+                self._meta_table,
+                entity_like,
+            )
+        except Exception as err:
+            raise Exception(f"Failed to resolve entity metadata: {err}") from err
+
+        self._entity_id_widths = {
+            metadata_id: len(entity_id)
+            for metadata_id, entity_id in self._entity_ids.items()
+        }
+        # metadata ids are integers, so inlining them is safe and avoids
+        # the bound-parameter limit for installs with many entities.
+        metadata_ids = ",".join(str(int(mid)) for mid in sorted(self._entity_ids))
+        self._query = f"""
+            SELECT
+                state_id,
+                metadata_id,
+                state,
+                last_updated_ts
+            FROM states
+            WHERE
+                metadata_id IN ({metadata_ids})
+                AND state_id > ?
+                AND state_id <= ?
+                AND last_updated_ts >= ?
+                AND state NOT IN ('unknown', 'unavailable')
+            ORDER BY state_id ASC
+            LIMIT ?
+            """
+        return self._entity_ids
+
+    def count_pending(
+        self,
+        min_last_updated_ts: float | None = None,
+        last_state_id: int = 0,
+        limit: int = 1,
+    ) -> int:
+        """Count rows the next chunk would extract, stopping at ``limit``.
+
+        Uses the chunk query, so the count walks the same state_id range and
+        indexes as extraction and never scans past ``limit`` matches.
+        """
+        if not self._entity_ids or self._query is None:
+            return 0
+
+        effective_min_ts = (
+            float(min_last_updated_ts) if min_last_updated_ts is not None else 0.0
+        )
+        try:
+            with self._lock:
+                row = self.connection.execute(
+                    f"SELECT COUNT(*) FROM ({self._query})",
+                    (last_state_id, _MAX_STATE_ID, effective_min_ts, limit),
+                ).fetchone()
+        except Exception as err:
+            raise Exception(f"Failed to count pending states: {err}") from err
+
+        return int(row[0]) if row else 0
+
+    def extract_chunk(
+        self,
+        output_csv_path: str | BinaryIO,
+        chunk_size: int,
+        min_last_updated_ts: float | None = None,
+        last_state_id: int = 0,
+        max_state_id: int | None = None,
+    ) -> tuple[int, float | None, int]:
+        """Extract one chunk of matching states with the session's encoder.
+
+        ``output_csv_path`` is a file path or a writable binary buffer.
+        ``max_state_id`` caps the chunk, used to rebuild a journaled chunk.
+        """
+        if not self._entity_ids or self._query is None:
+            return 0, None, last_state_id
+
+        effective_min_ts = (
+            float(min_last_updated_ts) if min_last_updated_ts is not None else 0.0
+        )
+        entity_ids = self._entity_ids
+        widths = self._entity_id_widths
+        total_rows = 0
+        raw_bytes = 0
+        query_seconds = 0.0
+        self.last_chunk_raw_bytes = 0
+        self.last_chunk_bytes = 0
+        self.last_chunk_bounds = None
+        max_last_updated_ts: float | None = None
+        chunk_min_ts: float | None = None
+        metadata_ids: set[int] = set()
+        next_state_id = last_state_id
+
+        try:
+            with self._lock:
+                connection = self.connection
+                connection.execute("BEGIN")
+                try:
+                    cursor = connection.cursor()
+                    started = time.perf_counter()
+                    cursor.execute(
+                        self._query,
+                        (
+                            last_state_id,
+                            _MAX_STATE_ID if max_state_id is None else max_state_id,
+                            effective_min_ts,
+                            chunk_size,
+                        ),
+                    )
+                    batch = cursor.fetchmany(_STREAM_BATCH_ROWS)
+                    query_seconds += time.perf_counter() - started
+                    if not batch:
+                        self.stats.query_seconds += query_seconds
+                        return 0, None, last_state_id
+
+                    encode_started = time.perf_counter()
+                    encode_query_seconds = 0.0
+                    with self._encoder.open(output_csv_path) as write_rows:
+                        # Rows go from the cursor straight into the encoder in
+                        # bounded batches, so memory does not grow with chunk_size.
+                        while batch:
+                            batch_max_ts = max(row[3] for row in batch)
+                            if (
+                                max_last_updated_ts is None
+                                or batch_max_ts > max_last_updated_ts
+                            ):
+                                max_last_updated_ts = float(batch_max_ts)
+                            batch_min_ts = float(min(row[3] for row in batch))
+                            if chunk_min_ts is None or batch_min_ts < chunk_min_ts:
+                                chunk_min_ts = batch_min_ts
+                            metadata_ids.update(row[1] for row in batch)
+                            write_rows(
+                                (state, row_ts, entity_ids[metadata_id])
+                                for _state_id, metadata_id, state, row_ts in batch
+                            )
+                            total_rows += len(batch)
+                            raw_bytes += _RAW_ROW_OVERHEAD * len(batch) + sum(
+                                widths[metadata_id]
+                                + (len(state) if isinstance(state, str) else 8)
+                                for _state_id, metadata_id, state, _row_ts in batch
+                            )
+                            next_state_id = int(batch[-1][0])
+                            started = time.perf_counter()
+                            batch = cursor.fetchmany(_STREAM_BATCH_ROWS)
+                            encode_query_seconds += time.perf_counter() - started
+                    # Encoding includes the final flush when the encoder closes
+                    encode_seconds = (
+                        time.perf_counter() - encode_started - encode_query_seconds
+                    )
+                    query_seconds += encode_query_seconds
+                    cursor.close()
+                finally:
+                    connection.execute("COMMIT")
+        except Exception as err:
+            raise Exception(f"Failed to query database state chunk: {err}") from err
+
+        if isinstance(output_csv_path, str):
+            encoded_bytes = os.path.getsize(output_csv_path)
+        else:
+            encoded_bytes = output_csv_path.tell()
+        self.last_chunk_raw_bytes = raw_bytes
+        self.last_chunk_bytes = encoded_bytes
+        self.last_chunk_bounds = MergeBounds(
+            chunk_min_ts,
+            max_last_updated_ts,
+            tuple(sorted(entity_ids[metadata_id] for metadata_id in metadata_ids)),
+        )
+        self.stats.rows += total_rows
+        self.stats.raw_bytes += raw_bytes
+        self.stats.encoded_bytes += encoded_bytes
+        self.stats.query_seconds += query_seconds
+        self.stats.encode_seconds += encode_seconds
+        return total_rows, max_last_updated_ts, next_state_id
 
 
 def _extract_chunk_to_csv(
     source_db_path: str,
-    output_csv_path: str,
+    output_csv_path: str | BinaryIO,
     entity_like: str,
     chunk_size: int,
     min_last_updated_ts: float | None = None,
     last_state_id: int = 0,
+    session: ExtractionSession | None = None,
+    max_state_id: int | None = None,
 ) -> tuple[int, float | None, int]:
     """Extract matching states into csv.gz for a single chunk window.
 
-    Native RO transaction closes completely after returning to unblock WAL checkpoints.
+    Uses the run's ``session`` when given; otherwise opens a one-shot session
+    that is closed again before returning.
     """
+    if session is not None:
+        return session.extract_chunk(
+            output_csv_path,
+            chunk_size,
+            min_last_updated_ts,
+            last_state_id,
+            max_state_id,
+        )
 
     try:
-        connection = sqlite3.connect(f"file:{source_db_path}?mode=ro", uri=True)
-        try:
-            cursor = connection.cursor()
+        one_shot = ExtractionSession(source_db_path)
+        one_shot.open()
+    except Exception as err:
+        raise Exception(f"Failed to query database state chunk: {err}") from err
 
-            # Detect the correct metadata table name (state_metadata in new HA, states_meta in older)
-            cursor.execute(
-                "SELECT name FROM sqlite_master WHERE type='table' AND name IN ('state_metadata', 'states_meta')"
-            )
-            meta_table_row = cursor.fetchone()
-            if not meta_table_row:
-                # If neither exists, check if 'states' exists to provide a better error
-                cursor.execute(
-                    "SELECT name FROM sqlite_master WHERE type='table' AND name='states'"
-                )
-                if not cursor.fetchone():
-                    raise sqlite3.OperationalError(
-                        "Home Assistant database schema not found (missing 'states' table). Ensure recorder has initialized."
-                    )
-                raise sqlite3.OperationalError(
-                    "Home Assistant metadata table not found (missing 'state_metadata' or 'states_meta')."
-                )
+    with contextlib.closing(one_shot):
+        one_shot.resolve_entity_ids(entity_like)
+        return one_shot.extract_chunk(
+            output_csv_path,
+            chunk_size,
+            min_last_updated_ts,
+            last_state_id,
+            max_state_id,
+        )
 
-            meta_table = meta_table_row[0]
 
-            query = f"""
-            SELECT
-                s.state_id,
-                s.state,
-                s.last_updated_ts,
-                sm.entity_id
-            FROM states AS s
-            JOIN {meta_table} AS sm
-                ON s.metadata_id = sm.metadata_id
-            WHERE
-                s.state_id > ?
-                AND s.last_updated_ts >= ?
-                AND sm.entity_id LIKE ?
-                AND s.state NOT IN ('unknown', 'unavailable')
-            ORDER BY s.state_id ASC
-            LIMIT ?
-            """
+async def _upload_with_backoff(
+    sqlwh: DatabricksTarget,
+    limiter: AdaptiveUploadLimiter,
+    file_path: str | BinaryIO,
+    databricks_path: str,
+) -> dict:
+    """Upload one chunk inside a limiter slot, retrying throttled attempts."""
+    attempt = 0
+    while True:
+        await limiter.acquire()
+        started = time.monotonic()
+        try:
+            result = await sqlwh._upload_file(file_path, databricks_path)
+        except Exception as err:
+            if attempt >= len(_UPLOAD_RETRY_DELAYS) or not _is_backoff_error(err):
+                raise
+            limiter.record_backoff()
+        else:
+            limiter.record_success(time.monotonic() - started)
+            return result
+        finally:
+            await limiter.release()
+        await asyncio.sleep(_UPLOAD_RETRY_DELAYS[attempt])
+        attempt += 1
 
-            effective_min_ts = (
-                float(min_last_updated_ts) if min_last_updated_ts is not None else 0.0
-            )
 
-            with gzip.open(output_csv_path, "wt", encoding="utf-8", newline="") as f:
-                writer = csv.writer(f)
-                writer.writerow(["state", "last_updated_ts", "entity_id"])
+class SyncMetrics:
+    """Stage timings and byte counts of one sync run.
 
-                cursor.execute(
-                    query, (last_state_id, effective_min_ts, entity_like, chunk_size)
-                )
-                rows = cursor.fetchall()
-                if not rows:
-                    return 0, None, last_state_id
-
-                max_last_updated_ts: float | None = None
-                next_state_id = int(rows[-1][0])
-                csv_rows = []
-                for row in rows:
-                    row_ts = row[2]
-                    if max_last_updated_ts is None or row_ts > max_last_updated_ts:
-                        max_last_updated_ts = float(row_ts)
-                    csv_rows.append([row[1], row[2], row[3]])
-
-                writer.writerows(csv_rows)
-                total_rows = len(rows)
+    Extraction and encoding are timed by the extraction session. Uploads run
+    concurrently, so the upload stage is the span from the first upload start
+    to the last upload end. DDL, merge and cleanup are timed here.
+
+    The run attaches its session ``stats`` and loop ``monitor`` as it goes, so
+    a caller holding the instance can report what a failed run measured.
+    """
+
+    def __init__(self) -> None:
+        self._started = time.monotonic()
+        self._stage_seconds = {"ddl": 0.0, "merge": 0.0, "cleanup": 0.0}
+        self._upload_started: float | None = None
+        self._upload_finished: float | None = None
+        self.stats = ExtractionStats()
+        self.monitor: LoopLagMonitor | None = None
 
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Add the time spent in the block to stage ``name``."""
+        started = time.monotonic()
+        try:
+            yield
         finally:
-            connection.close()
-    except Exception as err:
-        raise Exception(f"Failed to query database state chunk: {err}") from err
+            self._stage_seconds[name] += time.monotonic() - started
+
+    def record_upload(self, started: float, finished: float) -> None:
+        """Widen the upload span by one upload."""
+        if self._upload_started is None or started < self._upload_started:
+            self._upload_started = started
+        if self._upload_finished is None or finished > self._upload_finished:
+            self._upload_finished = finished
+
+    def as_dict(
+        self,
+        stats: ExtractionStats | None = None,
+        monitor: LoopLagMonitor | None = None,
+    ) -> dict:
+        """Return the metrics for the sync result, event and Store."""
+        stats = stats or self.stats
+        monitor = monitor or self.monitor
+        duration = time.monotonic() - self._started
+        upload_seconds = 0.0
+        if self._upload_started is not None and self._upload_finished is not None:
+            upload_seconds = self._upload_finished - self._upload_started
+        stage_seconds = {
+            "extract": stats.query_seconds,
+            "encode": stats.encode_seconds,
+            "upload": upload_seconds,
+            **self._stage_seconds,
+        }
+        return {
+            "duration_seconds": round(duration, 3),
+            "stage_seconds": {
+                stage: round(seconds, 3) for stage, seconds in stage_seconds.items()
+            },
+            "rows_extracted": stats.rows,
+            "raw_bytes": stats.raw_bytes,
+            "compressed_bytes": stats.encoded_bytes,
+            "compression_ratio": (
+                round(stats.raw_bytes / stats.encoded_bytes, 2)
+                if stats.encoded_bytes
+                else None
+            ),
+            "rows_per_second": (
+                round(stats.rows / duration, 1) if duration > 0 else None
+            ),
+            "upload_mb_per_second": (
+                round(stats.encoded_bytes / upload_seconds / 1_000_000, 3)
+                if upload_seconds > 0
+                else None
+            ),
+            "throttled_seconds": (
+                round(monitor.throttled_seconds, 3) if monitor is not None else 0.0
+            ),
+            "max_loop_lag_ms": (
+                round(monitor.max_lag * 1000, 1) if monitor is not None else None
+            ),
+            "max_executor_delay_ms": (
+                round(monitor.max_executor_delay * 1000, 1)
+                if monitor is not None
+                else None
+            ),
+        }
+
+
+# Bumped whenever the journal layout changes; older journals are not resumed
+SYNC_JOURNAL_VERSION = 2
+
+
+class SyncJournal:
+    """Persisted progress of one sync job, so an interrupted job can resume.
+
+    Records the job id, the state_id range, time range, entities and upload
+    status of every chunk, the extraction cursor and the id of the submitted
+    load statement. ``save`` persists the journal after every step (``None``
+    clears it); without it the journal only lives for the current run. Its
+    second argument is True for the steps a restart cannot recover from
+    (starting a job, submitting the load, closing the job); per-chunk
+    progress may be written lazily.
+    """
+
+    def __init__(
+        self,
+        data: dict | None = None,
+        save: Callable[[dict | None, bool], Awaitable[None]] | None = None,
+    ) -> None:
+        self.data = data
+        self._save = save
+
+    def can_resume(self, **job: Any) -> bool:
+        """Return True when the journal holds an open job with these settings."""
+        if not self.data or self.data.get("version") != SYNC_JOURNAL_VERSION:
+            return False
+        return all(self.data.get(key) == value for key, value in job.items())
+
+    @property
+    def chunks(self) -> list[dict]:
+        """Return the journaled chunks in extraction order."""
+        return self.data["chunks"] if self.data else []
+
+    @property
+    def statement_id(self) -> str | None:
+        """Return the id of the load statement submitted for this job."""
+        return self.data.get("statement_id") if self.data else None
+
+    async def begin(self, **job: Any) -> None:
+        """Start a new job, replacing whatever the journal held."""
+        self.data = {
+            "version": SYNC_JOURNAL_VERSION,
+            **job,
+            "next_state_id": job["start_state_id"],
+            "extraction_done": False,
+            "chunks": [],
+            "statement_id": None,
+        }
+        await self._persist(immediate=True)
+
+    async def add_chunk(
+        self,
+        filename: str,
+        after_state_id: int,
+        last_state_id: int,
+        rows: int,
+        max_ts: float | None,
+        bounds: MergeBounds | None = None,
+    ) -> None:
+        """Record an extracted chunk and advance the extraction cursor."""
+        chunk = {
+            "filename": filename,
+            "after_state_id": after_state_id,
+            "last_state_id": last_state_id,
+            "rows": rows,
+            "max_ts": max_ts,
+            "uploaded": False,
+        }
+        self.set_chunk_bounds(chunk, bounds)
+        self.data["chunks"].append(chunk)
+        self.data["next_state_id"] = last_state_id
+        await self._persist()
+
+    @staticmethod
+    def set_chunk_bounds(chunk: dict, bounds: MergeBounds | None) -> None:
+        """Store what a chunk file holds, as it was when the file was encoded.
+
+        Entity lists too long to prune by are stored as ``None``.
+        """
+        chunk["min_ts"] = bounds.min_ts if bounds else None
+        chunk["entity_ids"] = (
+            list(bounds.entity_ids)
+            if bounds and len(bounds.entity_ids) <= _MERGE_ENTITY_PRUNE_LIMIT
+            else None
+        )
+
+    def merge_bounds(self) -> MergeBounds | None:
+        """Return the time range and entities of every chunk in the job.
 
-    return total_rows, max_last_updated_ts, next_state_id
+        Built from the journal rather than the recorder, so chunks uploaded
+        before an interruption are covered even if the recorder has since
+        purged their rows.
+        """
+        chunks = [
+            chunk
+            for chunk in self.chunks
+            if chunk.get("min_ts") is not None and chunk["max_ts"] is not None
+        ]
+        if not chunks:
+            return None
+        entity_ids: set[str] | None = set()
+        for chunk in chunks:
+            if chunk.get("entity_ids") is None:
+                entity_ids = None
+                break
+            entity_ids.update(chunk["entity_ids"])
+        return MergeBounds(
+            min(chunk["min_ts"] for chunk in chunks),
+            max(chunk["max_ts"] for chunk in chunks),
+            tuple(sorted(entity_ids)) if entity_ids is not None else (),
+        )
+
+    async def mark_uploaded(self, filename: str) -> None:
+        """Record that a chunk is in the Volume folder."""
+        for chunk in self.chunks:
+            if chunk["filename"] == filename:
+                chunk["uploaded"] = True
+        await self._persist()
+
+    async def update(self, **fields: Any) -> None:
+        """Record job-level progress such as ``extraction_done``."""
+        self.data.update(fields)
+        await self._persist()
+
+    async def record_statement(self, statement_id: str) -> None:
+        """Record the submitted load statement so a restart can await it."""
+        self.data["statement_id"] = statement_id
+        await self._persist(immediate=True)
+
+    async def clear(self) -> None:
+        """Close the job; the next run starts a new one."""
+        self.data = None
+        await self._persist(immediate=True)
+
+    async def _persist(self, immediate: bool = False) -> None:
+        if self._save is not None:
+            await self._save(self.data, immediate)
 
 
 async def run_sync_pipeline(request: SyncRequest) -> dict:
-    """Run async extraction, upload, and merge in isolated micro-batches."""
+    """Run async extraction, upload, and merge in isolated micro-batches.
 
-    await _async_run_job(request.hass, _makedirs, request.local_path)
-    export_time = datetime.now().strftime("%Y-%m-%d-%H-%M-%S")
-    job_id = f"upload_{export_time}"
-    job_local_path = os.path.join(request.local_path, job_id)
-    await _async_run_job(request.hass, _makedirs, job_local_path)
+    Returns a result with ``status`` ``"no_changes"`` without contacting
+    Databricks when the recorder holds nothing new above the watermark.
 
+    Progress is recorded in ``request.journal``. When it holds an interrupted
+    job with the same settings, that job is resumed: only chunks that never
+    reached the Volume are extracted and uploaded again, then the load is
+    finished (or awaited, if its statement was already submitted).
+    """
+
+    codec = ChunkCodec.from_options(request.chunk_codec, request.compression_level)
+    encoder = build_chunk_encoder(request.chunk_format, codec)
+    loop = asyncio.get_running_loop()
+    journal = request.journal or SyncJournal()
+    metrics = request.metrics or SyncMetrics()
+
+    session = ExtractionSession(
+        request.db_path, metadata_resolver=request.metadata_resolver, encoder=encoder
+    )
+    metrics.stats = session.stats
+    try:
+        await loop.run_in_executor(request.executor, session.open)
+        last_state_id = await loop.run_in_executor(
+            request.executor,
+            session.resolve_start_state_id,
+            request.min_state_id,
+            request.min_state_id_ts,
+        )
+        await loop.run_in_executor(
+            request.executor, session.resolve_entity_ids, request.entity_like
+        )
+        job_settings = {
+            "entity_like": request.entity_like,
+            "extension": encoder.extension,
+            "dbx_volumes_path": request.dbx_volumes_path,
+            "start_state_id": last_state_id,
+            "min_last_updated_ts": request.min_last_updated_ts,
+        }
+        resume = journal.can_resume(**job_settings)
+        # Local pre-check: a run with nothing pending must not wake (and be
+        # billed for) a sleeping SQL warehouse.
+        pending_rows = (
+            1
+            if resume
+            else await loop.run_in_executor(
+                request.executor,
+                session.count_pending,
+                request.min_last_updated_ts,
+                last_state_id,
+            )
+        )
+    except BaseException:
+        await loop.run_in_executor(request.executor, session.close)
+        raise
+
+    if not pending_rows:
+        await loop.run_in_executor(request.executor, session.close)
+        return {
+            "status": "no_changes",
+            "filename": None,
+            "rows": 0,
+            "used_hot_copy": False,
+            "max_last_updated_ts": None,
+            "last_state_id": None,
+            "last_state_ts": None,
+        }
+
+    await _async_run_job(
+        request.hass, _makedirs, request.local_path, executor=request.executor
+    )
+    # A journaled job with other settings can never be finished; its Volume
+    # folder is dropped once the new job starts.
+    stale_job_path: str | None = None
+    if resume:
+        job_id = journal.data["job_id"]
+        _LOGGER.info("Resuming interrupted sync job %s", job_id)
+    else:
+        if journal.data:
+            stale_job_path = journal.data.get("dbx_job_path")
+        export_time = datetime.now().strftime("%Y-%m-%d-%H-%M-%S")
+        job_id = f"upload_{export_time}"
+    job_local_path = os.path.join(request.local_path, job_id)
+    # Keeping local files is a debugging aid, so it always stages on disk
+    in_memory = request.in_memory_staging and not request.keep_local_file
     dbx_job_path = f"{request.dbx_volumes_path}/{job_id}"
 
     runtime_config = RuntimeSyncConfig(
@@ -338,71 +2076,380 @@ async def run_sync_pipeline(request: SyncRequest) -> dict:
         access_token=request.access_token,
         session=request.session,
         hass=request.hass,
+        statement_timeout=request.statement_timeout,
+        executor=request.executor,
     )
 
-    await sqlwh.create_schema()
-    await sqlwh.create_table()
+    # DDL is skipped while the stored fingerprint matches this target
+    ddl_fingerprint = target_ddl_fingerprint(
+        request.catalog, request.schema, request.table, request.table_layout
+    )
+    run_ddl = request.force_ddl or request.ddl_fingerprint != ddl_fingerprint
 
-    loop = asyncio.get_running_loop()
-    total_rows = 0
-    global_max_ts: float | None = None
-    last_state_id = 0
-    chunk_index = 0
+    async def _ensure_target() -> None:
+        await sqlwh.create_schema()
+        await sqlwh.create_table(request.table_layout)
 
-    while True:
-        chunk_index += 1
-        filename = f"part_{chunk_index:05d}.csv.gz"
-        chunk_output_path = os.path.join(job_local_path, filename)
-
-        rows_extracted, max_ts, next_state_id = await loop.run_in_executor(
-            None,
-            _extract_chunk_to_csv,
-            request.db_path,
-            chunk_output_path,
-            request.entity_like,
+    # Finished chunk files waiting for upload. The bounded queue is the
+    # backpressure: extraction runs at most ``depth`` chunks ahead of upload.
+    depth = max(0, int(request.pipeline_depth))
+    upload_slots = max(1, int(request.max_concurrent_uploads))
+    chunk_queue: asyncio.Queue[tuple[str | BinaryIO, str] | None] = asyncio.Queue(
+        maxsize=max(1, depth)
+    )
+
+    # One consumer per possible slot; the limiter decides how many upload at once
+    limiter = AdaptiveUploadLimiter(upload_slots)
+
+    # The sync shares the event loop and executor with the rest of Home
+    # Assistant: pause between chunks and upload less while they are overloaded
+    monitor = (
+        LoopLagMonitor(request.loop_lag_threshold, hass=request.hass)
+        if request.loop_lag_threshold > 0
+        else None
+    )
+    metrics.monitor = monitor
+
+    # Adaptive sizing starts at the configured chunk_size and learns from there
+    sizer = (
+        AdaptiveChunkSizer(
             request.chunk_size,
-            request.min_last_updated_ts,
-            last_state_id,
+            target_bytes=request.chunk_target_bytes,
+            target_seconds=request.chunk_target_seconds,
+            memory_ceiling_bytes=request.chunk_memory_ceiling_bytes,
         )
+        if request.chunk_sizing == CHUNK_SIZING_ADAPTIVE
+        else None
+    )
+
+    def _chunk_output(filename: str) -> str | BinaryIO:
+        if in_memory:
+            # Compressed chunks stay in RAM and only spill to a temporary
+            # file (unlinked on creation) above spool_max_bytes.
+            return tempfile.SpooledTemporaryFile(
+                max_size=request.spool_max_bytes, dir=request.local_path
+            )
+        return os.path.join(job_local_path, filename)
+
+    async def _queue_chunk(chunk_output: str | BinaryIO, filename: str) -> None:
+        await chunk_queue.put((chunk_output, filename))
+        if depth == 0:
+            # Sequential mode: wait for the upload before extracting more
+            await chunk_queue.join()
+
+    async def _produce_chunks() -> None:
+        # Chunks an interrupted run never uploaded are rebuilt from their
+        # journaled state_id range; uploaded ones stay in the Volume folder.
+        for chunk in [chunk for chunk in journal.chunks if not chunk["uploaded"]]:
+            if monitor is not None:
+                await monitor.wait_until_clear()
+            chunk_output = _chunk_output(chunk["filename"])
+            rows_extracted, max_ts, _next_state_id = await loop.run_in_executor(
+                request.executor,
+                functools.partial(
+                    _extract_chunk_to_csv,
+                    request.db_path,
+                    chunk_output,
+                    request.entity_like,
+                    chunk["last_state_id"] - chunk["after_state_id"],
+                    request.min_last_updated_ts,
+                    chunk["after_state_id"],
+                    session=session,
+                    max_state_id=chunk["last_state_id"],
+                ),
+            )
+            chunk["rows"] = rows_extracted
+            chunk["max_ts"] = max_ts
+            journal.set_chunk_bounds(chunk, session.last_chunk_bounds)
+            if rows_extracted == 0:
+                # Purged from the recorder since; nothing left to upload
+                await _async_run_job(
+                    request.hass,
+                    _discard_chunk,
+                    chunk_output,
+                    executor=request.executor,
+                )
+                await journal.mark_uploaded(chunk["filename"])
+                continue
+            await _queue_chunk(chunk_output, chunk["filename"])
+
+        while not journal.data["extraction_done"]:
+            if monitor is not None:
+                await monitor.wait_until_clear()
+            filename = f"part_{len(journal.chunks) + 1:05d}{encoder.extension}"
+            chunk_output = _chunk_output(filename)
+            after_state_id = journal.data["next_state_id"]
+            chunk_rows = request.chunk_size if sizer is None else sizer.next_size()
 
-        if rows_extracted == 0:
-            await _async_run_job(request.hass, _remove_path, chunk_output_path)
-            break
+            started = time.monotonic()
+            rows_extracted, max_ts, next_state_id = await loop.run_in_executor(
+                request.executor,
+                functools.partial(
+                    _extract_chunk_to_csv,
+                    request.db_path,
+                    chunk_output,
+                    request.entity_like,
+                    chunk_rows,
+                    request.min_last_updated_ts,
+                    after_state_id,
+                    session=session,
+                ),
+            )
+
+            if rows_extracted == 0:
+                await _async_run_job(
+                    request.hass,
+                    _discard_chunk,
+                    chunk_output,
+                    executor=request.executor,
+                )
+                await journal.update(extraction_done=True)
+                break
+
+            if sizer is not None:
+                sizer.record(
+                    rows_extracted,
+                    session.last_chunk_bytes,
+                    session.last_chunk_raw_bytes,
+                    time.monotonic() - started,
+                )
+
+            await journal.add_chunk(
+                filename,
+                after_state_id,
+                next_state_id,
+                rows_extracted,
+                max_ts,
+                session.last_chunk_bounds,
+            )
+            await _queue_chunk(chunk_output, filename)
 
-        total_rows += rows_extracted
-        if max_ts is not None:
-            if global_max_ts is None or max_ts > global_max_ts:
-                global_max_ts = max_ts
-        last_state_id = next_state_id
+        for _ in range(upload_slots):
+            await chunk_queue.put(None)
 
-        # Upload
-        await sqlwh._upload_file(chunk_output_path, f"{dbx_job_path}/{filename}")
+    async def _upload_chunks() -> None:
+        while True:
+            item = await chunk_queue.get()
+            try:
+                if item is None:
+                    return
+                chunk_output, filename = item
+                if monitor is not None and monitor.overloaded:
+                    limiter.record_backoff()
+                started = time.monotonic()
+                await _upload_with_backoff(
+                    sqlwh, limiter, chunk_output, f"{dbx_job_path}/{filename}"
+                )
+                metrics.record_upload(started, time.monotonic())
+                await journal.mark_uploaded(filename)
 
-        # Cleanup local chunk immediately
+                # Cleanup local chunk immediately
+                if not request.keep_local_file:
+                    await _async_run_job(
+                        request.hass,
+                        _discard_chunk,
+                        chunk_output,
+                        executor=request.executor,
+                    )
+            finally:
+                chunk_queue.task_done()
+
+    try:
+        try:
+            if not in_memory:
+                await _async_run_job(
+                    request.hass, _makedirs, job_local_path, executor=request.executor
+                )
+            if run_ddl:
+                with metrics.stage("ddl"):
+                    await _ensure_target()
+            if stale_job_path:
+                try:
+                    await sqlwh.remove_volume_folder(stale_job_path)
+                except Exception as err:
+                    _LOGGER.warning(
+                        "Failed to remove abandoned job %s: %s", stale_job_path, err
+                    )
+            if not resume:
+                # The first backfill into an empty table has nothing to
+                # deduplicate against, so it is appended with COPY INTO
+                # instead of a MERGE.
+                with metrics.stage("ddl"):
+                    initial_load = (
+                        request.min_state_id <= 0
+                        and request.min_last_updated_ts is None
+                        and await sqlwh.is_table_empty()
+                    )
+                await journal.begin(
+                    job_id=job_id,
+                    dbx_job_path=dbx_job_path,
+                    initial_load=initial_load,
+                    **job_settings,
+                )
+            else:
+                # Chunk progress is saved lazily, so the interrupted run may
+                # have uploaded chunks it never journaled. Their state_id
+                # ranges are extracted again under new boundaries, so the old
+                # files must not reach the load.
+                journaled = {
+                    chunk["filename"] for chunk in journal.chunks if chunk["uploaded"]
+                }
+                for name in await sqlwh.list_volume_folder(dbx_job_path):
+                    if name not in journaled:
+                        await sqlwh.delete_volume_file(f"{dbx_job_path}/{name}")
+
+            if monitor is not None:
+                monitor.start()
+            tasks = [asyncio.create_task(_produce_chunks())] + [
+                asyncio.create_task(_upload_chunks()) for _ in range(upload_slots)
+            ]
+            try:
+                await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+                for task in tasks:
+                    if task.done() and task.exception() is not None:
+                        raise task.exception()
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                if monitor is not None:
+                    await monitor.stop()
+
+            last_state_id = journal.data["next_state_id"]
+            last_state_ts = await loop.run_in_executor(
+                request.executor, session.lookup_state_ts, last_state_id
+            )
+            # Includes chunks uploaded before an interruption
+            merge_bounds = journal.merge_bounds()
+        finally:
+            # Waits for an in-flight extraction before the connection closes
+            await loop.run_in_executor(request.executor, session.close)
+    except BaseException:
         if not request.keep_local_file:
-            await _async_run_job(request.hass, _remove_path, chunk_output_path)
+            await _async_run_job(
+                request.hass, _remove_tree, job_local_path, executor=request.executor
+            )
+        raise
+
+    initial_load = journal.data["initial_load"]
+    total_rows = sum(chunk["rows"] for chunk in journal.chunks)
+    global_max_ts = max(
+        (chunk["max_ts"] for chunk in journal.chunks if chunk["max_ts"] is not None),
+        default=None,
+    )
 
     if total_rows == 0:
-        await _async_run_job(request.hass, _remove_path, job_local_path)
+        await journal.clear()
+        await _async_run_job(
+            request.hass, _remove_path, job_local_path, executor=request.executor
+        )
         raise ValueError("No rows were extracted from Home Assistant database.")
 
-    # Finish: Merge all chunks dynamically mapped explicitly
-    upsert_state = await sqlwh.upsert_new_data(f"{dbx_job_path}/*.csv.gz")
+    # Finish: load all chunks of the job folder at once. A load submitted
+    # before an interruption is awaited rather than run a second time.
+    source_glob = f"{dbx_job_path}/*{encoder.extension}"
+    upsert_state = None
+    with metrics.stage("merge"):
+        if journal.statement_id:
+            try:
+                upsert_state = await sqlwh.wait_for_statement(journal.statement_id)
+            except Exception as err:
+                _LOGGER.info(
+                    "Load of sync job %s did not complete (%s); submitting it again",
+                    job_id,
+                    err,
+                )
+        if upsert_state is None:
+            try:
+                if initial_load:
+                    upsert_state = await sqlwh.copy_into_table(
+                        dbx_job_path,
+                        f"*{encoder.extension}",
+                        source_format=encoder.read_format,
+                        on_submit=journal.record_statement,
+                    )
+                else:
+                    upsert_state = await sqlwh.upsert_new_data(
+                        source_glob,
+                        source_format=encoder.read_format,
+                        bounds=merge_bounds,
+                        on_submit=journal.record_statement,
+                    )
+            except Exception as err:
+                if run_ddl or initial_load or not _is_missing_target_error(err):
+                    raise
+                # The target was dropped since DDL was cached: recreate it and retry once
+                _LOGGER.warning(
+                    "Target table %s.%s.%s is missing; re-running DDL",
+                    request.catalog,
+                    request.schema,
+                    request.table,
+                )
+                await _ensure_target()
+                upsert_state = await sqlwh.upsert_new_data(
+                    source_glob,
+                    source_format=encoder.read_format,
+                    bounds=merge_bounds,
+                    on_submit=journal.record_statement,
+                )
 
-    # Cleanup Databricks Volume explicit ingest folder
-    try:
-        await sqlwh.delete_volume_folder(dbx_job_path)
-    except Exception:
-        pass
+    with metrics.stage("cleanup"):
+        await journal.clear()
 
-    # Cleanup local Job Dir
-    await _async_run_job(request.hass, _remove_path, job_local_path)
+        # Cleanup Databricks Volume explicit ingest folder. The rows are
+        # loaded already, so a failure here does not fail the sync.
+        try:
+            await sqlwh.remove_volume_folder(dbx_job_path)
+        except Exception as err:
+            _LOGGER.warning("Failed to remove ingest folder %s: %s", dbx_job_path, err)
+
+        # Cleanup local Job Dir
+        await _async_run_job(
+            request.hass, _remove_path, job_local_path, executor=request.executor
+        )
 
     return {
+        "status": "success",
         "filename": job_id,
         "rows": total_rows,
         "used_hot_copy": False,
         "max_last_updated_ts": global_max_ts,
+        "last_state_id": last_state_id,
+        "last_state_ts": last_state_ts,
         "upload_state": {"status": "SUCCESS"},
         "upsert_state": upsert_state,
+        "load_mode": "copy_into" if initial_load else "merge",
+        "ddl_fingerprint": ddl_fingerprint,
+        "resumed": resume,
+        "metrics": metrics.as_dict(),
+    }
+
+
+async def run_table_layout_migration(request: SyncRequest) -> dict:
+    """Rewrite the request's target table into ``request.table_layout``."""
+    runtime_config = RuntimeSyncConfig(
+        catalog=request.catalog,
+        schema=request.schema,
+        table=request.table,
+        local_path=request.local_path,
+        dbx_path=request.dbx_volumes_path,
+    )
+    sqlwh = DatabricksTarget(
+        runtime_config,
+        server_hostname=request.server_hostname,
+        http_path=request.http_path,
+        access_token=request.access_token,
+        session=request.session,
+        hass=request.hass,
+        statement_timeout=max(
+            request.statement_timeout, _LAYOUT_MIGRATION_STATEMENT_TIMEOUT
+        ),
+        executor=request.executor,
+    )
+    await sqlwh.migrate_table_layout(request.table_layout)
+    return {
+        "table_layout": request.table_layout,
+        "ddl_fingerprint": target_ddl_fingerprint(
+            request.catalog, request.schema, request.table, request.table_layout
+        ),
     }
@@ -8,17 +8,21 @@ from typing import Any
 from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorEntity,
+    SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import EntityCategory
+from homeassistant.const import EntityCategory, UnitOfDataRate, UnitOfTime
 from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from .const import (
     EVENT_SYNC_RESULT,
     PARALLEL_UPDATES,
+    SIGNAL_SYNC_STATE,
     SYNC_META_LAST_ERROR,
     SYNC_META_LAST_FILENAME,
+    SYNC_META_LAST_METRICS,
     SYNC_META_LAST_ROWS,
     SYNC_META_LAST_RUN_TS,
     SYNC_META_LAST_SINCE_TS,
@@ -26,6 +30,7 @@ from .const import (
     SYNC_META_LAST_SUCCESS_TS,
     SYNC_META_LAST_TARGET,
     SYNC_META_LAST_TRIGGER,
+    SYNC_STATE_IDLE,
 )
 
 
@@ -50,6 +55,11 @@ async def async_setup_entry(
             HassDatabricksLastRunSensor(hass, entry),
             HassDatabricksLastRowsSensor(hass, entry),
             HassDatabricksLastSuccessSensor(hass, entry),
+            HassDatabricksSyncStateSensor(hass, entry),
+            HassDatabricksLastDurationSensor(hass, entry),
+            HassDatabricksRowsPerSecondSensor(hass, entry),
+            HassDatabricksUploadThroughputSensor(hass, entry),
+            HassDatabricksCompressionRatioSensor(hass, entry),
         ]
     )
 
@@ -161,3 +171,120 @@ class HassDatabricksLastSuccessSensor(HassDatabricksBaseSensor):
         self._attr_native_value = datetime.fromtimestamp(
             float(last_success_ts), tz=timezone.utc
         )
+
+
+class HassDatabricksSyncStateSensor(HassDatabricksBaseSensor):
+    """Expose whether a sync is running, queued or idle."""
+
+    _attr_icon = "mdi:sync"
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+        super().__init__(hass, entry)
+        self._attr_unique_id = f"{entry.entry_id}_sync_state"
+        self._attr_name = "Sync State"
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+        coordinator = getattr(entry.runtime_data, "sync_coordinator", None)
+        self._attr_native_value = (
+            coordinator.state if coordinator is not None else SYNC_STATE_IDLE
+        )
+        self._attr_extra_state_attributes = {
+            "queued_runs": coordinator.queued_runs if coordinator is not None else 0
+        }
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to coordinator state changes."""
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_SYNC_STATE.format(self._entry.entry_id),
+                self._handle_state_change,
+            )
+        )
+
+    @callback
+    def _handle_state_change(self, state: str, queued_runs: int) -> None:
+        """Update from the sync coordinator."""
+        self._attr_native_value = state
+        self._attr_extra_state_attributes = {"queued_runs": queued_runs}
+        self.async_write_ha_state()
+
+
+class HassDatabricksLastMetricSensor(HassDatabricksBaseSensor):
+    """Base class exposing one value of the last sync's metrics."""
+
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _metric: str
+    _key: str
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+        super().__init__(hass, entry)
+        self._attr_unique_id = f"{entry.entry_id}_{self._key}"
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+        self._attr_native_value = None
+        self._refresh_from_meta()
+
+    @property
+    def metrics(self) -> dict[str, Any]:
+        """Return the metrics of the last successful sync, if any."""
+        return self.sync_meta.get(SYNC_META_LAST_METRICS) or {}
+
+    def _refresh_from_meta(self) -> None:
+        """Load the metric from persisted sync metadata."""
+        self._attr_native_value = self.metrics.get(self._metric)
+
+
+class HassDatabricksLastDurationSensor(HassDatabricksLastMetricSensor):
+    """Expose the duration of the last sync, with per-stage timings."""
+
+    _attr_icon = "mdi:timer-outline"
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.SECONDS
+    _attr_name = "Last Duration"
+    _metric = "duration_seconds"
+    _key = "last_duration"
+
+    def _refresh_from_meta(self) -> None:
+        """Load the duration and stage timings from persisted sync metadata."""
+        super()._refresh_from_meta()
+        self._attr_extra_state_attributes = {
+            f"{stage}_seconds": seconds
+            for stage, seconds in (self.metrics.get("stage_seconds") or {}).items()
+        }
+
+
+class HassDatabricksRowsPerSecondSensor(HassDatabricksLastMetricSensor):
+    """Expose the rows extracted per second of the last sync."""
+
+    _attr_icon = "mdi:speedometer"
+    _attr_native_unit_of_measurement = "rows/s"
+    _attr_name = "Rows Per Second"
+    _metric = "rows_per_second"
+    _key = "rows_per_second"
+
+
+class HassDatabricksUploadThroughputSensor(HassDatabricksLastMetricSensor):
+    """Expose the Files API upload throughput of the last sync."""
+
+    _attr_icon = "mdi:cloud-upload-outline"
+    _attr_device_class = SensorDeviceClass.DATA_RATE
+    _attr_native_unit_of_measurement = UnitOfDataRate.MEGABYTES_PER_SECOND
+    _attr_name = "Upload Throughput"
+    _metric = "upload_mb_per_second"
+    _key = "upload_throughput"
+
+
+class HassDatabricksCompressionRatioSensor(HassDatabricksLastMetricSensor):
+    """Expose the raw to compressed byte ratio of the last sync's chunks."""
+
+    _attr_icon = "mdi:zip-box-outline"
+    _attr_name = "Compression Ratio"
+    _metric = "compression_ratio"
+    _key = "compression_ratio"
+
+    def _refresh_from_meta(self) -> None:
+        """Load the ratio and byte counts from persisted sync metadata."""
+        super()._refresh_from_meta()
+        self._attr_extra_state_attributes = {
+            "raw_bytes": self.metrics.get("raw_bytes"),
+            "compressed_bytes": self.metrics.get("compressed_bytes"),
+        }
@@ -0,0 +1,169 @@
+"""Benchmark a full sync run against the local Databricks stand-in.
+
+Builds (or reads) a recorder database, starts
+:class:`~tests.benchmarks.mock_databricks.MockDatabricksServer` with the
+chosen network profile and runs ``run_sync_pipeline`` end to end: extraction,
+encoding, uploads with retries, DDL, the load statement and cleanup. The
+run's own metrics (stage timings, throughput, compression) and the
+stand-in's request counters are printed and written as JSON.
+
+Run with ``python -m tests.benchmarks.end_to_end --rows 1000000
+--upload-mbps 20 --latency 0.05 --throttle-rate 0.05``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from dataclasses import asdict
+from datetime import datetime, timezone
+import json
+import os
+import tempfile
+from unittest import mock
+
+import aiohttp
+
+from custom_components.hass_databricks import pipeline
+
+from .extraction import _git_commit
+from .mock_databricks import MockDatabricksServer, NetworkProfile
+from .recorder_db import RecorderDbSpec, build_recorder_db
+
+
+def _local_target_class(base_url: str) -> type[pipeline.DatabricksTarget]:
+    """Return a ``DatabricksTarget`` that sends its REST calls to ``base_url``."""
+
+    class LocalDatabricksTarget(pipeline.DatabricksTarget):
+        def _api_url(self, path: str) -> str:
+            return f"{base_url}{path}"
+
+    return LocalDatabricksTarget
+
+
+async def run_benchmark(
+    db_path: str,
+    workdir: str,
+    profile: NetworkProfile,
+    table_rows: int = 0,
+    **request_options,
+) -> dict:
+    """Run one sync against a fresh stand-in and return its measurements."""
+    async with (
+        MockDatabricksServer(
+            os.path.join(workdir, "volumes"), profile=profile, table_rows=table_rows
+        ) as server,
+        aiohttp.ClientSession() as session,
+    ):
+        request = pipeline.SyncRequest(
+            db_path=db_path,
+            server_hostname=server.url.removeprefix("http://"),
+            http_path="/sql/1.0/warehouses/benchmark",
+            access_token=server.access_token,
+            catalog="main",
+            schema="home_assistant",
+            table="states",
+            local_path=os.path.join(workdir, "staging"),
+            dbx_volumes_path="/Volumes/main/home_assistant/ingest",
+            entity_like=request_options.pop("entity_like", "%"),
+            chunk_size=request_options.pop("chunk_size", 50_000),
+            keep_local_file=False,
+            session=session,
+            **request_options,
+        )
+        with mock.patch.object(
+            pipeline, "DatabricksTarget", _local_target_class(server.url)
+        ):
+            result = await pipeline.run_sync_pipeline(request)
+    return {
+        "status": result["status"],
+        "rows": result["rows"],
+        "load_mode": result.get("load_mode"),
+        "metrics": result.get("metrics"),
+        "server": {
+            **asdict(server.stats),
+            "statements": len(server.statements),
+        },
+    }
+
+
+def main() -> None:
+    """Run the benchmark from command line options."""
+    defaults = RecorderDbSpec()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="existing recorder database to read")
+    parser.add_argument("--rows", type=int, default=defaults.rows)
+    parser.add_argument("--entities", type=int, default=defaults.entities)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument(
+        "--chunk-format",
+        default=pipeline.DEFAULT_CHUNK_FORMAT,
+        choices=["csv", "parquet"],
+    )
+    parser.add_argument("--chunk-codec", default=pipeline.DEFAULT_CHUNK_CODEC)
+    parser.add_argument(
+        "--max-concurrent-uploads",
+        type=int,
+        default=pipeline.DEFAULT_MAX_CONCURRENT_UPLOADS,
+    )
+    parser.add_argument("--in-memory-staging", action="store_true")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument(
+        "--upload-mbps", type=float, help="shared upload bandwidth in MB/s"
+    )
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--cold-start", type=float, default=0.0)
+    parser.add_argument("--statement-seconds", type=float, default=0.0)
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="report a non-empty target, so the load is a MERGE",
+    )
+    parser.add_argument("--output", default="benchmark_end_to_end.json")
+    args = parser.parse_args()
+
+    profile = NetworkProfile(
+        latency=args.latency,
+        upload_bandwidth=args.upload_mbps * 1_000_000 if args.upload_mbps else None,
+        throttle_rate=args.throttle_rate,
+        cold_start=args.cold_start,
+        statement_seconds=args.statement_seconds,
+    )
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.db:
+            db_path = args.db
+            database = {"path": db_path, "file_bytes": os.path.getsize(db_path)}
+        else:
+            db_path = os.path.join(workdir, "home-assistant_v2.db")
+            database = build_recorder_db(
+                db_path, RecorderDbSpec(rows=args.rows, entities=args.entities)
+            )
+            del database["path"]
+        result = asyncio.run(
+            run_benchmark(
+                db_path,
+                workdir,
+                profile,
+                table_rows=1 if args.incremental else 0,
+                chunk_size=args.chunk_size,
+                chunk_format=args.chunk_format,
+                chunk_codec=args.chunk_codec,
+                max_concurrent_uploads=args.max_concurrent_uploads,
+                in_memory_staging=args.in_memory_staging,
+            )
+        )
+
+    results = {
+        "commit": _git_commit(),
+        "created": datetime.now(timezone.utc).isoformat(),
+        "database": database,
+        "profile": asdict(profile),
+        **result,
+    }
+    print(json.dumps(results, indent=2))
+    with open(args.output, "w", encoding="utf-8") as output:
+        json.dump(results, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""Benchmark chunk extraction and every chunk encoder against a recorder DB.
+
+Each case extracts the whole generated database chunk by chunk through
+``ExtractionSession.extract_chunk``, exactly as a sync run does, and reports:
+
+* rows/s over the whole case, split into query and encode time;
+* peak RSS of the process running the case (each case runs in a fresh
+  process, so native allocations of sqlite, zlib and pyarrow count too);
+* raw and encoded bytes per row.
+
+The ``extract`` case uses an encoder that drops the rows, isolating the
+recorder query from encoding. Results are written as JSON; pass an earlier
+result file as ``--baseline`` to print the change per case.
+
+Run with ``python -m tests.benchmarks.extraction --rows 1000000``.
+"""
+
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import contextlib
+from datetime import datetime, timezone
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Iterable, Iterator
+
+from custom_components.hass_databricks import pipeline
+
+from .recorder_db import RecorderDbSpec, build_recorder_db
+
+
+class NullChunkEncoder:
+    """Consume rows without encoding them."""
+
+    read_format = "none"
+    extension = ".null"
+
+    @contextlib.contextmanager
+    def open(self, output) -> Iterator:
+        """Yield a writer that drains the row iterator."""
+
+        def _write_rows(rows: Iterable) -> None:
+            for _row in rows:
+                pass
+
+        yield _write_rows
+
+
+def available_cases() -> dict[str, tuple[str | None, str | None]]:
+    """Return ``{case: (chunk format, codec)}`` for this interpreter."""
+    cases = {"extract": (None, None)}
+    codecs = [pipeline.CHUNK_CODEC_GZIP]
+    if pipeline._zstd is not None:
+        codecs.append(pipeline.CHUNK_CODEC_ZSTD)
+    formats = [pipeline.CHUNK_FORMAT_CSV]
+    if pipeline._pq is not None:
+        formats.append(pipeline.CHUNK_FORMAT_PARQUET)
+    for chunk_format in formats:
+        for codec in codecs:
+            cases[f"{chunk_format}_{codec}"] = (chunk_format, codec)
+    return cases
+
+
+def _peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_case(
+    db_path: str,
+    chunk_format: str | None,
+    codec: str | None,
+    chunk_size: int,
+    entity_like: str,
+) -> dict:
+    """Extract the whole database with one encoder and measure it."""
+    if chunk_format is None:
+        encoder = NullChunkEncoder()
+    else:
+        encoder = pipeline.build_chunk_encoder(
+            chunk_format, pipeline.ChunkCodec.from_options(codec)
+        )
+    rss_before = _peak_rss_bytes()
+    chunks = 0
+    with tempfile.TemporaryDirectory() as staging:
+        # The null encoder writes nothing; an empty buffer reports 0 bytes
+        output = (
+            io.BytesIO()
+            if chunk_format is None
+            else os.path.join(staging, f"chunk{encoder.extension}")
+        )
+        started = time.perf_counter()
+        with pipeline.ExtractionSession(db_path, encoder=encoder) as session:
+            session.resolve_entity_ids(entity_like)
+            last_state_id = 0
+            while True:
+                rows, _max_ts, last_state_id = session.extract_chunk(
+                    output, chunk_size, None, last_state_id
+                )
+                if not rows:
+                    break
+                chunks += 1
+        seconds = time.perf_counter() - started
+    stats = session.stats
+    rows = stats.rows or 1
+    return {
+        "rows": stats.rows,
+        "chunks": chunks,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(stats.rows / seconds, 1) if seconds else None,
+        "query_seconds": round(stats.query_seconds, 3),
+        "encode_seconds": round(stats.encode_seconds, 3),
+        "peak_rss_mb": round(_peak_rss_bytes() / 1_048_576, 1),
+        "peak_rss_growth_mb": round((_peak_rss_bytes() - rss_before) / 1_048_576, 1),
+        "raw_bytes_per_row": round(stats.raw_bytes / rows, 1),
+        "encoded_bytes_per_row": (
+            round(stats.encoded_bytes / rows, 2) if stats.encoded_bytes else None
+        ),
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _compare(results: dict, baseline: dict) -> None:
+    """Print the relative change of each case against ``baseline``."""
+    print(f"\nchange vs {baseline.get('commit') or 'baseline'}:")
+    print(f"{'case':<16}{'rows/s':>10}{'peak RSS':>10}{'bytes/row':>11}")
+    for name, case in results["cases"].items():
+        old = baseline.get("cases", {}).get(name)
+        if old is None:
+            continue
+        changes = []
+        for key in ("rows_per_second", "peak_rss_mb", "encoded_bytes_per_row"):
+            if case.get(key) and old.get(key):
+                changes.append(f"{(case[key] / old[key] - 1) * 100:+.1f}%")
+            else:
+                changes.append("-")
+        print(f"{name:<16}{changes[0]:>10}{changes[1]:>10}{changes[2]:>11}")
+
+
+def main() -> None:
+    """Run the selected cases and write the results as JSON."""
+    defaults = RecorderDbSpec()
+    cases = available_cases()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="existing recorder database to read")
+    parser.add_argument("--rows", type=int, default=defaults.rows)
+    parser.add_argument("--entities", type=int, default=defaults.entities)
+    parser.add_argument(
+        "--state-cardinality", type=int, default=defaults.state_cardinality
+    )
+    parser.add_argument(
+        "--numeric-fraction", type=float, default=defaults.numeric_fraction
+    )
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--entity-like", default="%")
+    parser.add_argument("--case", action="append", choices=sorted(cases))
+    parser.add_argument("--output", default="benchmark_extraction.json")
+    parser.add_argument("--baseline", help="earlier result file to compare with")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.db:
+            db_path = args.db
+            database = {"path": db_path, "file_bytes": os.path.getsize(db_path)}
+        else:
+            db_path = os.path.join(workdir, "home-assistant_v2.db")
+            database = build_recorder_db(
+                db_path,
+                RecorderDbSpec(
+                    rows=args.rows,
+                    entities=args.entities,
+                    state_cardinality=args.state_cardinality,
+                    numeric_fraction=args.numeric_fraction,
+                ),
+            )
+            del database["path"]
+
+        results = {
+            "commit": _git_commit(),
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "chunk_size": args.chunk_size,
+            "database": database,
+            "cases": {},
+        }
+        print(f"{'case':<16}{'rows/s':>12}{'query s':>9}{'encode s':>10}", end="")
+        print(f"{'peak RSS MB':>13}{'bytes/row':>11}")
+        context = multiprocessing.get_context("spawn")
+        for name in args.case or cases:
+            chunk_format, codec = cases[name]
+            # A fresh process per case keeps peak RSS attributable to it
+            with ProcessPoolExecutor(1, mp_context=context) as executor:
+                case = executor.submit(
+                    run_case,
+                    db_path,
+                    chunk_format,
+                    codec,
+                    args.chunk_size,
+                    args.entity_like,
+                ).result()
+            results["cases"][name] = case
+            print(
+                f"{name:<16}{case['rows_per_second']:>12,.0f}"
+                f"{case['query_seconds']:>9.2f}{case['encode_seconds']:>10.2f}"
+                f"{case['peak_rss_mb']:>13.1f}"
+                f"{case['encoded_bytes_per_row'] or 0:>11.2f}"
+            )
+
+    with open(args.output, "w", encoding="utf-8") as output:
+        json.dump(results, output, indent=2)
+    print(f"\nresults written to {args.output}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline:
+            _compare(results, json.load(baseline))
+
+
+if __name__ == "__main__":
+    main()
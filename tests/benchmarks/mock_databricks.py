@@ -0,0 +1,280 @@
+"""Local stand-in for the Databricks REST endpoints the sync pipeline uses.
+
+Implements, on top of aiohttp:
+
+* ``PUT /api/2.0/fs/files{path}``: stores the body under ``root``;
+* ``DELETE /api/2.0/fs/files{path}``: removes a file;
+* ``GET /api/2.0/fs/directories{path}``: lists a directory in one page;
+* ``DELETE /api/2.0/fs/directories{path}``: removes an empty directory and
+  answers 409 otherwise, like the Files API;
+* ``POST /api/2.0/sql/statements`` plus ``GET .../{id}`` and
+  ``POST .../{id}/cancel``: statements go PENDING -> RUNNING -> SUCCEEDED
+  over time. SQL is not executed; statements are recorded and
+  ``SELECT ... LIMIT 1`` reports ``table_rows``.
+
+A :class:`NetworkProfile` adds request latency, a shared upload bandwidth
+cap, randomly throttled (429) uploads, a warehouse cold start and statement
+run time. The pipeline only talks https, so benchmarks route its requests
+to :attr:`url` through a ``DatabricksTarget`` subclass (see
+``tests.benchmarks.end_to_end``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+import os
+import random
+import shutil
+import time
+import uuid
+
+from aiohttp import web
+
+_FILES_PREFIX = "/api/2.0/fs/files"
+_DIRECTORIES_PREFIX = "/api/2.0/fs/directories"
+_STATEMENTS = "/api/2.0/sql/statements"
+_READ_BLOCK = 64 * 1024
+
+
+@dataclass
+class NetworkProfile:
+    """Network and warehouse conditions of the stand-in."""
+
+    # Seconds added to every request
+    latency: float = 0.0
+    # Upload bytes per second shared by all concurrent uploads (None: no cap)
+    upload_bandwidth: float | None = None
+    # Fraction of file uploads answered with 429 Too Many Requests
+    throttle_rate: float = 0.0
+    # Seconds the warehouse needs to start before running the first statement
+    cold_start: float = 0.0
+    # Seconds each statement stays RUNNING
+    statement_seconds: float = 0.0
+    seed: int = 0
+
+
+@dataclass
+class _Statement:
+    statement_id: str
+    statement: str
+    submitted: float
+    starts: float
+    finishes: float
+    canceled: bool = False
+
+
+@dataclass
+class ServerStats:
+    """Request counters of the stand-in."""
+
+    requests: dict[str, int] = field(default_factory=dict)
+    throttled: int = 0
+    uploaded_bytes: int = 0
+    max_concurrent_uploads: int = 0
+
+
+class MockDatabricksServer:
+    """Serve the Files and Statement Execution APIs from a local directory."""
+
+    def __init__(
+        self,
+        root: str,
+        *,
+        access_token: str = "token",
+        profile: NetworkProfile | None = None,
+        table_rows: int = 0,
+    ) -> None:
+        self.root = root
+        self.access_token = access_token
+        self.profile = profile or NetworkProfile()
+        self.table_rows = table_rows
+        self.statements: list[_Statement] = []
+        self.stats = ServerStats()
+        self._statements: dict[str, _Statement] = {}
+        self._rng = random.Random(self.profile.seed)
+        self._warehouse_ready: float | None = None
+        self._link_free_at = 0.0
+        self._uploads = 0
+        self._runner: web.AppRunner | None = None
+        self.url = ""
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving and return the base url."""
+        app = web.Application(client_max_size=1024**3)
+        app.router.add_put(_FILES_PREFIX + "/{path:.*}", self._put_file)
+        app.router.add_delete(_FILES_PREFIX + "/{path:.*}", self._delete_file)
+        app.router.add_get(_DIRECTORIES_PREFIX + "/{path:.*}", self._list_directory)
+        app.router.add_delete(
+            _DIRECTORIES_PREFIX + "/{path:.*}", self._delete_directory
+        )
+        app.router.add_post(_STATEMENTS, self._submit_statement)
+        app.router.add_get(_STATEMENTS + "/{statement_id}", self._get_statement)
+        app.router.add_post(
+            _STATEMENTS + "/{statement_id}/cancel", self._cancel_statement
+        )
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        self.url = f"http://{host}:{self._runner.addresses[0][1]}"
+        return self.url
+
+    async def close(self) -> None:
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> MockDatabricksServer:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *_exc_info) -> None:
+        await self.close()
+
+    def local_path(self, path: str) -> str:
+        """Return where a workspace path is stored on disk."""
+        return os.path.join(self.root, path.lstrip("/"))
+
+    async def _admit(
+        self, request: web.Request, kind: str, throttle: bool = False
+    ) -> web.Response | None:
+        """Apply latency, auth and throttling; return a response to stop early."""
+        self.stats.requests[kind] = self.stats.requests.get(kind, 0) + 1
+        if self.profile.latency:
+            await asyncio.sleep(self.profile.latency)
+        if request.headers.get("Authorization") != f"Bearer {self.access_token}":
+            return web.json_response({"error_code": "UNAUTHENTICATED"}, status=401)
+        if throttle and self._rng.random() < self.profile.throttle_rate:
+            self.stats.throttled += 1
+            # Drain the body so the client sees the 429, not a broken pipe
+            await request.read()
+            return web.json_response(
+                {"error_code": "REQUEST_LIMIT_EXCEEDED"},
+                status=429,
+                headers={"Retry-After": "1"},
+            )
+        return None
+
+    async def _throttle_upload(self, size: int) -> None:
+        """Wait until the shared link has carried ``size`` more bytes."""
+        if not self.profile.upload_bandwidth:
+            return
+        now = time.monotonic()
+        self._link_free_at = max(self._link_free_at, now) + (
+            size / self.profile.upload_bandwidth
+        )
+        await asyncio.sleep(self._link_free_at - now)
+
+    async def _put_file(self, request: web.Request) -> web.Response:
+        if (response := await self._admit(request, "put_file", True)) is not None:
+            return response
+        target = self.local_path(request.match_info["path"])
+        if os.path.exists(target) and request.query.get("overwrite") != "true":
+            await request.read()
+            return web.json_response({"error_code": "ALREADY_EXISTS"}, status=409)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        self._uploads += 1
+        self.stats.max_concurrent_uploads = max(
+            self.stats.max_concurrent_uploads, self._uploads
+        )
+        try:
+            with open(target, "wb") as output:
+                async for block in request.content.iter_chunked(_READ_BLOCK):
+                    await self._throttle_upload(len(block))
+                    output.write(block)
+                    self.stats.uploaded_bytes += len(block)
+        finally:
+            self._uploads -= 1
+        return web.Response(status=204)
+
+    async def _delete_file(self, request: web.Request) -> web.Response:
+        if (response := await self._admit(request, "delete_file")) is not None:
+            return response
+        target = self.local_path(request.match_info["path"])
+        if not os.path.isfile(target):
+            return web.json_response({"error_code": "NOT_FOUND"}, status=404)
+        os.remove(target)
+        return web.Response(status=204)
+
+    async def _list_directory(self, request: web.Request) -> web.Response:
+        if (response := await self._admit(request, "list_directory")) is not None:
+            return response
+        target = self.local_path(request.match_info["path"])
+        if not os.path.isdir(target):
+            return web.json_response({"error_code": "NOT_FOUND"}, status=404)
+        contents = [
+            {
+                "path": "/" + request.match_info["path"].strip("/") + "/" + name,
+                "name": name,
+                "is_directory": os.path.isdir(os.path.join(target, name)),
+            }
+            for name in sorted(os.listdir(target))
+        ]
+        return web.json_response({"contents": contents})
+
+    async def _delete_directory(self, request: web.Request) -> web.Response:
+        if (response := await self._admit(request, "delete_directory")) is not None:
+            return response
+        target = self.local_path(request.match_info["path"])
+        if not os.path.isdir(target):
+            return web.json_response({"error_code": "NOT_FOUND"}, status=404)
+        if os.listdir(target):
+            return web.json_response({"error_code": "DIRECTORY_NOT_EMPTY"}, status=409)
+        shutil.rmtree(target)
+        return web.json_response({})
+
+    def _statement_status(self, statement: _Statement) -> dict:
+        now = time.monotonic()
+        if statement.canceled:
+            state = "CANCELED"
+        elif now < statement.starts:
+            state = "PENDING"
+        elif now < statement.finishes:
+            state = "RUNNING"
+        else:
+            state = "SUCCEEDED"
+        body = {"statement_id": statement.statement_id, "status": {"state": state}}
+        if state == "SUCCEEDED" and statement.statement.lstrip().upper().startswith(
+            "SELECT"
+        ):
+            body["result"] = {"data_array": [["1"]] if self.table_rows else []}
+        return body
+
+    async def _submit_statement(self, request: web.Request) -> web.Response:
+        if (response := await self._admit(request, "submit_statement")) is not None:
+            return response
+        payload = await request.json()
+        now = time.monotonic()
+        if self._warehouse_ready is None:
+            self._warehouse_ready = now + self.profile.cold_start
+        starts = max(now, self._warehouse_ready)
+        statement = _Statement(
+            statement_id=str(uuid.uuid4()),
+            statement=payload["statement"],
+            submitted=now,
+            starts=starts,
+            finishes=starts + self.profile.statement_seconds,
+        )
+        self.statements.append(statement)
+        self._statements[statement.statement_id] = statement
+        return web.json_response(self._statement_status(statement))
+
+    async def _get_statement(self, request: web.Request) -> web.Response:
+        if (response := await self._admit(request, "get_statement")) is not None:
+            return response
+        statement = self._statements.get(request.match_info["statement_id"])
+        if statement is None:
+            return web.json_response({"error_code": "NOT_FOUND"}, status=404)
+        return web.json_response(self._statement_status(statement))
+
+    async def _cancel_statement(self, request: web.Request) -> web.Response:
+        if (response := await self._admit(request, "cancel_statement")) is not None:
+            return response
+        statement = self._statements.get(request.match_info["statement_id"])
+        if statement is None:
+            return web.json_response({"error_code": "NOT_FOUND"}, status=404)
+        if time.monotonic() < statement.finishes:
+            statement.canceled = True
+        return web.json_response({})
@@ -0,0 +1,286 @@
+"""Generate synthetic Home Assistant recorder databases for benchmarks.
+
+The files use the recorder's own ``states``, ``states_meta`` and
+``state_attributes`` tables and indexes (schema 48), so extraction runs the
+same query plans it runs against a real ``home-assistant_v2.db``. Rows are
+written in state_id order with increasing ``last_updated_ts``, the way the
+recorder commits them, and each state links to the previous state of its
+entity through ``old_state_id``.
+
+Entities are split into numeric sensors and non-numeric entities (binary
+sensors, switches, text sensors) by ``numeric_fraction``.
+``state_cardinality`` bounds the distinct states of each entity.
+
+Run with ``python -m tests.benchmarks.recorder_db OUTPUT.db --rows 1000000``.
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import asdict, dataclass
+import json
+import os
+import random
+import sqlite3
+import time
+from typing import Iterator
+
+# Taken from homeassistant.components.recorder.db_schema (schema version 48)
+RECORDER_SCHEMA = (
+    """CREATE TABLE states_meta (
+        metadata_id INTEGER NOT NULL PRIMARY KEY,
+        entity_id VARCHAR(255)
+    )""",
+    """CREATE TABLE state_attributes (
+        attributes_id INTEGER NOT NULL PRIMARY KEY,
+        hash BIGINT,
+        shared_attrs TEXT
+    )""",
+    """CREATE TABLE states (
+        state_id INTEGER NOT NULL PRIMARY KEY,
+        entity_id CHAR(0),
+        state VARCHAR(255),
+        attributes CHAR(0),
+        event_id SMALLINT,
+        last_changed CHAR(0),
+        last_changed_ts FLOAT,
+        last_reported_ts FLOAT,
+        last_updated CHAR(0),
+        last_updated_ts FLOAT,
+        old_state_id INTEGER,
+        attributes_id INTEGER,
+        context_id CHAR(0),
+        context_user_id CHAR(0),
+        context_parent_id CHAR(0),
+        origin_idx SMALLINT,
+        context_id_bin BLOB,
+        context_user_id_bin BLOB,
+        context_parent_id_bin BLOB,
+        metadata_id INTEGER,
+        FOREIGN KEY(old_state_id) REFERENCES states (state_id),
+        FOREIGN KEY(attributes_id) REFERENCES state_attributes (attributes_id),
+        FOREIGN KEY(metadata_id) REFERENCES states_meta (metadata_id)
+    )""",
+)
+# Created after the bulk insert, which is much faster than maintaining them
+RECORDER_INDEXES = (
+    "CREATE UNIQUE INDEX ix_states_meta_entity_id ON states_meta (entity_id)",
+    "CREATE INDEX ix_state_attributes_hash ON state_attributes (hash)",
+    "CREATE INDEX ix_states_metadata_id_last_updated_ts"
+    " ON states (metadata_id, last_updated_ts)",
+    "CREATE INDEX ix_states_last_updated_ts ON states (last_updated_ts)",
+    "CREATE INDEX ix_states_old_state_id ON states (old_state_id)",
+    "CREATE INDEX ix_states_attributes_id ON states (attributes_id)",
+    "CREATE INDEX ix_states_context_id_bin ON states (context_id_bin)",
+)
+
+_NUMERIC_DEVICE_CLASSES = (
+    ("temperature", "°C"),
+    ("humidity", "%"),
+    ("power", "W"),
+    ("energy", "kWh"),
+    ("illuminance", "lx"),
+)
+_NON_NUMERIC_DOMAINS = (
+    ("binary_sensor", ("on", "off")),
+    ("switch", ("on", "off")),
+    ("sensor", ("idle", "heating", "cooling", "fan", "dry", "auto")),
+)
+# Every entity is occasionally unavailable, like real integrations on restart
+_UNAVAILABLE_FRACTION = 0.002
+_INSERT_BATCH_ROWS = 10_000
+
+
+@dataclass
+class RecorderDbSpec:
+    """Shape of a generated recorder database."""
+
+    rows: int = 100_000
+    entities: int = 200
+    state_cardinality: int = 50
+    numeric_fraction: float = 0.8
+    days: float = 30.0
+    end_ts: float = 1_700_000_000.0
+    seed: int = 1
+
+
+@dataclass
+class _Entity:
+    metadata_id: int
+    entity_id: str
+    attributes_id: int
+    states: tuple[str, ...]
+    last_state_id: int | None = None
+    last_state: str | None = None
+    last_changed_ts: float | None = None
+
+
+def _numeric_states(rng: random.Random, cardinality: int) -> tuple[str, ...]:
+    """Return ``cardinality`` distinct numeric states around a random level."""
+    level = rng.uniform(0, 1000)
+    step = round(rng.choice((0.1, 0.5, 1.0, 10.0)), 1)
+    return tuple(
+        f"{level + (index - cardinality // 2) * step:.1f}"
+        for index in range(cardinality)
+    )
+
+
+def _build_entities(
+    spec: RecorderDbSpec, rng: random.Random
+) -> tuple[list[_Entity], list[tuple[int, int, str]]]:
+    """Return the entities and their state_attributes rows."""
+    numeric_count = round(spec.entities * spec.numeric_fraction)
+    cardinality = max(1, spec.state_cardinality)
+    entities = []
+    attributes = []
+    for index in range(spec.entities):
+        metadata_id = index + 1
+        if index < numeric_count:
+            device_class, unit = _NUMERIC_DEVICE_CLASSES[
+                index % len(_NUMERIC_DEVICE_CLASSES)
+            ]
+            entity_id = f"sensor.{device_class}_{index:05d}"
+            states = _numeric_states(rng, cardinality)
+            shared_attrs = {
+                "state_class": "measurement",
+                "unit_of_measurement": unit,
+                "device_class": device_class,
+                "friendly_name": f"{device_class.title()} {index}",
+            }
+        else:
+            domain, vocabulary = _NON_NUMERIC_DOMAINS[index % len(_NON_NUMERIC_DOMAINS)]
+            entity_id = f"{domain}.entity_{index:05d}"
+            states = vocabulary[:cardinality]
+            if cardinality > len(vocabulary):
+                states += tuple(
+                    f"mode_{value}" for value in range(cardinality - len(vocabulary))
+                )
+            shared_attrs = {"friendly_name": f"Entity {index}"}
+        encoded = json.dumps(shared_attrs, separators=(",", ":"))
+        attributes.append((metadata_id, rng.getrandbits(32), encoded))
+        entities.append(_Entity(metadata_id, entity_id, metadata_id, states))
+    return entities, attributes
+
+
+def _state_rows(
+    spec: RecorderDbSpec, entities: list[_Entity], rng: random.Random
+) -> Iterator[tuple]:
+    """Yield ``states`` rows in state_id order."""
+    start_ts = spec.end_ts - spec.days * 86_400
+    step = (spec.end_ts - start_ts) / max(spec.rows, 1)
+    for offset in range(spec.rows):
+        state_id = offset + 1
+        entity = entities[rng.randrange(len(entities))]
+        if rng.random() < _UNAVAILABLE_FRACTION:
+            state = "unavailable"
+        else:
+            state = entity.states[rng.randrange(len(entity.states))]
+        ts = start_ts + offset * step + rng.uniform(0, step)
+        if state != entity.last_state or entity.last_changed_ts is None:
+            entity.last_changed_ts = ts
+        # The recorder stores last_changed_ts only when it differs
+        last_changed_ts = (
+            None if entity.last_changed_ts == ts else entity.last_changed_ts
+        )
+        yield (
+            state_id,
+            state,
+            last_changed_ts,
+            ts,
+            entity.last_state_id,
+            entity.attributes_id,
+            0,
+            rng.randbytes(16),
+            entity.metadata_id,
+        )
+        entity.last_state_id = state_id
+        entity.last_state = state
+
+
+def build_recorder_db(path: str, spec: RecorderDbSpec | None = None) -> dict:
+    """Write a synthetic recorder database to ``path`` and describe it."""
+    spec = spec or RecorderDbSpec()
+    if spec.entities < 1:
+        raise ValueError("A recorder database needs at least one entity.")
+    if os.path.exists(path):
+        os.remove(path)
+    rng = random.Random(spec.seed)
+    entities, attributes = _build_entities(spec, rng)
+    started = time.monotonic()
+    connection = sqlite3.connect(path)
+    try:
+        connection.execute("PRAGMA journal_mode=OFF")
+        connection.execute("PRAGMA synchronous=OFF")
+        for statement in RECORDER_SCHEMA:
+            connection.execute(statement)
+        connection.executemany(
+            "INSERT INTO states_meta (metadata_id, entity_id) VALUES (?, ?)",
+            [(entity.metadata_id, entity.entity_id) for entity in entities],
+        )
+        connection.executemany(
+            "INSERT INTO state_attributes (attributes_id, hash, shared_attrs)"
+            " VALUES (?, ?, ?)",
+            attributes,
+        )
+        rows = _state_rows(spec, entities, rng)
+        while True:
+            batch = [row for _, row in zip(range(_INSERT_BATCH_ROWS), rows)]
+            if not batch:
+                break
+            connection.executemany(
+                "INSERT INTO states (state_id, state, last_changed_ts,"
+                " last_updated_ts, old_state_id, attributes_id, origin_idx,"
+                " context_id_bin, metadata_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                batch,
+            )
+        for statement in RECORDER_INDEXES:
+            connection.execute(statement)
+        connection.commit()
+        connection.execute("ANALYZE")
+        # The recorder runs in WAL mode; readers see the same journal setup
+        connection.execute("PRAGMA journal_mode=WAL")
+    finally:
+        connection.close()
+    return {
+        **asdict(spec),
+        "path": path,
+        "file_bytes": os.path.getsize(path),
+        "build_seconds": round(time.monotonic() - started, 3),
+    }
+
+
+def main() -> None:
+    """Build a recorder database from command line options."""
+    defaults = RecorderDbSpec()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output")
+    parser.add_argument("--rows", type=int, default=defaults.rows)
+    parser.add_argument("--entities", type=int, default=defaults.entities)
+    parser.add_argument(
+        "--state-cardinality", type=int, default=defaults.state_cardinality
+    )
+    parser.add_argument(
+        "--numeric-fraction", type=float, default=defaults.numeric_fraction
+    )
+    parser.add_argument("--days", type=float, default=defaults.days)
+    parser.add_argument("--end-ts", type=float, default=defaults.end_ts)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    args = parser.parse_args()
+
+    summary = build_recorder_db(
+        args.output,
+        RecorderDbSpec(
+            rows=args.rows,
+            entities=args.entities,
+            state_cardinality=args.state_cardinality,
+            numeric_fraction=args.numeric_fraction,
+            days=args.days,
+            end_ts=args.end_ts,
+            seed=args.seed,
+        ),
+    )
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
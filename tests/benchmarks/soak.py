@@ -0,0 +1,277 @@
+"""Soak a large first-time backfill and enforce resource ceilings.
+
+Runs ``run_sync_pipeline`` end to end against a generated recorder database
+and the local Databricks stand-in, like a first sync of years of history.
+While it runs, the benchmark samples:
+
+* RSS of the process;
+* open file descriptors;
+* bytes staged on local disk (the sync's ``local_path``);
+* event loop lag, measured the way Home Assistant notices a blocked loop: a
+  probe task sleeps a short interval and records how late it wakes up.
+
+Resources are sampled from a background thread so a blocked loop cannot
+hide them. The benchmark exits with status 1 when any peak exceeds its
+ceiling. Pass ``--db`` to reuse a large database between runs; generating
+tens of millions of rows takes a while.
+
+Run with ``python -m tests.benchmarks.soak --rows 20000000 --max-rss-mb 400
+--max-loop-lag-ms 250``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from custom_components.hass_databricks import pipeline
+
+from .end_to_end import run_benchmark
+from .extraction import _git_commit
+from .mock_databricks import NetworkProfile
+from .recorder_db import RecorderDbSpec, build_recorder_db
+
+# How often the loop probe wakes up; HA's own timers run at this granularity
+_LAG_PROBE_INTERVAL = 0.05
+
+
+@dataclass
+class Ceilings:
+    """Upper bounds a soak run must stay under; None disables a check."""
+
+    rss_mb: float | None = None
+    open_fds: int | None = None
+    temp_disk_mb: float | None = None
+    loop_lag_ms: float | None = None
+
+
+@dataclass
+class SoakSamples:
+    """Peaks observed during a soak run."""
+
+    samples: int = 0
+    peak_rss_mb: float = 0.0
+    peak_open_fds: int = 0
+    peak_temp_disk_mb: float = 0.0
+    max_loop_lag_ms: float = 0.0
+    loop_lag_p99_ms: float = 0.0
+    lags_ms: list[float] = field(default_factory=list, repr=False)
+
+
+def _rss_bytes() -> int:
+    """Return the current RSS, or the peak where the OS only reports that."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _open_fds() -> int:
+    for fd_dir in ("/proc/self/fd", "/dev/fd"):
+        try:
+            return len(os.listdir(fd_dir))
+        except OSError:
+            continue
+    return 0
+
+
+def _tree_bytes(path: str) -> int:
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                # Chunks are removed while we walk
+                pass
+    return total
+
+
+class _ResourceSampler(threading.Thread):
+    """Sample RSS, descriptors and staged bytes until stopped."""
+
+    def __init__(self, samples: SoakSamples, staging: str, interval: float):
+        super().__init__(daemon=True)
+        self._samples = samples
+        self._staging = staging
+        self._interval = interval
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while True:
+            self.sample()
+            if self._stopped.wait(self._interval):
+                break
+
+    def sample(self) -> None:
+        samples = self._samples
+        samples.samples += 1
+        samples.peak_rss_mb = max(samples.peak_rss_mb, _rss_bytes() / 1_048_576)
+        samples.peak_open_fds = max(samples.peak_open_fds, _open_fds())
+        samples.peak_temp_disk_mb = max(
+            samples.peak_temp_disk_mb, _tree_bytes(self._staging) / 1_048_576
+        )
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+        self.sample()
+
+
+async def _probe_loop_lag(samples: SoakSamples) -> None:
+    """Record how late the loop wakes a sleeping task, until cancelled."""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(_LAG_PROBE_INTERVAL)
+        samples.lags_ms.append(
+            max(0.0, (loop.time() - started - _LAG_PROBE_INTERVAL) * 1000)
+        )
+
+
+def violations(samples: SoakSamples, ceilings: Ceilings) -> list[str]:
+    """Return a message for every ceiling the run went over."""
+    checks = (
+        ("peak RSS", samples.peak_rss_mb, ceilings.rss_mb, "MB"),
+        ("open file descriptors", samples.peak_open_fds, ceilings.open_fds, ""),
+        ("staged disk", samples.peak_temp_disk_mb, ceilings.temp_disk_mb, "MB"),
+        ("event loop lag", samples.max_loop_lag_ms, ceilings.loop_lag_ms, "ms"),
+    )
+    return [
+        f"{name} {value:.1f}{unit} exceeds the {ceiling}{unit} ceiling"
+        for name, value, ceiling, unit in checks
+        if ceiling is not None and value > ceiling
+    ]
+
+
+async def run_soak(
+    db_path: str,
+    workdir: str,
+    profile: NetworkProfile,
+    sample_interval: float = 0.5,
+    **request_options,
+) -> tuple[dict, SoakSamples]:
+    """Run one sync while sampling resources; return its result and peaks."""
+    samples = SoakSamples()
+    staging = os.path.join(workdir, "staging")
+    os.makedirs(staging, exist_ok=True)
+    sampler = _ResourceSampler(samples, staging, sample_interval)
+    sampler.start()
+    probe = asyncio.create_task(_probe_loop_lag(samples))
+    try:
+        result = await run_benchmark(db_path, workdir, profile, **request_options)
+    finally:
+        probe.cancel()
+        sampler.stop()
+    lags = sorted(samples.lags_ms)
+    if lags:
+        samples.max_loop_lag_ms = round(lags[-1], 1)
+        samples.loop_lag_p99_ms = round(lags[int(len(lags) * 0.99)], 1)
+    samples.peak_rss_mb = round(samples.peak_rss_mb, 1)
+    samples.peak_temp_disk_mb = round(samples.peak_temp_disk_mb, 1)
+    return result, samples
+
+
+def main() -> None:
+    """Run the soak benchmark and fail on exceeded ceilings."""
+    defaults = RecorderDbSpec()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="recorder database to read, built if missing")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--entities", type=int, default=1_000)
+    parser.add_argument("--days", type=float, default=3 * 365)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument(
+        "--chunk-sizing",
+        default=pipeline.DEFAULT_CHUNK_SIZING,
+        choices=["fixed", "adaptive"],
+    )
+    parser.add_argument("--in-memory-staging", action="store_true")
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--upload-mbps", type=float, default=10.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.01)
+    parser.add_argument("--sample-interval", type=float, default=0.5)
+    parser.add_argument("--max-rss-mb", type=float)
+    parser.add_argument("--max-open-fds", type=int)
+    parser.add_argument("--max-temp-disk-mb", type=float)
+    parser.add_argument("--max-loop-lag-ms", type=float)
+    parser.add_argument("--output", default="benchmark_soak.json")
+    args = parser.parse_args()
+
+    ceilings = Ceilings(
+        rss_mb=args.max_rss_mb,
+        open_fds=args.max_open_fds,
+        temp_disk_mb=args.max_temp_disk_mb,
+        loop_lag_ms=args.max_loop_lag_ms,
+    )
+    profile = NetworkProfile(
+        latency=args.latency,
+        upload_bandwidth=args.upload_mbps * 1_000_000 if args.upload_mbps else None,
+        throttle_rate=args.throttle_rate,
+    )
+    with tempfile.TemporaryDirectory() as workdir:
+        db_path = args.db or os.path.join(workdir, "home-assistant_v2.db")
+        if os.path.exists(db_path):
+            database = {"path": db_path, "file_bytes": os.path.getsize(db_path)}
+        else:
+            print(f"building {args.rows:,} row recorder database at {db_path}")
+            database = build_recorder_db(
+                db_path,
+                RecorderDbSpec(
+                    rows=args.rows,
+                    entities=args.entities,
+                    days=args.days,
+                    end_ts=defaults.end_ts,
+                ),
+            )
+        started = time.monotonic()
+        result, samples = asyncio.run(
+            run_soak(
+                db_path,
+                workdir,
+                profile,
+                sample_interval=args.sample_interval,
+                chunk_size=args.chunk_size,
+                chunk_sizing=args.chunk_sizing,
+                in_memory_staging=args.in_memory_staging,
+            )
+        )
+        elapsed = time.monotonic() - started
+
+    failed = violations(samples, ceilings)
+    report = {
+        "commit": _git_commit(),
+        "created": datetime.now(timezone.utc).isoformat(),
+        "database": database,
+        "profile": asdict(profile),
+        "ceilings": asdict(ceilings),
+        "seconds": round(elapsed, 1),
+        "samples": {
+            key: value for key, value in asdict(samples).items() if key != "lags_ms"
+        },
+        "violations": failed,
+        **result,
+    }
+    with open(args.output, "w", encoding="utf-8") as output:
+        json.dump(report, output, indent=2)
+    print(json.dumps(report["samples"], indent=2))
+    print(f"{result['rows']:,} rows in {elapsed:.1f}s; report in {args.output}")
+    for message in failed:
+        print(f"FAIL: {message}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
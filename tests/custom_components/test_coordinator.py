@@ -0,0 +1,157 @@
+"""Tests for the single-flight sync coordinator."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from custom_components.hass_databricks.coordinator import (
+    SyncCoordinator,
+    warehouse_slots,
+)
+
+
+class BlockingRun:
+    """Sync run stand-in that blocks until released."""
+
+    def __init__(self):
+        self.calls = []
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+        self.error = None
+
+    async def __call__(self, call_data, trigger):
+        self.calls.append((dict(call_data), trigger))
+        self.started.set()
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+
+
+def test_concurrent_triggers_coalesce_into_one_follow_up_run():
+    states = []
+
+    async def _run():
+        run = BlockingRun()
+        coordinator = SyncCoordinator(
+            run, asyncio.Semaphore(1), lambda *state: states.append(state)
+        )
+        first = asyncio.create_task(coordinator.async_run({}, "scheduled"))
+        await run.started.wait()
+        assert coordinator.state == "running"
+
+        triggers = [
+            asyncio.create_task(coordinator.async_run({}, "button")),
+            asyncio.create_task(coordinator.async_run({}, "service")),
+            asyncio.create_task(coordinator.async_run({"table": "other"}, "service")),
+        ]
+        await asyncio.sleep(0)
+        assert coordinator.queued_runs == 2
+
+        run.release.set()
+        await asyncio.gather(first, *triggers)
+        assert coordinator.state == "idle"
+        return run.calls
+
+    calls = asyncio.run(_run())
+
+    assert calls == [
+        ({}, "scheduled"),
+        ({}, "button"),
+        ({"table": "other"}, "service"),
+    ]
+    assert ("running", 2) in states
+    assert states[-1] == ("idle", 0)
+
+
+def test_coalesced_triggers_share_the_run_failure():
+    async def _run():
+        run = BlockingRun()
+        coordinator = SyncCoordinator(run, asyncio.Semaphore(1))
+        first = asyncio.create_task(coordinator.async_run({}, "scheduled"))
+        await run.started.wait()
+        follow_ups = [
+            asyncio.create_task(coordinator.async_run({}, "button")) for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        run.error = RuntimeError("warehouse down")
+        run.release.set()
+        results = await asyncio.gather(first, *follow_ups, return_exceptions=True)
+        return run.calls, results
+
+    calls, results = asyncio.run(_run())
+
+    assert len(calls) == 2
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_entries_sharing_a_warehouse_do_not_run_at_once():
+    hass = SimpleNamespace(data={})
+
+    async def _run():
+        slots = warehouse_slots(hass, "adb.example", "/sql/1.0/warehouses/1")
+        assert slots is warehouse_slots(hass, "adb.example", "/sql/1.0/warehouses/1/")
+        assert slots is not warehouse_slots(
+            hass, "adb.example", "/sql/1.0/warehouses/2"
+        )
+
+        first_run, second_run = BlockingRun(), BlockingRun()
+        first = SyncCoordinator(first_run, slots)
+        second = SyncCoordinator(second_run, slots)
+        first_task = asyncio.create_task(first.async_run({}, "scheduled"))
+        await first_run.started.wait()
+        second_task = asyncio.create_task(second.async_run({}, "scheduled"))
+        await asyncio.sleep(0)
+        assert second.state == "queued"
+        assert not second_run.calls
+
+        first_run.release.set()
+        second_run.release.set()
+        await asyncio.gather(first_task, second_task)
+        return second_run.calls
+
+    assert asyncio.run(_run()) == [({}, "scheduled")]
+
+
+def test_shutdown_cancels_running_and_queued_runs():
+    async def _run():
+        run = BlockingRun()
+        coordinator = SyncCoordinator(run, asyncio.Semaphore(1))
+        running = asyncio.create_task(coordinator.async_run({}, "scheduled"))
+        await run.started.wait()
+        queued = asyncio.create_task(coordinator.async_run({"table": "x"}, "service"))
+        await asyncio.sleep(0)
+
+        await coordinator.async_shutdown()
+
+        assert running.cancelled()
+        assert queued.cancelled()
+        assert len(run.calls) == 1
+        assert coordinator.state == "idle"
+
+    asyncio.run(_run())
+
+
+def test_trigger_after_a_run_starts_a_new_run():
+    async def _run():
+        run = BlockingRun()
+        run.release.set()
+        coordinator = SyncCoordinator(run, asyncio.Semaphore(1))
+        await coordinator.async_run({}, "scheduled")
+        await coordinator.async_run({}, "button")
+        return run.calls
+
+    assert asyncio.run(_run()) == [({}, "scheduled"), ({}, "button")]
+
+
+def test_failed_run_raises_to_its_caller():
+    async def _run():
+        run = BlockingRun()
+        run.release.set()
+        run.error = ValueError("boom")
+        coordinator = SyncCoordinator(run, asyncio.Semaphore(1))
+        with pytest.raises(ValueError, match="boom"):
+            await coordinator.async_run({}, "service")
+        assert coordinator.state == "idle"
+
+    asyncio.run(_run())
@@ -22,10 +22,19 @@ from custom_components.hass_databricks.const import (
     CONF_SCHEMA,
     CONF_SERVER_HOSTNAME,
     CONF_TABLE,
+    DEFAULT_SYNC_WORKERS,
     DOMAIN,
+    JOURNAL_SAVE_DELAY_SECONDS,
+    SERVICE_MIGRATE_TABLE_LAYOUT,
     SERVICE_SYNC,
     SYNC_META_AVAILABLE,
+    SYNC_META_DDL_FINGERPRINTS,
+    SYNC_META_JOB_JOURNALS,
+    SYNC_META_LAST_METRICS,
+    SYNC_META_LAST_ROWS,
     SYNC_META_LAST_STATUS,
+    SYNC_META_LAST_SUCCESS_TS,
+    SYNC_META_STATE_ID_WATERMARKS,
 )
 
 
@@ -39,6 +48,7 @@ class DummyStore:
     def __init__(self, *_args, **_kwargs):
         self._data = dict(self.__class__.initial_data)
         self.saved = []
+        self.delayed = []
         self.__class__.instances.append(self)
 
     async def async_load(self):
@@ -47,6 +57,9 @@ class DummyStore:
     async def async_save(self, data):
         self.saved.append(dict(data))
 
+    def async_delay_save(self, data_func, delay):
+        self.delayed.append((dict(data_func()), delay))
+
 
 def _build_hass():
     services = SimpleNamespace(
@@ -126,13 +139,18 @@ def test_setup_registers_service_and_unload_removes_it():
 
     assert ok is True
     assert DOMAIN in hass.data
-    hass.services.async_register.assert_called_once()
-    assert hass.services.async_register.call_args.args[1] == SERVICE_SYNC
+    registered = [call.args[1] for call in hass.services.async_register.call_args_list]
+    assert registered == [SERVICE_MIGRATE_TABLE_LAYOUT, SERVICE_SYNC]
     assert isinstance(entry.runtime_data, HassDataBricksRuntimeData)
 
     unload_ok = asyncio.run(async_unload_entry(hass, entry))
     assert unload_ok is True
-    hass.services.async_remove.assert_called_once_with(DOMAIN, SERVICE_SYNC)
+    hass.services.async_remove.assert_has_calls(
+        [
+            mock.call(DOMAIN, SERVICE_SYNC),
+            mock.call(DOMAIN, SERVICE_MIGRATE_TABLE_LAYOUT),
+        ]
+    )
 
 
 def test_service_handler_success_updates_sync_meta():
@@ -151,6 +169,7 @@ def test_service_handler_success_updates_sync_meta():
                         "filename": "upload.csv.gz",
                         "max_last_updated_ts": 1700.0,
                         "used_hot_copy": False,
+                        "metrics": {"duration_seconds": 1.5},
                     },
                 ):
                     with mock.patch(
@@ -165,21 +184,31 @@ def test_service_handler_success_updates_sync_meta():
     meta = entry.runtime_data.sync_meta
     assert meta[SYNC_META_LAST_STATUS] == "success"
     assert meta.get(SYNC_META_AVAILABLE, True) is True
+    assert meta[SYNC_META_LAST_METRICS] == {"duration_seconds": 1.5}
+    event = hass.bus.async_fire.call_args.args[1]
+    assert event["metrics"] == {"duration_seconds": 1.5}
     assert DummyStore.instances[-1].saved
 
 
 def test_service_handler_failure_sets_unavailable_and_triggers_reauth():
     hass = _build_hass()
     entry = _build_entry(auto_sync=False)
-    DummyStore.initial_data = {}
+    DummyStore.initial_data = {SYNC_META_LAST_METRICS: {"duration_seconds": 2.0}}
     DummyStore.instances = []
 
+    async def _failing_pipeline(request):
+        # The run got as far as extracting rows and running DDL
+        request.metrics.stats.rows = 40
+        with request.metrics.stage("ddl"):
+            pass
+        raise Exception("authentication failed: invalid token")
+
     async def _run():
         with mock.patch("custom_components.hass_databricks.Store", DummyStore):
             with _mock_conn_success():
                 with mock.patch(
                     "custom_components.hass_databricks.pipeline.run_sync_pipeline",
-                    side_effect=Exception("authentication failed: invalid token"),
+                    side_effect=_failing_pipeline,
                 ):
                     with mock.patch(
                         "custom_components.hass_databricks.async_get_clientsession"
@@ -194,6 +223,11 @@ def test_service_handler_failure_sets_unavailable_and_triggers_reauth():
     meta = entry.runtime_data.sync_meta
     assert meta[SYNC_META_LAST_STATUS] == "failed"
     assert meta[SYNC_META_AVAILABLE] is False
+    assert meta[SYNC_META_LAST_METRICS] == {"duration_seconds": 2.0}
+    # The failure event carries what the failed run measured
+    event = hass.bus.async_fire.call_args.args[1]
+    assert event["metrics"]["rows_extracted"] == 40
+    assert "ddl" in event["metrics"]["stage_seconds"]
     hass.config_entries.flow.async_init.assert_awaited_once()
 
 
@@ -356,6 +390,43 @@ def test_unload_calls_unsubscribe_when_present():
     unsub.assert_called_once()
 
 
+def test_sync_runs_on_entry_executor_shut_down_on_unload():
+    hass = _build_hass()
+    entry = _build_entry(auto_sync=False)
+    DummyStore.initial_data = {}
+    DummyStore.instances = []
+
+    async def _run():
+        with mock.patch("custom_components.hass_databricks.Store", DummyStore):
+            with _mock_conn_success():
+                with mock.patch(
+                    "custom_components.hass_databricks.pipeline.run_sync_pipeline",
+                    return_value={"status": "no_changes", "rows": 0},
+                ) as mock_run:
+                    with mock.patch(
+                        "custom_components.hass_databricks.async_get_clientsession"
+                    ):
+                        await async_setup_entry(hass, entry)
+                        assert entry.runtime_data.sync_executor is None
+                        handler = hass.services.async_register.call_args.args[2]
+                        await handler(SimpleNamespace(data={}))
+                        await handler(SimpleNamespace(data={}))
+                        executor = entry.runtime_data.sync_executor
+                        # One pool per entry, reused by every run
+                        assert [
+                            call.args[0].executor for call in mock_run.call_args_list
+                        ] == [executor, executor]
+                        await async_unload_entry(hass, entry)
+        return executor
+
+    executor = asyncio.run(_run())
+
+    assert executor._max_workers == DEFAULT_SYNC_WORKERS
+    assert entry.runtime_data.sync_executor is None
+    with pytest.raises(RuntimeError):
+        executor.submit(print)
+
+
 def test_sync_recovers_availability_and_logs():
     hass = _build_hass()
     entry = _build_entry(auto_sync=False)
@@ -494,3 +565,323 @@ def test_setup_entry_triggers_reauth_on_invalid_auth():
                 hass.config_entries.flow.async_init.assert_awaited_once()
 
     asyncio.run(_run())
+
+
+def test_state_id_watermark_is_stored_per_target_and_reused():
+    hass = _build_hass()
+    entry = _build_entry(auto_sync=False)
+    DummyStore.initial_data = {}
+    DummyStore.instances = []
+
+    captured = []
+
+    def _fake_pipeline(request):
+        captured.append((request.min_state_id, request.min_state_id_ts))
+        return {
+            "rows": 1,
+            "filename": "upload.csv.gz",
+            "max_last_updated_ts": 2100.0,
+            "last_state_id": 42,
+            "last_state_ts": 2100.0,
+            "used_hot_copy": False,
+        }
+
+    async def _run():
+        with mock.patch("custom_components.hass_databricks.Store", DummyStore):
+            with _mock_conn_success():
+                with mock.patch(
+                    "custom_components.hass_databricks.pipeline.run_sync_pipeline",
+                    side_effect=_fake_pipeline,
+                ):
+                    with mock.patch(
+                        "custom_components.hass_databricks.async_get_clientsession"
+                    ):
+                        await async_setup_entry(hass, entry)
+                        handler = hass.services.async_register.call_args.args[2]
+                        await handler(SimpleNamespace(data={}))
+                        await handler(SimpleNamespace(data={}))
+                        # A different entity filter must not reuse the watermark
+                        await handler(SimpleNamespace(data={"entity_like": "light.%"}))
+
+    asyncio.run(_run())
+
+    assert captured == [(0, None), (42, 2100.0), (0, None)]
+    watermarks = entry.runtime_data.sync_meta[SYNC_META_STATE_ID_WATERMARKS]
+    assert watermarks["main.ha.states"] == {
+        "state_id": 42,
+        "last_updated_ts": 2100.0,
+        "entity_like": "light.%",
+    }
+
+
+def test_no_changes_result_is_recorded_without_failure():
+    hass = _build_hass()
+    entry = _build_entry(auto_sync=False)
+    DummyStore.initial_data = {
+        SYNC_META_LAST_SUCCESS_TS: 1700.0,
+        SYNC_META_LAST_METRICS: {"duration_seconds": 2.0},
+    }
+    DummyStore.instances = []
+
+    async def _run():
+        with mock.patch("custom_components.hass_databricks.Store", DummyStore):
+            with _mock_conn_success():
+                with mock.patch(
+                    "custom_components.hass_databricks.pipeline.run_sync_pipeline",
+                    return_value={
+                        "status": "no_changes",
+                        "rows": 0,
+                        "filename": None,
+                        "max_last_updated_ts": None,
+                        "last_state_id": None,
+                        "used_hot_copy": False,
+                    },
+                ):
+                    with mock.patch(
+                        "custom_components.hass_databricks.async_get_clientsession"
+                    ):
+                        await async_setup_entry(hass, entry)
+                        handler = hass.services.async_register.call_args.args[2]
+                        await handler(SimpleNamespace(data={}))
+
+    asyncio.run(_run())
+
+    meta = entry.runtime_data.sync_meta
+    assert meta[SYNC_META_LAST_STATUS] == "no_changes"
+    assert meta[SYNC_META_LAST_ROWS] == 0
+    assert meta[SYNC_META_LAST_SUCCESS_TS] == 1700.0
+    # The sensors keep showing the last run that uploaded rows
+    assert meta[SYNC_META_LAST_METRICS] == {"duration_seconds": 2.0}
+    assert SYNC_META_STATE_ID_WATERMARKS not in meta
+    assert meta.get(SYNC_META_AVAILABLE, True) is True
+    event = hass.bus.async_fire.call_args.args[1]
+    assert (event["success"], event["status"]) == (True, "no_changes")
+
+
+def test_ddl_fingerprint_is_stored_and_passed_to_later_runs():
+    hass = _build_hass()
+    entry = _build_entry(auto_sync=False)
+    DummyStore.initial_data = {}
+    DummyStore.instances = []
+
+    captured = []
+
+    def _fake_pipeline(request):
+        captured.append((request.ddl_fingerprint, request.force_ddl))
+        return {
+            "rows": 1,
+            "filename": "upload",
+            "max_last_updated_ts": 2100.0,
+            "used_hot_copy": False,
+            "ddl_fingerprint": f"main.ha.{request.table}#v1",
+        }
+
+    async def _run():
+        with mock.patch("custom_components.hass_databricks.Store", DummyStore):
+            with _mock_conn_success():
+                with mock.patch(
+                    "custom_components.hass_databricks.pipeline.run_sync_pipeline",
+                    side_effect=_fake_pipeline,
+                ):
+                    with mock.patch(
+                        "custom_components.hass_databricks.async_get_clientsession"
+                    ):
+                        await async_setup_entry(hass, entry)
+                        handler = hass.services.async_register.call_args.args[2]
+                        await handler(SimpleNamespace(data={}))
+                        await handler(SimpleNamespace(data={"force_ddl": True}))
+                        await handler(SimpleNamespace(data={"table": "other"}))
+
+    asyncio.run(_run())
+
+    assert captured == [
+        (None, False),
+        ("main.ha.states#v1", True),
+        (None, False),
+    ]
+    assert entry.runtime_data.sync_meta[SYNC_META_DDL_FINGERPRINTS] == {
+        "main.ha.states": "main.ha.states#v1",
+        "main.ha.other": "main.ha.other#v1",
+    }
+
+
+def test_job_journal_is_persisted_and_resumed_by_next_run():
+    hass = _build_hass()
+    entry = _build_entry(auto_sync=False)
+    DummyStore.initial_data = {}
+    DummyStore.instances = []
+
+    resumed = []
+
+    async def _fake_pipeline(request):
+        if request.journal.data is None:
+            await request.journal.begin(job_id="upload_1", start_state_id=0)
+            store = DummyStore.instances[0]
+            saves = len(store.saved)
+            await request.journal.add_chunk("part_00001.csv.gz", 0, 5, 5, 2000.0)
+            await request.journal.mark_uploaded("part_00001.csv.gz")
+            # Chunk progress is batched instead of rewriting the store each time
+            assert len(store.saved) == saves
+            assert [delay for _data, delay in store.delayed] == [
+                JOURNAL_SAVE_DELAY_SECONDS,
+                JOURNAL_SAVE_DELAY_SECONDS,
+            ]
+            raise Exception("network down")
+        resumed.append(request.journal.data["job_id"])
+        await request.journal.clear()
+        return {
+            "rows": 1,
+            "filename": "upload_1",
+            "max_last_updated_ts": 2100.0,
+            "used_hot_copy": False,
+        }
+
+    async def _run():
+        with mock.patch("custom_components.hass_databricks.Store", DummyStore):
+            with _mock_conn_success():
+                with mock.patch(
+                    "custom_components.hass_databricks.pipeline.run_sync_pipeline",
+                    side_effect=_fake_pipeline,
+                ):
+                    with mock.patch(
+                        "custom_components.hass_databricks.async_get_clientsession"
+                    ):
+                        await async_setup_entry(hass, entry)
+                        handler = hass.services.async_register.call_args.args[2]
+                        with pytest.raises(Exception, match="network down"):
+                            await handler(SimpleNamespace(data={}))
+                        journals = DummyStore.instances[0].saved[-1][
+                            SYNC_META_JOB_JOURNALS
+                        ]
+                        assert journals["main.ha.states"]["job_id"] == "upload_1"
+                        await handler(SimpleNamespace(data={}))
+
+    asyncio.run(_run())
+
+    assert resumed == ["upload_1"]
+    assert entry.runtime_data.sync_meta[SYNC_META_JOB_JOURNALS] == {}
+
+
+def test_overlapping_sync_triggers_are_serialized_and_coalesced():
+    hass = _build_hass()
+    entry = _build_entry(auto_sync=False)
+    DummyStore.initial_data = {}
+    DummyStore.instances = []
+    release = asyncio.Event()
+    active = []
+    runs = []
+
+    async def _slow_pipeline(_request):
+        assert not active
+        active.append(True)
+        runs.append(len(runs))
+        await release.wait()
+        active.pop()
+        return {
+            "rows": 1,
+            "filename": "upload",
+            "max_last_updated_ts": 2100.0,
+            "used_hot_copy": False,
+        }
+
+    async def _run():
+        with mock.patch("custom_components.hass_databricks.Store", DummyStore):
+            with _mock_conn_success():
+                with mock.patch(
+                    "custom_components.hass_databricks.pipeline.run_sync_pipeline",
+                    side_effect=_slow_pipeline,
+                ):
+                    await async_setup_entry(hass, entry)
+                    handler = hass.services.async_register.call_args.args[2]
+                    calls = [
+                        asyncio.create_task(handler(SimpleNamespace(data={})))
+                        for _ in range(2)
+                    ]
+                    calls.append(
+                        asyncio.create_task(entry.runtime_data.sync_func({}, "button"))
+                    )
+                    await asyncio.sleep(0.01)
+                    assert entry.runtime_data.sync_coordinator.state == "running"
+                    release.set()
+                    await asyncio.gather(*calls)
+
+    asyncio.run(_run())
+
+    assert runs == [0, 1]
+
+
+def test_unload_cancels_running_sync():
+    hass = _build_hass()
+    entry = _build_entry(auto_sync=False)
+    DummyStore.initial_data = {}
+    DummyStore.instances = []
+    started = asyncio.Event()
+
+    async def _slow_pipeline(_request):
+        started.set()
+        await asyncio.sleep(3600)
+
+    async def _run():
+        with mock.patch("custom_components.hass_databricks.Store", DummyStore):
+            with _mock_conn_success():
+                with mock.patch(
+                    "custom_components.hass_databricks.pipeline.run_sync_pipeline",
+                    side_effect=_slow_pipeline,
+                ):
+                    await async_setup_entry(hass, entry)
+                    handler = hass.services.async_register.call_args.args[2]
+                    sync = asyncio.create_task(handler(SimpleNamespace(data={})))
+                    await started.wait()
+                    assert entry.runtime_data.sync_tasks == {sync}
+
+                    await async_unload_entry(hass, entry)
+
+                    assert sync.cancelled()
+                    assert not entry.runtime_data.sync_tasks
+
+    asyncio.run(_run())
+
+
+def test_migrate_table_layout_service_stores_fingerprint_and_pauses_sync():
+    hass = _build_hass()
+    entry = _build_entry(auto_sync=False)
+    DummyStore.initial_data = {}
+    DummyStore.instances = []
+    release = asyncio.Event()
+    requests = []
+
+    async def _fake_migration(request):
+        requests.append(request)
+        await release.wait()
+        return {"ddl_fingerprint": "main.ha.states#v1/date_partitioned"}
+
+    async def _run():
+        with mock.patch("custom_components.hass_databricks.Store", DummyStore):
+            with _mock_conn_success():
+                with mock.patch(
+                    "custom_components.hass_databricks.pipeline.run_table_layout_migration",
+                    side_effect=_fake_migration,
+                ):
+                    await async_setup_entry(hass, entry)
+                    handlers = {
+                        call.args[1]: call.args[2]
+                        for call in hass.services.async_register.call_args_list
+                    }
+                    migration = asyncio.create_task(
+                        handlers[SERVICE_MIGRATE_TABLE_LAYOUT](
+                            SimpleNamespace(data={"table_layout": "date_partitioned"})
+                        )
+                    )
+                    await asyncio.sleep(0)
+                    with pytest.raises(HomeAssistantError, match="migration"):
+                        await handlers[SERVICE_SYNC](SimpleNamespace(data={}))
+                    release.set()
+                    await migration
+
+    asyncio.run(_run())
+
+    assert requests[0].table_layout == "date_partitioned"
+    assert not entry.runtime_data.layout_migration_running
+    assert entry.runtime_data.sync_meta[SYNC_META_DDL_FINGERPRINTS] == {
+        "main.ha.states": "main.ha.states#v1/date_partitioned"
+    }
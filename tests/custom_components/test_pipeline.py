@@ -3,6 +3,11 @@ from unittest import mock
 import pytest
 import aiohttp
 import asyncio
+import concurrent.futures
+import os
+import threading
+import time
+import tracemalloc
 
 from custom_components.hass_databricks import pipeline
 
@@ -28,6 +33,15 @@ def _request(**overrides):
     return pipeline.SyncRequest(**data)
 
 
+def _mock_session(mock_session_cls):
+    session = mock_session_cls.return_value
+    session.resolve_start_state_id.return_value = 0
+    # Chunk bounds are journaled; mocked extractions report none
+    session.last_chunk_bounds = None
+    return session
+
+
+@mock.patch("custom_components.hass_databricks.pipeline.ExtractionSession")
 @mock.patch("custom_components.hass_databricks.pipeline.os.remove")
 @mock.patch("custom_components.hass_databricks.pipeline.os.rmdir")
 @mock.patch(
@@ -43,8 +57,10 @@ def test_run_sync_pipeline_success(
     _mock_exists,
     mock_rmdir,
     mock_remove,
+    mock_session_cls,
 ):
     mock_datetime.now.return_value.strftime.return_value = "2026-04-12-10-00-00"
+    _mock_session(mock_session_cls)
 
     # First chunk returns 7 rows, second chunk returns 0 (EOF)
     mock_extract.side_effect = [(7, 1700001111.0, 7), (0, None, 7)]
@@ -54,7 +70,7 @@ def test_run_sync_pipeline_success(
     target.create_table = mock.AsyncMock(return_value=[])
     target._upload_file = mock.AsyncMock(return_value=[["ok"]])
     target.upsert_new_data = mock.AsyncMock(return_value={"status": "SUCCESS"})
-    target.delete_volume_folder = mock.AsyncMock(return_value={"status": "SUCCESS"})
+    target.remove_volume_folder = mock.AsyncMock()
 
     import asyncio
 
@@ -75,10 +91,14 @@ def test_run_sync_pipeline_success(
     mock_remove.assert_called()
 
 
+@mock.patch("custom_components.hass_databricks.pipeline.ExtractionSession")
 @mock.patch("custom_components.hass_databricks.pipeline.DatabricksTarget")
 @mock.patch("custom_components.hass_databricks.pipeline._extract_chunk_to_csv")
-def test_run_sync_pipeline_raises_when_no_rows(mock_extract, mock_target):
+def test_run_sync_pipeline_raises_when_no_rows(
+    mock_extract, mock_target, mock_session_cls
+):
     mock_extract.return_value = (0, None, 0)
+    _mock_session(mock_session_cls)
 
     target = mock_target.return_value
     target.create_schema = mock.AsyncMock(return_value=[])
@@ -178,6 +198,7 @@ def test_databricks_target_methods_execute_queries():
             }
 
 
+@mock.patch("custom_components.hass_databricks.pipeline.ExtractionSession")
 @mock.patch("custom_components.hass_databricks.pipeline.os.remove")
 @mock.patch("custom_components.hass_databricks.pipeline.os.rmdir")
 @mock.patch(
@@ -193,8 +214,10 @@ def test_run_sync_pipeline_keep_local_file_true_does_not_remove(
     _mock_exists,
     _mock_rmdir,
     mock_remove,
+    mock_session_cls,
 ):
     mock_datetime.now.return_value.strftime.return_value = "2026-04-12-10-00-03"
+    _mock_session(mock_session_cls)
     mock_extract.side_effect = [(2, 1700004111.0, 2), (0, None, 2)]
 
     target = mock_target_cls.return_value
@@ -202,7 +225,7 @@ def test_run_sync_pipeline_keep_local_file_true_does_not_remove(
     target.create_table = mock.AsyncMock(return_value=[])
     target._upload_file = mock.AsyncMock(return_value=[["ok"]])
     target.upsert_new_data = mock.AsyncMock(return_value={"status": "SUCCESS"})
-    target.delete_volume_folder = mock.AsyncMock(return_value={"status": "SUCCESS"})
+    target.remove_volume_folder = mock.AsyncMock()
 
     import asyncio
 
@@ -330,6 +353,72 @@ def test_delete_volume_folder():
     asyncio.run(_run())
 
 
+def test_remove_volume_folder_deletes_its_files_first(tmp_path):
+    from tests.benchmarks.end_to_end import _local_target_class
+    from tests.benchmarks.mock_databricks import MockDatabricksServer
+
+    config = pipeline.RuntimeSyncConfig("main", "ha", "states", "/tmp", "/Volumes")
+
+    async def _run():
+        async with MockDatabricksServer(str(tmp_path)) as server:
+            job = server.local_path("Volumes/main/ha/ingest/upload_1")
+            os.makedirs(job)
+            for name in ("part_00001.csv.gz", "part_00002.csv.gz"):
+                with open(os.path.join(job, name), "wb") as handle:
+                    handle.write(b"rows")
+            target = _local_target_class(server.url)(
+                config,
+                server_hostname="localhost",
+                http_path="/sql/1",
+                access_token=server.access_token,
+            )
+            await target.remove_volume_folder("/Volumes/main/ha/ingest/upload_1")
+            # A folder that is already gone is not an error
+            await target.remove_volume_folder("/Volumes/main/ha/ingest/upload_1")
+            return job
+
+    job = asyncio.run(_run())
+
+    assert not os.path.exists(job)
+
+
+def test_list_and_delete_volume_files():
+    session = mock.MagicMock()
+    session.get.side_effect = [
+        MockResponse(
+            200,
+            json_data={
+                "contents": [
+                    {"name": "part_00001.csv.gz", "is_directory": False},
+                    {"name": "nested", "is_directory": True},
+                ],
+                "next_page_token": "p2",
+            },
+        ),
+        MockResponse(200, json_data={"contents": [{"name": "part_00002.csv.gz"}]}),
+        MockResponse(404),
+    ]
+    session.delete.side_effect = [MockResponse(204), MockResponse(404)]
+    target = _statement_target(session)
+
+    async def _run():
+        assert await target.list_volume_folder("/Volumes/job") == [
+            "part_00001.csv.gz",
+            "part_00002.csv.gz",
+        ]
+        # A job folder that was never created lists as empty
+        assert await target.list_volume_folder("/Volumes/missing") == []
+        await target.delete_volume_file("/Volumes/job/part_00001.csv.gz")
+        await target.delete_volume_file("/Volumes/job/part_00001.csv.gz")
+
+    asyncio.run(_run())
+
+    assert session.get.call_args_list[1].kwargs["params"] == {"page_token": "p2"}
+    assert session.delete.call_args.args[0] == (
+        "https://host/api/2.0/fs/files/Volumes/job/part_00001.csv.gz"
+    )
+
+
 def test_schema_errors(tmp_path):
     source_db = tmp_path / "source.db"
     out_csv = tmp_path / "out.csv.gz"
@@ -373,3 +462,1878 @@ def test_remove_path_coverage(tmp_path):
         f2 = tmp_path / "file2.txt"
         f2.write_text("Hello")
         pipeline._remove_path(str(f2))  # should not raise
+
+
+def _make_source_db(path, rows):
+    conn = pipeline.sqlite3.connect(path)
+    try:
+        conn.execute(
+            "CREATE TABLE states_meta (metadata_id INTEGER PRIMARY KEY, entity_id TEXT)"
+        )
+        conn.execute(
+            "CREATE TABLE states (state_id INTEGER PRIMARY KEY, metadata_id INTEGER, state TEXT, last_updated_ts REAL)"
+        )
+        conn.execute(
+            "INSERT INTO states_meta(metadata_id, entity_id) VALUES (1, 'sensor.a')"
+        )
+        conn.executemany(
+            "INSERT INTO states(state_id, metadata_id, state, last_updated_ts) VALUES (?, 1, ?, ?)",
+            rows,
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def test_resolve_start_state_id_keeps_valid_watermark(tmp_path):
+    source_db = tmp_path / "source.db"
+    _make_source_db(source_db, [(1, "1", 1000.0), (2, "2", 2000.0), (4, "4", 4000.0)])
+
+    with pipeline.ExtractionSession(str(source_db)) as session:
+        assert session.resolve_start_state_id(2, 2000.0) == 2
+        # Watermark row purged but ids kept growing: still safe to seek.
+        assert session.resolve_start_state_id(3, 3000.0) == 3
+        assert session.resolve_start_state_id(0) == 0
+        assert session.lookup_state_ts(4) == 4000.0
+        assert session.lookup_state_ts(99) is None
+
+
+def test_resolve_start_state_id_falls_back_when_renumbered(tmp_path):
+    source_db = tmp_path / "source.db"
+    _make_source_db(source_db, [(1, "1", 5000.0), (2, "2", 6000.0)])
+
+    with pipeline.ExtractionSession(str(source_db)) as session:
+        # Watermark beyond the current max id (database recreated)
+        assert session.resolve_start_state_id(10, 2000.0) == 0
+        # Same id now points at a different row
+        assert session.resolve_start_state_id(2, 2000.0) == 0
+
+
+@mock.patch("custom_components.hass_databricks.pipeline.ExtractionSession")
+@mock.patch("custom_components.hass_databricks.pipeline.DatabricksTarget")
+@mock.patch("custom_components.hass_databricks.pipeline._extract_chunk_to_csv")
+def test_run_sync_pipeline_seeks_from_state_id_watermark(
+    mock_extract,
+    mock_target_cls,
+    mock_session_cls,
+    tmp_path,
+):
+    session = _mock_session(mock_session_cls)
+    session.resolve_start_state_id.return_value = 500
+    session.lookup_state_ts.return_value = 1700009999.0
+    mock_extract.side_effect = [(3, 1700009999.0, 503), (0, None, 503)]
+
+    target = mock_target_cls.return_value
+    target.create_schema = mock.AsyncMock(return_value=[])
+    target.create_table = mock.AsyncMock(return_value=[])
+    target._upload_file = mock.AsyncMock(return_value=[["ok"]])
+    target.upsert_new_data = mock.AsyncMock(return_value={"status": "SUCCESS"})
+    target.remove_volume_folder = mock.AsyncMock()
+
+    result = asyncio.run(
+        pipeline.run_sync_pipeline(
+            _request(
+                local_path=str(tmp_path),
+                min_state_id=500,
+                min_state_id_ts=1700000000.0,
+            )
+        )
+    )
+
+    session.resolve_start_state_id.assert_called_once_with(500, 1700000000.0)
+    assert mock_extract.call_args_list[0].args[5] == 500
+    assert mock_extract.call_args_list[0].kwargs["session"] is session
+    session.close.assert_called_once()
+    assert result["last_state_id"] == 503
+    assert result["last_state_ts"] == 1700009999.0
+
+
+def test_entity_metadata_resolver_caches_until_new_metadata(tmp_path):
+    source_db = tmp_path / "source.db"
+    _make_source_db(source_db, [(1, "1", 1000.0)])
+    conn = pipeline.sqlite3.connect(source_db)
+    conn.execute(
+        "INSERT INTO states_meta(metadata_id, entity_id) VALUES (2, 'light.b')"
+    )
+    conn.execute(
+        "INSERT INTO states_meta(metadata_id, entity_id) VALUES (3, 'Sensor.Big_1')"
+    )
+    conn.commit()
+
+    resolver = pipeline.EntityMetadataResolver()
+    try:
+        assert resolver.resolve(conn, str(source_db), "states_meta", "sensor.%") == {
+            1: "sensor.a",
+            3: "Sensor.Big_1",
+        }
+        assert resolver.resolve(
+            conn,
+            str(source_db),
+            "states_meta",
+            "sensor.%",
+            include=["light.b"],
+            exclude=["sensor.a"],
+        ) == {2: "light.b", 3: "Sensor.Big_1"}
+        assert resolver.resolve(conn, str(source_db), "states_meta", "sensor._") == {
+            1: "sensor.a"
+        }
+
+        # A rename without new metadata rows is served from the cache
+        conn.execute(
+            "UPDATE states_meta SET entity_id = 'sensor.z' WHERE metadata_id = 1"
+        )
+        assert resolver.refresh(conn, str(source_db), "states_meta")[1] == "sensor.a"
+
+        # New entities bump the max metadata_id and invalidate the cache
+        conn.execute(
+            "INSERT INTO states_meta(metadata_id, entity_id) VALUES (4, 'sensor.c')"
+        )
+        assert resolver.resolve(conn, str(source_db), "states_meta", "sensor.%") == {
+            1: "sensor.z",
+            3: "Sensor.Big_1",
+            4: "sensor.c",
+        }
+    finally:
+        conn.close()
+
+
+def test_extraction_session_reuses_connection_across_chunks(tmp_path):
+    source_db = tmp_path / "source.db"
+    out_csv = tmp_path / "out.csv.gz"
+    _make_source_db(
+        source_db, [(1, "1", 1000.0), (2, "unknown", 2000.0), (3, "3", 3000.0)]
+    )
+
+    resolver = pipeline.EntityMetadataResolver()
+    with pipeline.ExtractionSession(
+        str(source_db), metadata_resolver=resolver
+    ) as session:
+        connection = session.connection
+        assert connection.execute("PRAGMA query_only").fetchone() == (1,)
+        assert connection.execute("PRAGMA temp_store").fetchone() == (2,)
+
+        # Nothing resolved yet: no query to run
+        assert session.extract_chunk(str(out_csv), 100) == (0, None, 0)
+
+        assert session.resolve_entity_ids("sensor.%") == {1: "sensor.a"}
+        assert pipeline._extract_chunk_to_csv(
+            str(source_db), str(out_csv), "ignored", 1, None, 0, session=session
+        ) == (1, 1000.0, 1)
+        assert not connection.in_transaction
+        assert session.extract_chunk(str(out_csv), 1, None, 1) == (1, 3000.0, 3)
+        with pipeline.gzip.open(out_csv, "rt") as f:
+            assert f.read().splitlines() == [
+                "state,last_updated_ts,entity_id",
+                "3,3000.0,sensor.a",
+            ]
+        assert session.extract_chunk(str(out_csv), 1, None, 3) == (0, None, 3)
+        assert session.connection is connection
+
+        assert session.resolve_entity_ids("light.%") == {}
+        assert session.extract_chunk(str(out_csv), 100, None, 0) == (0, None, 0)
+
+    with pytest.raises(RuntimeError, match="not open"):
+        session.connection
+
+    with pytest.raises(Exception, match="Failed to query database state chunk"):
+        pipeline._extract_chunk_to_csv(
+            str(tmp_path / "missing.db"), str(out_csv), "sensor.%", 100
+        )
+
+
+def test_extract_chunk_streams_with_flat_peak_memory(tmp_path):
+    source_db = tmp_path / "source.db"
+    total = 40_000
+    _make_source_db(
+        source_db,
+        ((i, f"{i * 0.25:.2f}", 1000.0 + i) for i in range(1, total + 1)),
+    )
+
+    def _peak_for(chunk_size):
+        out_csv = tmp_path / f"out_{chunk_size}.csv.gz"
+        with pipeline.ExtractionSession(str(source_db)) as session:
+            session.resolve_entity_ids("sensor.%")
+            tracemalloc.start()
+            try:
+                result = session.extract_chunk(str(out_csv), chunk_size)
+                _current, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+        return result, peak
+
+    small_result, small_peak = _peak_for(4_000)
+    large_result, large_peak = _peak_for(total)
+
+    assert small_result == (4_000, 5000.0, 4_000)
+    assert large_result == (total, 1000.0 + total, total)
+    # Ten times the rows must not mean ten times the memory: a fetchall of
+    # the large chunk alone would hold several MB of row tuples.
+    assert large_peak < small_peak * 2
+    assert large_peak < 2 * 1024 * 1024
+
+
+def _mock_target(mock_target_cls):
+    target = mock_target_cls.return_value
+    target.create_schema = mock.AsyncMock(return_value=[])
+    target.create_table = mock.AsyncMock(return_value=[])
+    target._upload_file = mock.AsyncMock(return_value=[["ok"]])
+    target.upsert_new_data = mock.AsyncMock(return_value={"status": "SUCCESS"})
+    target.remove_volume_folder = mock.AsyncMock()
+    target.is_table_empty = mock.AsyncMock(return_value=False)
+    target.copy_into_table = mock.AsyncMock(return_value={"status": "SUCCESS"})
+    target.list_volume_folder = mock.AsyncMock(return_value=[])
+    target.delete_volume_file = mock.AsyncMock()
+    return target
+
+
+@mock.patch("custom_components.hass_databricks.pipeline.ExtractionSession")
+@mock.patch("custom_components.hass_databricks.pipeline.DatabricksTarget")
+@mock.patch("custom_components.hass_databricks.pipeline._extract_chunk_to_csv")
+def test_run_sync_pipeline_extracts_ahead_while_uploading(
+    mock_extract, mock_target_cls, mock_session_cls, tmp_path
+):
+    _mock_session(mock_session_cls)
+    mock_extract.side_effect = [
+        (5, 1000.0, 5),
+        (5, 2000.0, 10),
+        (5, 3000.0, 15),
+        (0, None, 15),
+    ]
+    target = _mock_target(mock_target_cls)
+
+    async def _slow_upload(path, _dbx_path):
+        if path.endswith("part_00001.csv.gz"):
+            # The first upload only finishes once extraction has moved on
+            while mock_extract.call_count < 3:
+                await asyncio.sleep(0.01)
+        return {"status": 200}
+
+    target._upload_file.side_effect = _slow_upload
+
+    result = asyncio.run(
+        asyncio.wait_for(
+            pipeline.run_sync_pipeline(
+                _request(local_path=str(tmp_path), pipeline_depth=2)
+            ),
+            timeout=5,
+        )
+    )
+
+    assert result["rows"] == 15
+    assert result["max_last_updated_ts"] == 3000.0
+    assert result["last_state_id"] == 15
+    assert [c.args[5] for c in mock_extract.call_args_list] == [0, 5, 10, 15]
+    assert target._upload_file.await_count == 3
+    target.upsert_new_data.assert_awaited_once()
+
+
+@mock.patch("custom_components.hass_databricks.pipeline.ExtractionSession")
+@mock.patch("custom_components.hass_databricks.pipeline.DatabricksTarget")
+@mock.patch("custom_components.hass_databricks.pipeline._extract_chunk_to_csv")
+def test_run_sync_pipeline_sequential_mode_waits_for_upload(
+    mock_extract, mock_target_cls, mock_session_cls, tmp_path
+):
+    _mock_session(mock_session_cls)
+    events = []
+
+    def _extract(*args, **_kwargs):
+        events.append(("extract", args[5]))
+        return (2, 1000.0, args[5] + 2) if args[5] < 4 else (0, None, args[5])
+
+    async def _upload(path, _dbx_path):
+        events.append(("upload", os.path.basename(path)))
+
+    mock_extract.side_effect = _extract
+    _mock_target(mock_target_cls)._upload_file.side_effect = _upload
+
+    asyncio.run(
+        pipeline.run_sync_pipeline(_request(local_path=str(tmp_path), pipeline_depth=0))
+    )
+
+    assert events == [
+        ("extract", 0),
+        ("upload", "part_00001.csv.gz"),
+        ("extract", 2),
+        ("upload", "part_00002.csv.gz"),
+        ("extract", 4),
+    ]
+
+
+@mock.patch("custom_components.hass_databricks.pipeline.ExtractionSession")
+@mock.patch("custom_components.hass_databricks.pipeline.DatabricksTarget")
+@mock.patch("custom_components.hass_databricks.pipeline._extract_chunk_to_csv")
+def test_run_sync_pipeline_upload_failure_stops_and_cleans_up(
+    mock_extract, mock_target_cls, mock_session_cls, tmp_path
+):
+    session = _mock_session(mock_session_cls)
+    session.resolve_start_state_id.return_value = 0
+
+    def _extract(_db, output_path, *_args, **_kwargs):
+        with open(output_path, "wb") as f:
+            f.write(b"chunk")
+        return (1, 1000.0, mock_extract.call_count)
+
+    mock_extract.side_effect = _extract
+    target = _mock_target(mock_target_cls)
+    target._upload_file.side_effect = RuntimeError("upload refused")
+
+    with pytest.raises(RuntimeError, match="upload refused"):
+        asyncio.run(
+            pipeline.run_sync_pipeline(
+                _request(local_path=str(tmp_path), pipeline_depth=2)
+            )
+        )
+
+    # Backpressure bounds how far extraction ran ahead of the failed upload
+    assert mock_extract.call_count <= 4
+    target.upsert_new_data.assert_not_awaited()
+    session.close.assert_called_once()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_adaptive_upload_limiter_grows_and_backs_off():
+    limiter = pipeline.AdaptiveUploadLimiter(3)
+    assert limiter.limit == 1
+
+    limiter.record_success(1.0)  # window of 1 at limit 1
+    assert limiter.limit == 2
+    limiter.record_success(1.1)
+    limiter.record_success(1.0)
+    assert limiter.limit == 3
+    for _ in range(5):
+        limiter.record_success(1.0)
+    assert limiter.limit == 3  # capped at the ceiling
+
+    # A latency spike resets the stable window instead of growing
+    limiter.record_backoff()
+    assert limiter.limit == 1
+    limiter.record_success(10.0)
+    assert limiter.limit == 1
+    limiter.record_success(1.0)
+    assert limiter.limit == 2
+
+
+def test_adaptive_upload_limiter_enforces_in_flight_limit():
+    async def _run():
+        limiter = pipeline.AdaptiveUploadLimiter(4, initial=2)
+        peak = 0
+
+        async def _worker():
+            nonlocal peak
+            await limiter.acquire()
+            try:
+                peak = max(peak, limiter.in_flight)
+                await asyncio.sleep(0.01)
+            finally:
+                await limiter.release()
+
+        await asyncio.gather(*(_worker() for _ in range(6)))
+        return peak, limiter.in_flight
+
+    assert asyncio.run(_run()) == (2, 0)
+
+
+def test_is_backoff_error_classification():
+    def _status(code):
+        return aiohttp.ClientResponseError(
+            request_info=mock.Mock(), history=(), status=code
+        )
+
+    assert pipeline._is_backoff_error(_status(429))
+    assert pipeline._is_backoff_error(_status(503))
+    assert pipeline._is_backoff_error(asyncio.TimeoutError())
+    assert not pipeline._is_backoff_error(_status(403))
+    assert not pipeline._is_backoff_error(ValueError("bad"))
+
+
+@mock.patch.object(pipeline, "_UPLOAD_RETRY_DELAYS", (0, 0))
+def test_upload_with_backoff_retries_throttled_uploads():
+    throttled = aiohttp.ClientResponseError(
+        request_info=mock.Mock(), history=(), status=429
+    )
+    target = mock.Mock()
+    target._upload_file = mock.AsyncMock(side_effect=[throttled, {"status": 200}])
+    limiter = pipeline.AdaptiveUploadLimiter(4, initial=4)
+
+    result = asyncio.run(
+        pipeline._upload_with_backoff(target, limiter, "/tmp/a", "/Volumes/a")
+    )
+
+    assert result == {"status": 200}
+    assert target._upload_file.await_count == 2
+    assert limiter.limit == 2
+    assert limiter.in_flight == 0
+
+    # Retries are bounded and non-throttling errors are raised immediately
+    target._upload_file = mock.AsyncMock(side_effect=throttled)
+    with pytest.raises(aiohttp.ClientResponseError):
+        asyncio.run(
+            pipeline._upload_with_backoff(target, limiter, "/tmp/a", "/Volumes/a")
+        )
+    assert target._upload_file.await_count == 3
+
+    target._upload_file = mock.AsyncMock(side_effect=ValueError("bad"))
+    with pytest.raises(ValueError):
+        asyncio.run(
+            pipeline._upload_with_backoff(target, limiter, "/tmp/a", "/Volumes/a")
+        )
+    assert target._upload_file.await_count == 1
+
+
+@mock.patch("custom_components.hass_databricks.pipeline.ExtractionSession")
+@mock.patch("custom_components.hass_databricks.pipeline.DatabricksTarget")
+@mock.patch("custom_components.hass_databricks.pipeline._extract_chunk_to_csv")
+def test_run_sync_pipeline_uploads_chunks_concurrently(
+    mock_extract, mock_target_cls, mock_session_cls, tmp_path
+):
+    _mock_session(mock_session_cls)
+    mock_extract.side_effect = [(1, 1000.0 + i, i) for i in range(1, 9)] + [
+        (0, None, 8)
+    ]
+    in_flight = 0
+    peak = 0
+
+    async def _upload(_path, _dbx_path):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+
+    _mock_target(mock_target_cls)._upload_file.side_effect = _upload
+
+    result = asyncio.run(
+        pipeline.run_sync_pipeline(
+            _request(
+                local_path=str(tmp_path), pipeline_depth=4, max_concurrent_uploads=3
+            )
+        )
+    )
+
+    assert result["rows"] == 8
+    assert 1 < peak <= 3
+
+
+class StreamingPutResponse(MockResponse):
+    """Response whose context entry drains the request body like aiohttp."""
+
+    def __init__(self, data, sizes):
+        super().__init__(200, text_data="ok")
+        self._data = data
+        self._sizes = sizes
+
+    async def __aenter__(self):
+        async for block in self._data:
+            self._sizes.append(len(block))
+        return self
+
+
+def test_upload_file_streams_blocks_with_content_length(tmp_path):
+    cfg = pipeline.RuntimeSyncConfig("main", "ha", "states", "/tmp", "/dbx")
+    target = pipeline.DatabricksTarget(
+        cfg,
+        server_hostname="host",
+        http_path="/sql/path",
+        access_token="token",
+    )
+    test_file = tmp_path / "part_00001.csv.gz"
+    test_file.write_bytes(os.urandom(8 * 1024 * 1024))
+    sizes = []
+    captured = {}
+
+    def _put(url, headers, data):
+        captured["headers"] = headers
+        return StreamingPutResponse(data, sizes)
+
+    async def _run():
+        with mock.patch("aiohttp.ClientSession.put", side_effect=_put):
+            tracemalloc.start()
+            try:
+                res = await target._upload_file(str(test_file), "/Volumes/a")
+                _current, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+        return res, peak
+
+    res, peak = asyncio.run(_run())
+
+    assert res == {"status": 200, "response": "ok"}
+    assert captured["headers"]["Content-Length"] == str(8 * 1024 * 1024)
+    assert sum(sizes) == 8 * 1024 * 1024
+    assert max(sizes) == pipeline._UPLOAD_BLOCK_SIZE
+    # The 8 MiB file is never held in memory as a whole
+    assert peak < 2 * 1024 * 1024
+
+
+@mock.patch("custom_components.hass_databricks.pipeline.DatabricksTarget")
+def test_run_sync_pipeline_in_memory_staging_never_writes_chunks(
+    mock_target_cls, tmp_path
+):
+    source_db = tmp_path / "source.db"
+    _make_source_db(source_db, [(i, str(i), 1000.0 + i) for i in range(1, 6)])
+    staging = tmp_path / "staging"
+    uploaded = {}
+
+    async def _upload(chunk, dbx_path):
+        assert not isinstance(chunk, str)
+        uploaded[dbx_path.rsplit("/", 1)[-1]] = b"".join(
+            [block async for block in pipeline._iter_file_blocks(None, chunk)]
+        )
+
+    _mock_target(mock_target_cls)._upload_file.side_effect = _upload
+
+    result = asyncio.run(
+        pipeline.run_sync_pipeline(
+            _request(
+                db_path=str(source_db),
+                local_path=str(staging),
+                min_last_updated_ts=None,
+                chunk_size=2,
+                in_memory_staging=True,
+                # Force the last buffer to spill; spilled files are unlinked
+                spool_max_bytes=64,
+            )
+        )
+    )
+
+    assert result["rows"] == 5
+    assert sorted(uploaded) == [
+        "part_00001.csv.gz",
+        "part_00002.csv.gz",
+        "part_00003.csv.gz",
+    ]
+    assert pipeline.gzip.decompress(uploaded["part_00003.csv.gz"]).decode() == (
+        "state,last_updated_ts,entity_id\r\n5,1005.0,sensor.a\r\n"
+    )
+    assert list(staging.iterdir()) == []
+
+
+def test_upload_file_streams_in_memory_buffer():
+    cfg = pipeline.RuntimeSyncConfig("main", "ha", "states", "/tmp", "/dbx")
+    target = pipeline.DatabricksTarget(
+        cfg,
+        server_hostname="host",
+        http_path="/sql/path",
+        access_token="token",
+    )
+    buffer = pipeline.tempfile.SpooledTemporaryFile(max_size=1024)
+    buffer.write(b"x" * 300)
+    sizes = []
+    captured = {}
+
+    def _put(url, headers, data):
+        captured["headers"] = headers
+        return StreamingPutResponse(data, sizes)
+
+    async def _run():
+        with mock.patch("aiohttp.ClientSession.put", side_effect=_put):
+            return await target._upload_file(buffer, "/Volumes/a")
+
+    assert asyncio.run(_run())["status"] == 200
+    assert captured["headers"]["Content-Length"] == "300"
+    assert sum(sizes) == 300
+    # Buffers stay open so a retried upload can stream them again
+    assert not buffer.closed
+    pipeline._discard_chunk(buffer)
+    assert buffer.closed
+
+
+def test_chunk_codec_from_options_validates_and_clamps():
+    assert pipeline.ChunkCodec.from_options(None) == pipeline.ChunkCodec("gzip")
+    gz = pipeline.ChunkCodec.from_options("gzip", 15)
+    assert (gz.level, gz.effective_level, gz.extension) == (9, 9, ".csv.gz")
+    assert pipeline.ChunkCodec.from_options("gzip", 0).effective_level == 9
+
+    with pytest.raises(ValueError, match="Unsupported chunk codec"):
+        pipeline.ChunkCodec.from_options("brotli")
+    with mock.patch.object(pipeline, "_zstd", None):
+        with pytest.raises(ValueError, match="requires Python 3.14"):
+            pipeline.ChunkCodec.from_options("zstd")
+
+
+def test_extract_chunk_honours_gzip_level(tmp_path):
+    source_db = tmp_path / "source.db"
+    _make_source_db(source_db, [(i, str(i % 7), 1000.0 + i) for i in range(1, 2001)])
+
+    sizes = {}
+    for level in (1, 9):
+        out = tmp_path / f"out_{level}.csv.gz"
+        codec = pipeline.ChunkCodec.from_options("gzip", level)
+        with pipeline.ExtractionSession(
+            str(source_db), encoder=pipeline.CsvChunkEncoder(codec)
+        ) as session:
+            session.resolve_entity_ids("sensor.%")
+            assert session.extract_chunk(str(out), 5000)[0] == 2000
+        sizes[level] = out.stat().st_size
+
+    assert sizes[9] < sizes[1]
+
+
+def test_extract_chunk_zstd_roundtrip(tmp_path):
+    zstd = pytest.importorskip("compression.zstd")
+    source_db = tmp_path / "source.db"
+    _make_source_db(source_db, [(1, "1", 1000.0), (2, "on", 2000.0)])
+    codec = pipeline.ChunkCodec.from_options("zstd", 30)
+    assert (codec.level, codec.extension) == (22, ".csv.zst")
+
+    out = tmp_path / f"out{codec.extension}"
+    with pipeline.ExtractionSession(
+        str(source_db), encoder=pipeline.CsvChunkEncoder(codec)
+    ) as session:
+        session.resolve_entity_ids("sensor.%")
+        assert session.extract_chunk(str(out), 100) == (2, 2000.0, 2)
+
+    assert zstd.decompress(out.read_bytes()).decode().splitlines() == [
+        "state,last_updated_ts,entity_id",
+        "1,1000.0,sensor.a",
+        "on,2000.0,sensor.a",
+    ]
+
+
+@mock.patch("custom_components.hass_databricks.pipeline.ExtractionSession")
+@mock.patch("custom_components.hass_databricks.pipeline.DatabricksTarget")
+@mock.patch("custom_components.hass_databricks.pipeline._extract_chunk_to_csv")
+def test_run_sync_pipeline_zstd_uses_matching_extension_and_glob(
+    mock_extract, mock_target_cls, mock_session_cls, tmp_path
+):
+    _mock_session(mock_session_cls)
+    mock_extract.side_effect = [(1, 1000.0, 1), (0, None, 1)]
+    target = _mock_target(mock_target_cls)
+
+    with mock.patch.object(pipeline, "_zstd", mock.Mock()):
+        asyncio.run(
+            pipeline.run_sync_pipeline(
+                _request(local_path=str(tmp_path), chunk_codec="zstd")
+            )
+        )
+
+    assert mock_session_cls.call_args.kwargs["encoder"].codec.name == "zstd"
+    assert target._upload_file.await_args.args[1].endswith("/part_00001.csv.zst")
+    assert target.upsert_new_data.await_args.args[0].endswith("/*.csv.zst")
+
+
+def test_extract_chunk_parquet_writes_typed_columns(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    source_db = tmp_path / "source.db"
+    _make_source_db(source_db, [(1, "21.5", 1000.0), (2, "on", 2000.25)])
+    encoder = pipeline.build_chunk_encoder("parquet", pipeline.ChunkCodec())
+    assert (encoder.extension, encoder.read_format) == (".parquet", "parquet")
+
+    out = tmp_path / "out.parquet"
+    with pipeline.ExtractionSession(str(source_db), encoder=encoder) as session:
+        session.resolve_entity_ids("sensor.%")
+        assert session.extract_chunk(str(out), 100) == (2, 2000.25, 2)
+
+    table = pq.read_table(out)
+    assert str(table.schema.field("state").type) == "double"
+    assert str(table.schema.field("last_updated_ts").type) == "timestamp[us, tz=UTC]"
+    assert table.column("state").to_pylist() == [21.5, None]
+    assert [ts.timestamp() for ts in table.column("last_updated_ts").to_pylist()] == [
+        1000.0,
+        2000.25,
+    ]
+    assert table.column("entity_id").to_pylist() == ["sensor.a", "sensor.a"]
+    column = pq.ParquetFile(out).metadata.row_group(0).column(2)
+    assert column.compression == "GZIP"
+    assert "RLE_DICTIONARY" in column.encodings
+
+
+def test_build_chunk_encoder_falls_back_to_csv_without_pyarrow():
+    with mock.patch.object(pipeline, "_pq", None):
+        encoder = pipeline.build_chunk_encoder("parquet")
+    assert isinstance(encoder, pipeline.CsvChunkEncoder)
+    assert encoder.extension == ".csv.gz"
+    assert isinstance(pipeline.build_chunk_encoder("csv"), pipeline.CsvChunkEncoder)
+
+
+def test_upsert_new_data_reads_parquet_without_text_casts():
+    target = pipeline.DatabricksTarget(
+        pipeline.RuntimeSyncConfig("main", "ha", "states", "/tmp/", "/Volumes/x"),
+        server_hostname="host",
+        http_path="/sql/path",
+        access_token="token",
+    )
+    with mock.patch.object(
+        target, "_execute_sql", new_callable=mock.AsyncMock
+    ) as mock_sql:
+        asyncio.run(target.upsert_new_data("vol/*.parquet", source_format="parquet"))
+
+    statement = mock_sql.await_args.args[0]
+    assert "format => 'parquet'" in statement
+    assert "TRY_CAST" not in statement
+
+
+@mock.patch("custom_components.hass_databricks.pipeline.ExtractionSession")
+@mock.patch("custom_components.hass_databricks.pipeline.DatabricksTarget")
+@mock.patch("custom_components.hass_databricks.pipeline._extract_chunk_to_csv")
+def test_run_sync_pipeline_parquet_uses_matching_extension_and_format(
+    mock_extract, mock_target_cls, mock_session_cls, tmp_path
+):
+    pytest.importorskip("pyarrow")
+    _mock_session(mock_session_cls)
+    mock_extract.side_effect = [(1, 1000.0, 1), (0, None, 1)]
+    target = _mock_target(mock_target_cls)
+
+    asyncio.run(
+        pipeline.run_sync_pipeline(
+            _request(local_path=str(tmp_path), chunk_format="parquet")
+        )
+    )
+
+    assert target._upload_file.await_args.args[1].endswith("/part_00001.parquet")
+    assert target.upsert_new_data.await_args.args[0].endswith("/*.parquet")
+    assert target.upsert_new_data.await_args.kwargs["source_format"] == "parquet"
+
+
+def test_count_pending_respects_watermarks_and_limit(tmp_path):
+    source_db = tmp_path / "source.db"
+    _make_source_db(
+        source_db, [(1, "1", 1000.0), (2, "unknown", 2000.0), (3, "3", 3000.0)]
+    )
+    with pipeline.ExtractionSession(str(source_db)) as session:
+        assert session.count_pending() == 0
+        session.resolve_entity_ids("sensor.%")
+        assert session.count_pending(limit=10) == 2
+        assert session.count_pending() == 1
+        assert session.count_pending(last_state_id=3) == 0
+        assert session.count_pending(min_last_updated_ts=3500.0) == 0
+
+
+@mock.patch("custom_components.hass_databricks.pipeline.ExtractionSession")
+@mock.patch("custom_components.hass_databricks.pipeline.DatabricksTarget")
+@mock.patch("custom_components.hass_databricks.pipeline._extract_chunk_to_csv")
+def test_run_sync_pipeline_no_pending_rows_skips_databricks(
+    mock_extract, mock_target_cls, mock_session_cls, tmp_path
+):
+    session = _mock_session(mock_session_cls)
+    session.resolve_start_state_id.return_value = 7
+    session.count_pending.return_value = 0
+
+    result = asyncio.run(
+        pipeline.run_sync_pipeline(
+            _request(local_path=str(tmp_path / "staging"), min_state_id=7)
+        )
+    )
+
+    assert result["status"] == "no_changes"
+    assert result["rows"] == 0
+    session.count_pending.assert_called_once_with(1700000000.0, 7)
+    session.close.assert_called_once()
+    mock_target_cls.assert_not_called()
+    mock_extract.assert_not_called()
+    assert not (tmp_path / "staging").exists()
+
+
+@mock.patch("custom_components.hass_databricks.pipeline.ExtractionSession")
+@mock.patch("custom_components.hass_databricks.pipeline.DatabricksTarget")
+@mock.patch("custom_components.hass_databricks.pipeline._extract_chunk_to_csv")
+def test_run_sync_pipeline_skips_ddl_for_verified_fingerprint(
+    mock_extract, mock_target_cls, mock_session_cls, tmp_path
+):
+    _mock_session(mock_session_cls)
+    fingerprint = pipeline.target_ddl_fingerprint("main", "ha", "states")
+
+    for overrides, expected_ddl_calls in (
+        ({}, 1),
+        ({"ddl_fingerprint": fingerprint}, 0),
+        ({"ddl_fingerprint": "main.ha.states#v0"}, 1),
+        ({"ddl_fingerprint": fingerprint, "force_ddl": True}, 1),
+    ):
+        mock_extract.side_effect = [(1, 1000.0, 1), (0, None, 1)]
+        target = _mock_target(mock_target_cls)
+        result = asyncio.run(
+            pipeline.run_sync_pipeline(_request(local_path=str(tmp_path), **overrides))
+        )
+        assert target.create_schema.await_count == expected_ddl_calls
+        assert target.create_table.await_count == expected_ddl_calls
+        assert result["ddl_fingerprint"] == fingerprint
+
+
+@mock.patch("custom_components.hass_databricks.pipeline.ExtractionSession")
+@mock.patch("custom_components.hass_databricks.pipeline.DatabricksTarget")
+@mock.patch("custom_components.hass_databricks.pipeline._extract_chunk_to_csv")
+def test_run_sync_pipeline_reruns_ddl_once_when_table_is_missing(
+    mock_extract, mock_target_cls, mock_session_cls, tmp_path
+):
+    _mock_session(mock_session_cls)
+    mock_extract.side_effect = [(1, 1000.0, 1), (0, None, 1)]
+    target = _mock_target(mock_target_cls)
+    target.upsert_new_data.side_effect = [
+        Exception("SQL execution failed: [TABLE_OR_VIEW_NOT_FOUND] states"),
+        {"status": "SUCCESS"},
+    ]
+    fingerprint = pipeline.target_ddl_fingerprint("main", "ha", "states")
+
+    result = asyncio.run(
+        pipeline.run_sync_pipeline(
+            _request(local_path=str(tmp_path), ddl_fingerprint=fingerprint)
+        )
+    )
+
+    assert result["upsert_state"] == {"status": "SUCCESS"}
+    target.create_schema.assert_awaited_once()
+    target.create_table.assert_awaited_once()
+    assert target.upsert_new_data.await_count == 2
+
+    # Other failures, or a miss right after fresh DDL, are not retried
+    mock_extract.side_effect = [(1, 1000.0, 1), (0, None, 1)]
+    target = _mock_target(mock_target_cls)
+    target.upsert_new_data.side_effect = Exception("[TABLE_OR_VIEW_NOT_FOUND]")
+    with pytest.raises(Exception, match="TABLE_OR_VIEW_NOT_FOUND"):
+        asyncio.run(pipeline.run_sync_pipeline(_request(local_path=str(tmp_path))))
+    target.upsert_new_data.assert_awaited_once()
+
+
+class StatementApiSession:
+    """Minimal aiohttp-like session that plays back Statement API responses."""
+
+    def __init__(self, submit, polls):
+        self._submit = submit
+        self._polls = list(polls)
+        self.calls = []
+
+    def post(self, url, **kwargs):
+        self.calls.append(("POST", url))
+        if url.endswith("/cancel"):
+            return MockResponse(200)
+        return MockResponse(200, json_data=self._submit)
+
+    def get(self, url, **kwargs):
+        self.calls.append(("GET", url))
+        return MockResponse(200, json_data=self._polls.pop(0))
+
+
+def _statement_target(session, **kwargs):
+    return pipeline.DatabricksTarget(
+        pipeline.RuntimeSyncConfig("main", "ha", "states", "/tmp", "/dbx"),
+        server_hostname="host",
+        http_path="/sql/path",
+        access_token="token",
+        session=session,
+        **kwargs,
+    )
+
+
+def test_execute_sql_polls_until_statement_finishes():
+    session = StatementApiSession(
+        {"statement_id": "s1", "status": {"state": "PENDING"}},
+        [
+            {"statement_id": "s1", "status": {"state": "RUNNING"}},
+            {"statement_id": "s1", "status": {"state": "SUCCEEDED"}},
+        ],
+    )
+    target = _statement_target(session)
+
+    with mock.patch.object(pipeline, "_STATEMENT_POLL_INITIAL", 0):
+        result = asyncio.run(target._execute_sql("MERGE INTO t"))
+
+    assert result["status"]["state"] == "SUCCEEDED"
+    assert session.calls == [
+        ("POST", "https://host/api/2.0/sql/statements"),
+        ("GET", "https://host/api/2.0/sql/statements/s1"),
+        ("GET", "https://host/api/2.0/sql/statements/s1"),
+    ]
+
+
+def test_execute_sql_cancels_statement_after_deadline():
+    running = {"statement_id": "s1", "status": {"state": "RUNNING"}}
+    session = StatementApiSession(running, [running] * 10)
+    target = _statement_target(session, statement_timeout=0.05)
+
+    with mock.patch.object(pipeline, "_STATEMENT_POLL_INITIAL", 0.01):
+        with pytest.raises(Exception, match="timed out"):
+            asyncio.run(target._execute_sql("MERGE INTO t"))
+
+    assert session.calls[-1] == (
+        "POST",
+        "https://host/api/2.0/sql/statements/s1/cancel",
+    )
+
+
+def test_execute_sql_cancels_statement_when_task_is_cancelled():
+    running = {"statement_id": "s1", "status": {"state": "RUNNING"}}
+    session = StatementApiSession(running, [running] * 10)
+    target = _statement_target(session)
+
+    async def _run():
+        task = asyncio.create_task(target._execute_sql("MERGE INTO t"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(_run())
+
+    assert session.calls[-1] == (
+        "POST",
+        "https://host/api/2.0/sql/statements/s1/cancel",
+    )
+
+
+def test_extraction_session_tracks_chunk_bounds(tmp_path):
+    source_db = tmp_path / "source.db"
+    _make_source_db(source_db, [(1, "1", 1500.0), (2, "2", 1000.0), (3, "3", 2500.0)])
+    with pipeline.ExtractionSession(str(source_db)) as session:
+        assert session.last_chunk_bounds is None
+        session.resolve_entity_ids("sensor.%")
+        session.extract_chunk(str(tmp_path / "a.csv.gz"), 2)
+        assert session.last_chunk_bounds == pipeline.MergeBounds(
+            1000.0, 1500.0, ("sensor.a",)
+        )
+        session.extract_chunk(str(tmp_path / "b.csv.gz"), 2, last_state_id=2)
+        assert session.last_chunk_bounds == pipeline.MergeBounds(
+            2500.0, 2500.0, ("sensor.a",)
+        )
+        session.extract_chunk(str(tmp_path / "c.csv.gz"), 2, last_state_id=3)
+        assert session.last_chunk_bounds is None
+
+
+def test_sync_journal_merge_bounds_cover_every_journaled_chunk():
+    async def _run():
+        journal = pipeline.SyncJournal()
+        await journal.begin(start_state_id=0)
+        await journal.add_chunk(
+            "part_00001.csv.gz",
+            0,
+            5,
+            5,
+            2000.0,
+            pipeline.MergeBounds(1000.0, 2000.0, ("sensor.b",)),
+        )
+        await journal.add_chunk(
+            "part_00002.csv.gz",
+            5,
+            9,
+            4,
+            3000.0,
+            pipeline.MergeBounds(2500.0, 3000.0, ("sensor.a",)),
+        )
+        return journal
+
+    journal = asyncio.run(_run())
+    assert journal.merge_bounds() == pipeline.MergeBounds(
+        1000.0, 3000.0, ("sensor.a", "sensor.b")
+    )
+
+    # A chunk with too many entities to list drops the IN list for the job
+    journal.set_chunk_bounds(
+        journal.chunks[1],
+        pipeline.MergeBounds(
+            2500.0,
+            3000.0,
+            tuple(
+                f"sensor.{index}"
+                for index in range(pipeline._MERGE_ENTITY_PRUNE_LIMIT + 1)
+            ),
+        ),
+    )
+    assert journal.chunks[1]["entity_ids"] is None
+    assert journal.merge_bounds() == pipeline.MergeBounds(1000.0, 3000.0)
+    assert pipeline.SyncJournal().merge_bounds() is None
+
+
+def test_upsert_new_data_prunes_target_and_skips_unchanged_rows():
+    target = _statement_target(None)
+    bounds = pipeline.MergeBounds(1000.5, 2000.25, ("sensor.a", "sensor.b"))
+
+    with mock.patch.object(
+        target, "_execute_sql", new_callable=mock.AsyncMock
+    ) as mock_sql:
+        asyncio.run(target.upsert_new_data("vol/*", bounds=bounds))
+
+    statement = mock_sql.await_args.args[0]
+    assert (
+        "target.last_updated_ts BETWEEN timestamp_micros(1000499999) "
+        "AND timestamp_micros(2000250001)"
+    ) in statement
+    assert "target.entity_id IN ('sensor.a', 'sensor.b')" in statement
+    assert "WHEN MATCHED AND target.state IS DISTINCT FROM source.state" in statement
+
+
+def test_merge_bounds_omits_oversized_entity_list():
+    entity_ids = tuple(f"sensor.s{i}" for i in range(2_000))
+    predicate = pipeline.MergeBounds(1.0, 2.0, entity_ids).target_predicate()
+    assert "entity_id IN" not in predicate
+    assert "BETWEEN" in predicate
+
+
+@mock.patch("custom_components.hass_databricks.pipeline.ExtractionSession")
+@mock.patch("custom_components.hass_databricks.pipeline.DatabricksTarget")
+@mock.patch("custom_components.hass_databricks.pipeline._extract_chunk_to_csv")
+def test_run_sync_pipeline_initial_backfill_uses_copy_into(
+    mock_extract, mock_target_cls, mock_session_cls, tmp_path
+):
+    _mock_session(mock_session_cls)
+
+    for overrides, table_empty, expected_mode in (
+        ({"min_last_updated_ts": None}, True, "copy_into"),
+        ({"min_last_updated_ts": None}, False, "merge"),
+        ({}, True, "merge"),
+        ({"min_last_updated_ts": None, "min_state_id": 5}, True, "merge"),
+    ):
+        mock_extract.side_effect = [(1, 1000.0, 1), (0, None, 1)]
+        target = _mock_target(mock_target_cls)
+        target.is_table_empty.return_value = table_empty
+
+        result = asyncio.run(
+            pipeline.run_sync_pipeline(_request(local_path=str(tmp_path), **overrides))
+        )
+
+        assert result["load_mode"] == expected_mode
+        if expected_mode == "copy_into":
+            target.upsert_new_data.assert_not_awaited()
+            source_dir, pattern = target.copy_into_table.await_args.args
+            assert source_dir.startswith("/Volumes/main/ha/ingest/upload_")
+            assert pattern == "*.csv.gz"
+        else:
+            target.copy_into_table.assert_not_awaited()
+            target.upsert_new_data.assert_awaited_once()
+    # Emptiness is only checked when no watermark exists
+    target.is_table_empty.assert_not_awaited()
+
+
+def test_copy_into_table_and_is_table_empty_statements():
+    target = _statement_target(None)
+
+    with mock.patch.object(
+        target, "_execute_sql", new_callable=mock.AsyncMock
+    ) as mock_sql:
+        mock_sql.return_value = {"result": {"data_array": []}}
+        assert asyncio.run(target.is_table_empty()) is True
+        mock_sql.return_value = {"result": {"data_array": [["1"]]}}
+        assert asyncio.run(target.is_table_empty()) is False
+
+        asyncio.run(target.copy_into_table("/Volumes/x/job", "*.parquet", "parquet"))
+
+    statement = mock_sql.await_args.args[0]
+    assert "COPY INTO `main`.`ha`.`states`" in statement
+    assert "FROM '/Volumes/x/job'" in statement
+    assert "FILEFORMAT = PARQUET" in statement
+    assert "PATTERN = '*.parquet'" in statement
+
+
+def test_create_table_layouts():
+    target = _statement_target(None)
+
+    with mock.patch.object(
+        target, "_execute_sql", new_callable=mock.AsyncMock
+    ) as mock_sql:
+        asyncio.run(target.create_table())
+        assert (
+            "CLUSTER BY (entity_id, last_updated_ts)" in (mock_sql.await_args.args[0])
+        )
+        asyncio.run(target.create_table("date_partitioned"))
+        statement = mock_sql.await_args.args[0]
+        assert "GENERATED ALWAYS AS (CAST(last_updated_ts AS DATE))" in statement
+        assert "PARTITIONED BY (last_updated_date)" in statement
+        asyncio.run(target.create_table("entity_partitioned"))
+        assert "PARTITIONED BY (entity_id)" in mock_sql.await_args.args[0]
+        with pytest.raises(ValueError, match="Unsupported table layout"):
+            asyncio.run(target.create_table("zorder"))
+
+    assert pipeline.target_ddl_fingerprint(
+        "main", "ha", "states", "date_partitioned"
+    ) != pipeline.target_ddl_fingerprint("main", "ha", "states")
+
+
+def test_migrate_table_layout_copies_through_staging_table():
+    target = _statement_target(None)
+
+    with mock.patch.object(
+        target, "_execute_sql", new_callable=mock.AsyncMock, return_value={}
+    ) as mock_sql:
+        asyncio.run(target.migrate_table_layout("liquid_clustering"))
+
+    statements = [" ".join(call.args[0].split()) for call in mock_sql.await_args_list]
+    staging = "`main`.`ha`.`states__layout_migration`"
+    assert statements[0] == (
+        "SHOW TABLES IN `main`.`ha` LIKE 'states__layout_migration'"
+    )
+    # Never CREATE OR REPLACE: that would wipe rows a failed run left behind
+    assert statements[1].startswith(f"CREATE TABLE {staging} (")
+    assert statements[2] == (
+        f"INSERT INTO {staging} (state, last_updated_ts, entity_id) "
+        "SELECT state, last_updated_ts, entity_id FROM `main`.`ha`.`states`"
+    )
+    assert statements[3].startswith("CREATE OR REPLACE TABLE `main`.`ha`.`states` (")
+    assert statements[3].endswith("CLUSTER BY (entity_id, last_updated_ts)")
+    assert statements[4].endswith(f"FROM {staging}")
+    assert statements[5] == f"DROP TABLE IF EXISTS {staging}"
+
+
+def test_migrate_table_layout_keeps_staging_rows_on_failure():
+    target = _statement_target(None)
+
+    with mock.patch.object(
+        target, "_execute_sql", new_callable=mock.AsyncMock
+    ) as mock_sql:
+        mock_sql.side_effect = [{}, {}, {}, {}, Exception("boom")]
+        with pytest.raises(Exception, match="rows are kept in .*layout_migration"):
+            asyncio.run(target.migrate_table_layout("date_partitioned"))
+
+
+def test_migrate_table_layout_resumes_copy_back_into_empty_target():
+    target = _statement_target(None)
+    leftover = {"result": {"data_array": [["ha", "states__layout_migration"]]}}
+
+    with mock.patch.object(
+        target, "_execute_sql", new_callable=mock.AsyncMock
+    ) as mock_sql:
+        # Staging exists, target is empty: the copy-back failed last time
+        mock_sql.side_effect = [leftover, {"result": {"data_array": []}}, {}, {}, {}]
+        asyncio.run(target.migrate_table_layout("liquid_clustering"))
+
+    statements = [" ".join(call.args[0].split()) for call in mock_sql.await_args_list]
+    staging = "`main`.`ha`.`states__layout_migration`"
+    assert not any(
+        statement.startswith("INSERT INTO " + staging) for statement in statements
+    )
+    assert statements[2].startswith("CREATE OR REPLACE TABLE `main`.`ha`.`states` (")
+    assert statements[3].endswith(f"FROM {staging}")
+    assert statements[4] == f"DROP TABLE IF EXISTS {staging}"
+
+    with mock.patch.object(
+        target, "_execute_sql", new_callable=mock.AsyncMock
+    ) as mock_sql:
+        # Staging exists next to a populated target: refuse rather than guess
+        mock_sql.side_effect = [leftover, {"result": {"data_array": [["1"]]}}]
+        with pytest.raises(Exception, match="interrupted migration"):
+            asyncio.run(target.migrate_table_layout("liquid_clustering"))
+    assert mock_sql.await_count == 2
+
+
+@mock.patch("custom_components.hass_databricks.pipeline.DatabricksTarget")
+def test_run_table_layout_migration_uses_the_migration_deadline(mock_target_cls):
+    mock_target_cls.return_value.migrate_table_layout = mock.AsyncMock()
+
+    asyncio.run(
+        pipeline.run_table_layout_migration(
+            _request(table_layout="liquid_clustering", statement_timeout=900)
+        )
+    )
+
+    assert (
+        mock_target_cls.call_args.kwargs["statement_timeout"]
+        == pipeline._LAYOUT_MIGRATION_STATEMENT_TIMEOUT
+    )
+
+
+def _interrupted_journal(**overrides):
+    data = {
+        "version": pipeline.SYNC_JOURNAL_VERSION,
+        "job_id": "upload_2026-04-12-09-00-00",
+        "dbx_job_path": "/Volumes/main/ha/ingest/upload_2026-04-12-09-00-00",
+        "initial_load": False,
+        "entity_like": "sensor.%",
+        "extension": ".csv.gz",
+        "dbx_volumes_path": "/Volumes/main/ha/ingest",
+        "start_state_id": 0,
+        "min_last_updated_ts": 1700000000.0,
+        "next_state_id": 9,
+        "extraction_done": False,
+        "chunks": [
+            {
+                "filename": "part_00001.csv.gz",
+                "after_state_id": 0,
+                "last_state_id": 5,
+                "rows": 5,
+                "max_ts": 1700000500.0,
+                "min_ts": 1700000100.0,
+                "entity_ids": ["sensor.removed"],
+                "uploaded": True,
+            },
+            {
+                "filename": "part_00002.csv.gz",
+                "after_state_id": 5,
+                "last_state_id": 9,
+                "rows": 4,
+                "max_ts": 1700000900.0,
+                "min_ts": 1700000600.0,
+                "entity_ids": ["sensor.a"],
+                "uploaded": False,
+            },
+        ],
+        "statement_id": None,
+    }
+    data.update(overrides)
+    return data
+
+
+@mock.patch("custom_components.hass_databricks.pipeline.ExtractionSession")
+@mock.patch("custom_components.hass_databricks.pipeline.DatabricksTarget")
+@mock.patch("custom_components.hass_databricks.pipeline._extract_chunk_to_csv")
+def test_run_sync_pipeline_resumes_only_missing_chunks(
+    mock_extract, mock_target_cls, mock_session_cls, tmp_path
+):
+    session = _mock_session(mock_session_cls)
+    session.resolve_start_state_id.return_value = 0
+    target = _mock_target(mock_target_cls)
+    # Part 3 was uploaded before the crash, but its journal entry was not saved
+    target.list_volume_folder.return_value = [
+        "part_00001.csv.gz",
+        "part_00002.csv.gz",
+        "part_00003.csv.gz",
+    ]
+    deletes_before_upload = []
+
+    async def _upload(*_args):
+        deletes_before_upload.append(target.delete_volume_file.await_count)
+
+    target._upload_file.side_effect = _upload
+    # Rebuild part 2, then one new chunk, then the end of the recorder
+    extractions = iter(
+        [
+            (4, 1700000900.0, 9, (1700000700.0, ("sensor.a",))),
+            (3, 1700001200.0, 12, (1700001000.0, ("sensor.b",))),
+            (0, None, 12, None),
+        ]
+    )
+
+    def _extract(*_args, **_kwargs):
+        rows, max_ts, next_state_id, bounds = next(extractions)
+        session.last_chunk_bounds = (
+            pipeline.MergeBounds(bounds[0], max_ts, bounds[1]) if bounds else None
+        )
+        return rows, max_ts, next_state_id
+
+    mock_extract.side_effect = _extract
+    saved = []
+
+    async def _save(data, immediate):
+        saved.append((None if data is None else dict(data), immediate))
+
+    journal = pipeline.SyncJournal(_interrupted_journal(), _save)
+    result = asyncio.run(
+        pipeline.run_sync_pipeline(_request(local_path=str(tmp_path), journal=journal))
+    )
+
+    assert result["resumed"] is True
+    assert result["filename"] == "upload_2026-04-12-09-00-00"
+    assert result["rows"] == 12
+    assert result["last_state_id"] == 12
+    assert result["max_last_updated_ts"] == 1700001200.0
+    session.count_pending.assert_not_called()
+
+    rebuild_args, rebuild_kwargs = mock_extract.call_args_list[0]
+    assert rebuild_args[3] == 4
+    assert rebuild_args[5] == 5
+    assert rebuild_kwargs["max_state_id"] == 9
+    assert mock_extract.call_args_list[1].args[5] == 9
+
+    uploaded = [call.args[1] for call in target._upload_file.await_args_list]
+    assert uploaded == [
+        "/Volumes/main/ha/ingest/upload_2026-04-12-09-00-00/part_00002.csv.gz",
+        "/Volumes/main/ha/ingest/upload_2026-04-12-09-00-00/part_00003.csv.gz",
+    ]
+    # Files the journal does not vouch for are removed before any upload
+    deleted = [call.args[0] for call in target.delete_volume_file.await_args_list]
+    assert deleted == [
+        "/Volumes/main/ha/ingest/upload_2026-04-12-09-00-00/part_00002.csv.gz",
+        "/Volumes/main/ha/ingest/upload_2026-04-12-09-00-00/part_00003.csv.gz",
+    ]
+    assert deletes_before_upload == [2, 2]
+    # Part 1's entity is gone from the recorder but still in the Volume file:
+    # the bounds come from the journal, so the MERGE still matches its rows
+    assert target.upsert_new_data.await_args.kwargs["bounds"] == pipeline.MergeBounds(
+        1700000100.0, 1700001200.0, ("sensor.a", "sensor.b", "sensor.removed")
+    )
+    assert journal.chunks == []
+    # Chunk progress is saved lazily; only closing the job is written at once
+    assert saved[-1] == (None, True)
+    assert [immediate for _data, immediate in saved[:-1]] == [False] * (len(saved) - 1)
+    assert journal.data is None
+
+
+@mock.patch("custom_components.hass_databricks.pipeline.ExtractionSession")
+@mock.patch("custom_components.hass_databricks.pipeline.DatabricksTarget")
+@mock.patch("custom_components.hass_databricks.pipeline._extract_chunk_to_csv")
+def test_run_sync_pipeline_awaits_journaled_load_statement(
+    mock_extract, mock_target_cls, mock_session_cls, tmp_path
+):
+    _mock_session(mock_session_cls)
+    finished = _interrupted_journal(extraction_done=True, statement_id="s1")
+    for chunk in finished["chunks"]:
+        chunk["uploaded"] = True
+
+    target = _mock_target(mock_target_cls)
+    target.wait_for_statement = mock.AsyncMock(
+        return_value={"status": {"state": "SUCCEEDED"}}
+    )
+    journal = pipeline.SyncJournal(finished)
+    result = asyncio.run(
+        pipeline.run_sync_pipeline(_request(local_path=str(tmp_path), journal=journal))
+    )
+
+    assert result["upsert_state"] == {"status": {"state": "SUCCEEDED"}}
+    target.wait_for_statement.assert_awaited_once_with("s1")
+    target.upsert_new_data.assert_not_awaited()
+    target._upload_file.assert_not_awaited()
+    mock_extract.assert_not_called()
+
+    # A statement that failed or expired is submitted again
+    finished = _interrupted_journal(extraction_done=True, statement_id="s1")
+    for chunk in finished["chunks"]:
+        chunk["uploaded"] = True
+    target = _mock_target(mock_target_cls)
+    target.wait_for_statement = mock.AsyncMock(side_effect=Exception("FAILED"))
+    asyncio.run(
+        pipeline.run_sync_pipeline(
+            _request(local_path=str(tmp_path), journal=pipeline.SyncJournal(finished))
+        )
+    )
+    target.upsert_new_data.assert_awaited_once()
+
+
+@mock.patch("custom_components.hass_databricks.pipeline.ExtractionSession")
+@mock.patch("custom_components.hass_databricks.pipeline.DatabricksTarget")
+@mock.patch("custom_components.hass_databricks.pipeline._extract_chunk_to_csv")
+@mock.patch("custom_components.hass_databricks.pipeline.datetime")
+def test_run_sync_pipeline_journals_progress_of_failed_job(
+    mock_datetime, mock_extract, mock_target_cls, mock_session_cls, tmp_path
+):
+    mock_datetime.now.return_value.strftime.return_value = "2026-04-12-10-00-00"
+    session = _mock_session(mock_session_cls)
+    session.last_chunk_bounds = pipeline.MergeBounds(
+        1700001000.0, 1700001111.0, ("sensor.a",)
+    )
+    mock_extract.side_effect = [(7, 1700001111.0, 7), (0, None, 7)]
+    target = _mock_target(mock_target_cls)
+    target.upsert_new_data.side_effect = Exception("network down")
+
+    # The journaled job was for another entity filter and cannot be resumed
+    journal = pipeline.SyncJournal(_interrupted_journal(entity_like="light.%"))
+    with pytest.raises(Exception, match="network down"):
+        asyncio.run(
+            pipeline.run_sync_pipeline(
+                _request(local_path=str(tmp_path), journal=journal)
+            )
+        )
+
+    target.remove_volume_folder.assert_awaited_once_with(
+        "/Volumes/main/ha/ingest/upload_2026-04-12-09-00-00"
+    )
+    assert journal.data["job_id"] == "upload_2026-04-12-10-00-00"
+    assert journal.data["extraction_done"] is True
+    assert journal.data["next_state_id"] == 7
+    assert journal.data["chunks"] == [
+        {
+            "filename": "part_00001.csv.gz",
+            "after_state_id": 0,
+            "last_state_id": 7,
+            "rows": 7,
+            "max_ts": 1700001111.0,
+            "uploaded": True,
+            "min_ts": 1700001000.0,
+            "entity_ids": ["sensor.a"],
+        }
+    ]
+    assert journal.can_resume(
+        entity_like="sensor.%",
+        extension=".csv.gz",
+        dbx_volumes_path="/Volumes/main/ha/ingest",
+        start_state_id=0,
+        min_last_updated_ts=1700000000.0,
+    )
+
+
+def test_execute_sql_reports_statement_id_and_waits_for_journaled_statement():
+    session = StatementApiSession(
+        {"statement_id": "s1", "status": {"state": "PENDING"}},
+        [
+            {"statement_id": "s1", "status": {"state": "SUCCEEDED"}},
+            {"statement_id": "s2", "status": {"state": "RUNNING"}},
+            {"statement_id": "s2", "status": {"state": "SUCCEEDED"}},
+        ],
+    )
+    target = _statement_target(session)
+    submitted = []
+
+    async def _on_submit(statement_id):
+        submitted.append(statement_id)
+
+    async def _run():
+        await target._execute_sql("MERGE INTO t", _on_submit)
+        return await target.wait_for_statement("s2")
+
+    with mock.patch.object(pipeline, "_STATEMENT_POLL_INITIAL", 0):
+        result = asyncio.run(_run())
+
+    assert submitted == ["s1"]
+    assert result["status"]["state"] == "SUCCEEDED"
+    assert session.calls[-2:] == [
+        ("GET", "https://host/api/2.0/sql/statements/s2"),
+        ("GET", "https://host/api/2.0/sql/statements/s2"),
+    ]
+
+
+def test_extraction_session_rebuilds_capped_chunk(tmp_path):
+    source_db = tmp_path / "source.db"
+    _make_source_db(
+        source_db,
+        [(1, "1", 1000.0), (2, "2", 2000.0), (3, "3", 3000.0), (4, "4", 4000.0)],
+    )
+    with pipeline.ExtractionSession(str(source_db)) as session:
+        session.resolve_entity_ids("sensor.%")
+        # Row 2 was purged: the cap keeps row 4 out of the rebuilt chunk
+        writer = pipeline.sqlite3.connect(source_db)
+        writer.execute("DELETE FROM states WHERE state_id = 2")
+        writer.commit()
+        writer.close()
+        rows, max_ts, next_id = session.extract_chunk(
+            str(tmp_path / "a.csv.gz"), 2, last_state_id=1, max_state_id=3
+        )
+        assert (rows, max_ts, next_id) == (1, 3000.0, 3)
+        assert session.last_chunk_bounds == pipeline.MergeBounds(
+            3000.0, 3000.0, ("sensor.a",)
+        )
+
+
+def test_adaptive_chunk_sizer_converges_on_byte_and_time_targets():
+    sizer = pipeline.AdaptiveChunkSizer(
+        10_000,
+        target_bytes=4_000_000,
+        target_seconds=100.0,
+        memory_ceiling_bytes=1 << 30,
+    )
+    assert sizer.next_size() == 10_000
+
+    # 20 compressed bytes per row: 200 000 rows hit the byte target, but one
+    # chunk may only grow 4x at a time
+    sizer.record(10_000, 200_000, 1_000_000, 1.0)
+    assert sizer.next_size() == 40_000
+    assert sizer.compression_ratio == 5.0
+    sizer.record(40_000, 800_000, 4_000_000, 4.0)
+    assert sizer.next_size() == 160_000
+    sizer.record(160_000, 3_200_000, 16_000_000, 16.0)
+    assert sizer.next_size() == 200_000
+
+    # Extraction slows to 1 ms per row: the time target wins
+    sizer.record(200_000, 4_000_000, 20_000_000, 600.0)
+    assert sizer.next_size() < 200_000
+    sizer.record(sizer.next_size(), 1, 1, sizer.next_size() * 0.001)
+    assert sizer.next_size() <= 100_000
+
+
+def test_adaptive_chunk_sizer_memory_ceiling_is_a_hard_cap():
+    sizer = pipeline.AdaptiveChunkSizer(
+        500_000,
+        target_bytes=1 << 30,
+        target_seconds=3600.0,
+        memory_ceiling_bytes=12_800_000,
+    )
+    # Before any measurement the default row width bounds the first chunk
+    assert sizer.next_size() == 100_000
+
+    sizer.record(100_000, 1_000_000, 25_600_000, 1.0)
+    assert sizer.next_size() == 50_000
+
+    # Stays capped even when that is below the usual minimum chunk size
+    sizer.record(50_000, 500_000, 10_000_000_000, 1.0)
+    assert sizer.next_size() < pipeline.MIN_CHUNK_SIZE
+
+
+@mock.patch("custom_components.hass_databricks.pipeline.ExtractionSession")
+@mock.patch("custom_components.hass_databricks.pipeline.DatabricksTarget")
+@mock.patch("custom_components.hass_databricks.pipeline._extract_chunk_to_csv")
+def test_run_sync_pipeline_adaptive_chunk_sizes(
+    mock_extract, mock_target_cls, mock_session_cls, tmp_path
+):
+    session = _mock_session(mock_session_cls)
+    session.resolve_start_state_id.return_value = 0
+    session.last_chunk_raw_bytes = 100_000
+    _mock_target(mock_target_cls)
+    # 1 000 rows compress to 10 kB: 100 kB needs 10 000 rows per chunk
+    session.last_chunk_bytes = 10_000
+    mock_extract.side_effect = [
+        (1_000, 1000.0, 1_000),
+        (4_000, 2000.0, 5_000),
+        (0, None, 5_000),
+    ]
+
+    asyncio.run(
+        pipeline.run_sync_pipeline(
+            _request(
+                local_path=str(tmp_path),
+                chunk_size=1_000,
+                chunk_sizing="adaptive",
+                chunk_target_bytes=100_000,
+            )
+        )
+    )
+
+    sizes = [call.args[3] for call in mock_extract.call_args_list]
+    assert sizes[0] == 1_000
+    assert sizes[1] == 4_000
+    assert sizes[2] > 4_000
+
+    # Fixed sizing keeps the configured row count
+    mock_extract.reset_mock()
+    mock_extract.side_effect = [(1_000, 1000.0, 1_000), (0, None, 1_000)]
+    asyncio.run(
+        pipeline.run_sync_pipeline(_request(local_path=str(tmp_path), chunk_size=1_000))
+    )
+    assert [call.args[3] for call in mock_extract.call_args_list] == [1_000, 1_000]
+
+
+def test_extraction_session_measures_uncompressed_chunk_bytes(tmp_path):
+    source_db = tmp_path / "source.db"
+    _make_source_db(source_db, [(1, "12.5", 1000.0), (2, "on", 2000.0)])
+    with pipeline.ExtractionSession(str(source_db)) as session:
+        session.resolve_entity_ids("sensor.%")
+        session.extract_chunk(str(tmp_path / "a.csv.gz"), 10)
+        # "sensor.a" is 8 characters wide
+        assert session.last_chunk_raw_bytes == (
+            2 * pipeline._RAW_ROW_OVERHEAD + 2 * 8 + len("12.5") + len("on")
+        )
+
+
+@mock.patch("custom_components.hass_databricks.pipeline.DatabricksTarget")
+def test_run_sync_pipeline_reports_stage_metrics(mock_target_cls, tmp_path):
+    source_db = tmp_path / "source.db"
+    _make_source_db(source_db, [(i, str(i), 1000.0 + i) for i in range(1, 6)])
+    _mock_target(mock_target_cls)
+
+    result = asyncio.run(
+        pipeline.run_sync_pipeline(
+            _request(
+                db_path=str(source_db),
+                local_path=str(tmp_path / "staging"),
+                min_last_updated_ts=None,
+                chunk_size=2,
+            )
+        )
+    )
+
+    metrics = result["metrics"]
+    assert list(metrics["stage_seconds"]) == [
+        "extract",
+        "encode",
+        "upload",
+        "ddl",
+        "merge",
+        "cleanup",
+    ]
+    assert all(seconds >= 0 for seconds in metrics["stage_seconds"].values())
+    assert metrics["rows_extracted"] == 5
+    assert metrics["raw_bytes"] > 0
+    assert metrics["compressed_bytes"] > 0
+    assert metrics["compression_ratio"] == round(
+        metrics["raw_bytes"] / metrics["compressed_bytes"], 2
+    )
+    assert metrics["duration_seconds"] >= 0
+
+
+def test_sync_metrics_upload_span_covers_overlapping_uploads():
+    metrics = pipeline.SyncMetrics()
+    metrics.record_upload(10.0, 12.0)
+    metrics.record_upload(11.0, 15.0)
+    metrics.record_upload(9.5, 10.0)
+    stats = pipeline.ExtractionStats(
+        rows=100, raw_bytes=8_000_000, encoded_bytes=1_000_000
+    )
+
+    result = metrics.as_dict(stats)
+
+    assert result["stage_seconds"]["upload"] == 5.5
+    assert result["upload_mb_per_second"] == round(1 / 5.5, 3)
+    assert result["compression_ratio"] == 8.0
+
+    # Nothing uploaded and nothing encoded: no rates to report
+    empty = pipeline.SyncMetrics().as_dict(pipeline.ExtractionStats())
+    assert empty["upload_mb_per_second"] is None
+    assert empty["compression_ratio"] is None
+
+
+def test_extraction_session_reads_generated_recorder_db(tmp_path):
+    from tests.benchmarks.recorder_db import RecorderDbSpec, build_recorder_db
+
+    source_db = tmp_path / "home-assistant_v2.db"
+    build_recorder_db(
+        str(source_db),
+        RecorderDbSpec(rows=2_000, entities=10, state_cardinality=5),
+    )
+
+    with pipeline.ExtractionSession(str(source_db)) as session:
+        # 8 numeric sensors plus the text sensor among the 2 others
+        assert len(session.resolve_entity_ids("sensor.%")) == 9
+        session.resolve_entity_ids("%")
+        rows, _max_ts, last_state_id = session.extract_chunk(
+            str(tmp_path / "chunk.csv.gz"), 5_000
+        )
+
+    conn = pipeline.sqlite3.connect(source_db)
+    try:
+        (available,) = conn.execute(
+            "SELECT COUNT(*) FROM states WHERE state != 'unavailable'"
+        ).fetchone()
+    finally:
+        conn.close()
+    # Unavailable states are skipped; they are a small generated fraction
+    assert 1_900 < available < 2_000
+    assert (rows, last_state_id) == (available, 2_000)
+
+
+def test_api_url_always_uses_https():
+    config = pipeline.RuntimeSyncConfig("main", "ha", "states", "/tmp", "/Volumes")
+    target = pipeline.DatabricksTarget(
+        config, server_hostname="adb.example", http_path="/sql/1", access_token="t"
+    )
+
+    assert target._api_url("/api/2.0/fs/files/a") == (
+        "https://adb.example/api/2.0/fs/files/a"
+    )
+
+
+@mock.patch.object(pipeline, "_UPLOAD_RETRY_DELAYS", (0, 0, 0))
+def test_run_sync_pipeline_end_to_end_against_local_databricks(tmp_path):
+    from tests.benchmarks.end_to_end import run_benchmark
+    from tests.benchmarks.mock_databricks import NetworkProfile
+    from tests.benchmarks.recorder_db import RecorderDbSpec, build_recorder_db
+
+    source_db = tmp_path / "home-assistant_v2.db"
+    build_recorder_db(str(source_db), RecorderDbSpec(rows=3_000, entities=20))
+
+    result = asyncio.run(
+        run_benchmark(
+            str(source_db),
+            str(tmp_path),
+            # Every other upload is throttled once and retried
+            NetworkProfile(throttle_rate=0.5, seed=3),
+            chunk_size=1_000,
+        )
+    )
+
+    assert result["status"] == "success"
+    assert result["load_mode"] == "copy_into"
+    server = result["server"]
+    assert server["throttled"] > 0
+    assert server["requests"]["put_file"] == 3 + server["throttled"]
+    assert server["uploaded_bytes"] == result["metrics"]["compressed_bytes"]
+    # Schema, table, emptiness check and COPY INTO
+    assert server["statements"] == 4
+    # The job folder is emptied and removed once the rows are loaded
+    assert server["requests"]["delete_file"] == 3
+    assert server["requests"]["delete_directory"] == 1
+    assert not [files for _, _, files in os.walk(tmp_path / "volumes") if files]
+
+
+def test_soak_run_samples_resources_and_reports_exceeded_ceilings(tmp_path):
+    from tests.benchmarks.mock_databricks import NetworkProfile
+    from tests.benchmarks.recorder_db import RecorderDbSpec, build_recorder_db
+    from tests.benchmarks.soak import Ceilings, run_soak, violations
+
+    source_db = tmp_path / "home-assistant_v2.db"
+    build_recorder_db(str(source_db), RecorderDbSpec(rows=3_000, entities=20))
+
+    result, samples = asyncio.run(
+        run_soak(
+            str(source_db),
+            str(tmp_path),
+            NetworkProfile(),
+            sample_interval=0.01,
+            chunk_size=1_000,
+        )
+    )
+
+    assert result["status"] == "success"
+    assert samples.samples >= 2
+    assert samples.peak_rss_mb > 0
+    assert samples.peak_open_fds > 0
+    assert violations(samples, Ceilings()) == []
+    exceeded = violations(samples, Ceilings(open_fds=0, loop_lag_ms=10_000))
+    assert len(exceeded) == 1
+    assert exceeded[0].startswith("open file descriptors")
+
+
+@mock.patch.object(pipeline, "_LOOP_LAG_PROBE_INTERVAL", 0.01)
+def test_loop_lag_monitor_pauses_while_overloaded():
+    async def _run():
+        monitor = pipeline.LoopLagMonitor(0.05)
+        monitor.start()
+        await monitor.wait_until_clear()
+        assert monitor.throttled_seconds == 0
+
+        # A single 0.5 s stall pushes the smoothed lag over the threshold
+        monitor.record_lag(0.5)
+        assert monitor.overloaded
+        await monitor.wait_until_clear()
+        await monitor.stop()
+        return monitor
+
+    monitor = asyncio.run(_run())
+
+    assert monitor.max_lag == 0.5
+    # The probe sees no lag, so the smoothed value decays within a few probes
+    assert 0 < monitor.throttled_seconds < 1
+
+
+@mock.patch.object(pipeline, "_LOOP_LAG_PROBE_INTERVAL", 0.01)
+@mock.patch.object(pipeline, "_MAX_BACKPRESSURE_PAUSE", 0.05)
+def test_loop_lag_monitor_pause_is_bounded():
+    async def _run():
+        monitor = pipeline.LoopLagMonitor(0.0001)
+        # Without the probe nothing lowers the lag
+        monitor.record_lag(10.0)
+        await monitor.wait_until_clear()
+        return monitor.throttled_seconds
+
+    assert 0.05 <= asyncio.run(_run()) < 0.5
+
+
+@mock.patch.object(pipeline, "_LOOP_LAG_PROBE_INTERVAL", 0.01)
+@mock.patch.object(pipeline, "_EXECUTOR_DELAY_LIMIT", 0.05)
+def test_loop_lag_monitor_times_the_shared_executor():
+    async def _run():
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(concurrent.futures.ThreadPoolExecutor(1))
+        release = threading.Event()
+        job = loop.run_in_executor(None, release.wait)
+        monitor = pipeline.LoopLagMonitor(10.0)
+        monitor.start()
+        # The probe queues behind the busy worker
+        await asyncio.sleep(0.2)
+        overloaded = monitor.overloaded
+        release.set()
+        await job
+        await asyncio.sleep(0.3)
+        await monitor.stop()
+        return monitor, overloaded
+
+    monitor, overloaded = asyncio.run(_run())
+
+    assert overloaded
+    assert monitor.max_executor_delay >= 0.15
+    # Once the worker is free the no-op probes finish at once
+    assert not monitor.overloaded
+
+
+def test_loop_lag_monitor_probes_the_home_assistant_executor():
+    hass = mock.MagicMock()
+    hass.async_add_executor_job = mock.AsyncMock()
+
+    async def _run():
+        monitor = pipeline.LoopLagMonitor(10.0, hass=hass)
+        monitor.start()
+        await asyncio.sleep(pipeline._LOOP_LAG_PROBE_INTERVAL * 3)
+        await monitor.stop()
+
+    asyncio.run(_run())
+
+    hass.async_add_executor_job.assert_awaited_with(pipeline._noop)
+
+
+@mock.patch.object(pipeline, "_LOOP_LAG_PROBE_INTERVAL", 0.01)
+@mock.patch("custom_components.hass_databricks.pipeline.ExtractionSession")
+@mock.patch("custom_components.hass_databricks.pipeline.DatabricksTarget")
+@mock.patch("custom_components.hass_databricks.pipeline._extract_chunk_to_csv")
+def test_run_sync_pipeline_backs_off_when_the_loop_lags(
+    mock_extract, mock_target_cls, mock_session_cls, tmp_path
+):
+    _mock_session(mock_session_cls)
+    mock_extract.side_effect = lambda *args, **_kwargs: (
+        (2, 1000.0, args[5] + 2) if args[5] < 4 else (0, None, args[5])
+    )
+
+    async def _blocking_upload(_path, _dbx_path):
+        # Stands in for another integration blocking the event loop
+        time.sleep(0.3)
+
+    _mock_target(mock_target_cls)._upload_file.side_effect = _blocking_upload
+
+    result = asyncio.run(
+        pipeline.run_sync_pipeline(
+            _request(
+                local_path=str(tmp_path), pipeline_depth=0, loop_lag_threshold=0.05
+            )
+        )
+    )
+
+    metrics = result["metrics"]
+    assert metrics["max_loop_lag_ms"] >= 250
+    assert metrics["throttled_seconds"] > 0
+
+    # A threshold of 0 turns the monitor off
+    result = asyncio.run(
+        pipeline.run_sync_pipeline(
+            _request(local_path=str(tmp_path), pipeline_depth=0, loop_lag_threshold=0)
+        )
+    )
+    assert result["metrics"]["throttled_seconds"] == 0.0
+    assert result["metrics"]["max_loop_lag_ms"] is None
+
+
+def test_sync_executor_runs_named_low_priority_workers():
+    base_niceness = os.getpriority(os.PRIO_PROCESS, threading.get_native_id())
+    executor = pipeline.create_sync_executor(2)
+    try:
+        name, niceness = executor.submit(
+            lambda: (
+                threading.current_thread().name,
+                os.getpriority(os.PRIO_PROCESS, threading.get_native_id()),
+            )
+        ).result()
+    finally:
+        executor.shutdown()
+
+    assert name.startswith("hass_databricks_sync")
+    if pipeline.sys.platform.startswith("linux"):
+        # Relative to the niceness Home Assistant already runs at
+        assert niceness == min(base_niceness + pipeline._SYNC_WORKER_NICENESS, 19)
+
+
+def test_sync_executor_keeps_a_thread_for_io():
+    executor = pipeline.create_sync_executor(1)
+    try:
+        assert executor._max_workers == pipeline.MIN_SYNC_WORKERS == 2
+    finally:
+        executor.shutdown()
+
+
+@mock.patch("custom_components.hass_databricks.pipeline.ExtractionSession")
+@mock.patch("custom_components.hass_databricks.pipeline.DatabricksTarget")
+@mock.patch("custom_components.hass_databricks.pipeline._extract_chunk_to_csv")
+def test_run_sync_pipeline_keeps_blocking_work_on_the_sync_executor(
+    mock_extract, mock_target_cls, mock_session_cls, tmp_path
+):
+    threads = []
+
+    def _record(name):
+        def _job(*args, **_kwargs):
+            threads.append((name, threading.current_thread().name))
+            if name == "extract":
+                return (2, 1000.0, args[5] + 2) if args[5] < 4 else (0, None, args[5])
+            return 0 if name == "resolve" else 1
+
+        return _job
+
+    session = _mock_session(mock_session_cls)
+    session.open.side_effect = _record("open")
+    session.resolve_start_state_id.side_effect = _record("resolve")
+    session.count_pending.side_effect = _record("count")
+    session.close.side_effect = _record("close")
+    mock_extract.side_effect = _record("extract")
+    _mock_target(mock_target_cls)
+    executor = pipeline.create_sync_executor(2)
+    hass = mock.MagicMock()
+
+    try:
+        result = asyncio.run(
+            pipeline.run_sync_pipeline(
+                _request(local_path=str(tmp_path), executor=executor, hass=hass)
+            )
+        )
+    finally:
+        executor.shutdown()
+
+    assert result["status"] == "success"
+    assert {name for name, _thread in threads} == {
+        "open",
+        "resolve",
+        "count",
+        "extract",
+        "close",
+    }
+    assert all(thread.startswith("hass_databricks_sync") for _, thread in threads)
+    # Staging directories and cleanup never touch Home Assistant's executor
+    hass.async_add_executor_job.assert_not_called()
+    assert mock_target_cls.call_args.kwargs["executor"] is executor
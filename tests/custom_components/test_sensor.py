@@ -9,6 +9,7 @@ from custom_components.hass_databricks import HassDataBricksRuntimeData
 from custom_components.hass_databricks.const import (
     SYNC_META_LAST_ERROR,
     SYNC_META_LAST_FILENAME,
+    SYNC_META_LAST_METRICS,
     SYNC_META_LAST_ROWS,
     SYNC_META_LAST_RUN_TS,
     SYNC_META_LAST_SINCE_TS,
@@ -18,9 +19,14 @@ from custom_components.hass_databricks.const import (
     SYNC_META_LAST_TRIGGER,
 )
 from custom_components.hass_databricks.sensor import (
+    HassDatabricksCompressionRatioSensor,
+    HassDatabricksLastDurationSensor,
     HassDatabricksLastRowsSensor,
     HassDatabricksLastRunSensor,
     HassDatabricksLastSuccessSensor,
+    HassDatabricksRowsPerSecondSensor,
+    HassDatabricksSyncStateSensor,
+    HassDatabricksUploadThroughputSensor,
     async_setup_entry,
     _iso_from_ts,
 )
@@ -123,14 +129,14 @@ def test_sensor_has_entity_name_enabled():
     assert sensor.has_entity_name is True
 
 
-def test_async_setup_entry_adds_three_entities():
+def test_async_setup_entry_adds_all_entities():
     hass = _hass()
     entry = _entry_with_meta({})
     added = []
 
     asyncio.run(async_setup_entry(hass, entry, lambda entities: added.extend(entities)))
 
-    assert len(added) == 3
+    assert len(added) == 8
 
 
 def test_added_to_hass_registers_event_listener():
@@ -174,3 +180,62 @@ def test_last_success_sensor_none_when_missing_timestamp():
     sensor = HassDatabricksLastSuccessSensor(hass, entry)
 
     assert sensor.native_value is None
+
+
+def test_sync_state_sensor_follows_coordinator_updates():
+    hass = _hass()
+    entry = _entry_with_meta({})
+    sensor = HassDatabricksSyncStateSensor(hass, entry)
+    sensor.async_write_ha_state = lambda: None
+
+    assert sensor.native_value == "idle"
+    assert sensor.extra_state_attributes == {"queued_runs": 0}
+
+    sensor._handle_state_change("running", 1)
+
+    assert sensor.native_value == "running"
+    assert sensor.extra_state_attributes == {"queued_runs": 1}
+
+
+def test_metric_sensors_expose_last_sync_metrics():
+    meta = {
+        SYNC_META_LAST_METRICS: {
+            "duration_seconds": 12.5,
+            "stage_seconds": {"extract": 3.0, "upload": 6.0, "merge": 2.5},
+            "rows_per_second": 8000.0,
+            "raw_bytes": 4_000_000,
+            "compressed_bytes": 500_000,
+            "compression_ratio": 8.0,
+            "upload_mb_per_second": 0.083,
+        }
+    }
+    hass = _hass()
+    entry = _entry_with_meta(meta)
+
+    duration = HassDatabricksLastDurationSensor(hass, entry)
+    rows_per_second = HassDatabricksRowsPerSecondSensor(hass, entry)
+    throughput = HassDatabricksUploadThroughputSensor(hass, entry)
+    ratio = HassDatabricksCompressionRatioSensor(hass, entry)
+
+    assert duration.native_value == 12.5
+    assert duration.unique_id == "entry-1_last_duration"
+    assert duration.extra_state_attributes == {
+        "extract_seconds": 3.0,
+        "upload_seconds": 6.0,
+        "merge_seconds": 2.5,
+    }
+    assert rows_per_second.native_value == 8000.0
+    assert throughput.native_value == 0.083
+    assert ratio.native_value == 8.0
+    assert ratio.extra_state_attributes == {
+        "raw_bytes": 4_000_000,
+        "compressed_bytes": 500_000,
+    }
+
+    # A failed or empty run clears the metrics
+    meta[SYNC_META_LAST_METRICS] = None
+    duration._refresh_from_meta()
+    ratio._refresh_from_meta()
+    assert duration.native_value is None
+    assert duration.extra_state_attributes == {}
+    assert ratio.native_value is None